@@ -14,6 +14,9 @@ def load_config():
     if os.environ.get('CLONE_DIR'):
         config['clone_dir'] = os.environ.get('CLONE_DIR')
     
+    if os.environ.get('CHECKOUT_MODE'):
+        config['checkout_mode'] = os.environ.get('CHECKOUT_MODE')
+
     if os.environ.get('SOURCES'):
         # Expect comma-separated list for env var
         config['sources'] = [s.strip() for s in os.environ.get('SOURCES').split(',')]
@@ -24,6 +27,32 @@ def load_config():
         except ValueError:
             pass
 
+    for env_name, key in (('MAX_TEMP_REPOS', 'max_temp_repos'), ('MAX_TEMP_JOBS', 'max_temp_jobs'),
+                          ('MAX_TEMP_DISK_MB', 'max_temp_disk_mb')):
+        if os.environ.get(env_name):
+            try:
+                config[key] = int(os.environ.get(env_name))
+            except ValueError:
+                pass
+
+    if os.environ.get('ALLOW_LOCAL_SOURCES'):
+        config['allow_local_sources'] = os.environ.get('ALLOW_LOCAL_SOURCES').lower() == 'true'
+
+    if os.environ.get('ZUUL_VIZ_ROLE'):
+        config['role'] = os.environ.get('ZUUL_VIZ_ROLE')
+
+    if os.environ.get('LEADER_URL'):
+        config['leader_url'] = os.environ.get('LEADER_URL')
+
+    if os.environ.get('SNAPSHOT_FILE'):
+        config['snapshot_file'] = os.environ.get('SNAPSHOT_FILE')
+
+    if os.environ.get('WEBHOOK_SECRET'):
+        config['webhook_secret'] = os.environ.get('WEBHOOK_SECRET')
+
+    if os.environ.get('ENABLE_METRICS'):
+        config['enable_metrics'] = os.environ.get('ENABLE_METRICS').lower() == 'true'
+
     if os.environ.get('ENABLE_AI'):
         config['enable_ai'] = os.environ.get('ENABLE_AI').lower() == 'true'
 
@@ -0,0 +1,171 @@
+import heapq
+
+# Entries returned per ranked list (critical paths, hotspots)
+DEFAULT_LIMIT = 20
+
+
+def _dependency_names(job):
+    names = []
+    for dep in job.get('dependencies') or []:
+        # Dependencies can be strings or dicts, like in get_graph_data
+        name = dep if isinstance(dep, str) else dep.get('name')
+        if name:
+            names.append(name)
+    return names
+
+
+def analyze_jobs(jobs, limit=DEFAULT_LIMIT):
+    """
+    Structural analysis of a job index ({name: job}), in O(jobs + edges).
+
+    - critical_paths: longest dependency chains (they bound pipeline latency),
+      one per sink job, longest first
+    - fanout_hotspots: jobs with the most descendants in the inheritance
+      tree, i.e. the jobs whose change reaches the most other jobs
+    - dangling: parents and dependencies naming jobs that are not indexed
+    - cycles: groups of jobs reaching each other through parent edges
+      (kind 'parent') or through dependency edges (kind 'dependency'); Zuul
+      rejects both. Paths mixing the two edge types are not cycles.
+    """
+    dangling = []
+    children = {name: [] for name in jobs}   # parent -> jobs inheriting from it
+    dependents = {name: [] for name in jobs} # dependency -> jobs depending on it
+    edge_count = 0
+
+    for name, job in jobs.items():
+        parent = job.get('parent')
+        if parent:
+            edge_count += 1
+            if parent in jobs:
+                children[parent].append(name)
+            else:
+                dangling.append({'job': name, 'type': 'parent', 'missing': parent})
+        for dep in _dependency_names(job):
+            edge_count += 1
+            if dep in jobs:
+                dependents[dep].append(name)
+            else:
+                dangling.append({'job': name, 'type': 'dependency', 'missing': dep})
+
+    return {
+        'jobs': len(jobs),
+        'edges': edge_count,
+        'critical_paths': _critical_paths(jobs, dependents, limit),
+        'fanout_hotspots': _fanout_hotspots(jobs, children, dependents, limit),
+        'dangling': dangling,
+        'cycles': [{'kind': 'parent', 'jobs': cycle} for cycle in _cycles(children)]
+                  + [{'kind': 'dependency', 'jobs': cycle} for cycle in _cycles(dependents)],
+    }
+
+
+def _critical_paths(jobs, dependents, limit):
+    # Longest path ending at each job, in topological (Kahn) order. Jobs on or
+    # behind a dependency cycle never reach in-degree 0 and are left out.
+    indegree = {name: 0 for name in jobs}
+    for targets in dependents.values():
+        for target in targets:
+            indegree[target] += 1
+
+    length = {}
+    previous = {}
+    queue = [name for name, degree in indegree.items() if degree == 0]
+    for name in queue:
+        length[name] = 1
+        previous[name] = None
+    i = 0
+    while i < len(queue):
+        name = queue[i]
+        i += 1
+        for target in dependents[name]:
+            if length[name] + 1 > length.get(target, 0):
+                length[target] = length[name] + 1
+                previous[target] = name
+            indegree[target] -= 1
+            if indegree[target] == 0:
+                queue.append(target)
+
+    # One chain per sink job, so paths are not prefixes of each other
+    sinks = [name for name in queue if not dependents[name] and length[name] > 1]
+    paths = []
+    for name in heapq.nsmallest(limit, sinks, key=lambda n: (-length[n], n)):
+        chain = []
+        node = name
+        while node is not None:
+            chain.append(node)
+            node = previous[node]
+        chain.reverse()
+        paths.append({'length': len(chain), 'jobs': chain})
+    return paths
+
+
+def _fanout_hotspots(jobs, children, dependents, limit):
+    # Inheritance is a forest: subtree sizes in one post-order pass from the
+    # roots. Jobs on a parent cycle are not reachable from a root and skipped.
+    descendants = {}
+    roots = [name for name, job in jobs.items() if not job.get('parent') or job['parent'] not in jobs]
+    for root in roots:
+        stack = [(root, False)]
+        while stack:
+            name, expanded = stack.pop()
+            if expanded:
+                descendants[name] = sum(descendants[child] + 1 for child in children[name])
+                continue
+            stack.append((name, True))
+            stack.extend((child, False) for child in children[name])
+
+    candidates = [name for name, count in descendants.items() if count]
+    return [
+        {
+            'job': name,
+            'descendants': descendants[name],
+            'children': len(children[name]),
+            'dependents': len(dependents[name]),
+        }
+        for name in heapq.nsmallest(limit, candidates, key=lambda n: (-descendants[n], n))
+    ]
+
+
+def _cycles(successors):
+    """Strongly connected components with more than one job, or a self-loop (iterative Tarjan)."""
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    cycles = []
+    counter = 0
+
+    for start in successors:
+        if start in index:
+            continue
+        work = [(start, 0)]
+        while work:
+            name, child_pos = work.pop()
+            if child_pos == 0:
+                index[name] = lowlink[name] = counter
+                counter += 1
+                stack.append(name)
+                on_stack.add(name)
+            targets = successors[name]
+            if child_pos < len(targets):
+                # Resume this job after visiting (or looking at) its next successor
+                work.append((name, child_pos + 1))
+                target = targets[child_pos]
+                if target not in index:
+                    work.append((target, 0))
+                elif target in on_stack:
+                    lowlink[name] = min(lowlink[name], index[target])
+                continue
+            if work:
+                caller = work[-1][0]
+                lowlink[caller] = min(lowlink[caller], lowlink[name])
+            if lowlink[name] == index[name]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == name:
+                        break
+                if len(component) > 1 or name in successors[name]:
+                    cycles.append(sorted(component))
+    return cycles
@@ -1,16 +1,26 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
+from functools import wraps
 from parser import ZuulParser
 import os
+import hashlib
 import yaml
 import shutil
-import subprocess
 import tempfile
-import hashlib
 import json
 import time
+import urllib.error
+import urllib.request
 import google.generativeai as genai
 from scheduler import JobScheduler
+from snapshot import GraphSnapshot, write_snapshot
+import graph_format
+from tasks import TaskManager
+from repo_cache import TempRepoCache, static_source_urls
+from metrics import registry as metrics
+from git_utils import resolve_project_paths
+import git_utils
+import webhooks
 from ai_utils import get_ai_client, load_config
 
 
@@ -19,102 +29,258 @@ app = Flask(__name__, static_folder='../frontend/dist', static_url_path='/')
 # Enable CORS for all domains on all routes
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-def resolve_project_paths(sources):
-    project_infos = []
-    if not sources:
-        return [], None
-    
-    if isinstance(sources, str):
-        sources = [sources]
-
-    # Remove duplicates from sources while preserving order
-    seen_sources = set()
-    unique_sources = []
-    for s in sources:
-        if s not in seen_sources:
-            unique_sources.append(s)
-            seen_sources.add(s)
-    sources = unique_sources
-
-    # Get clone directory from config
-    config = load_config()
-    clone_base_dir = config.get('clone_dir', 'repo_data')
-    if not os.path.isabs(clone_base_dir):
-        clone_base_dir = os.path.abspath(clone_base_dir)
-        
-    print(f"Cloning repositories into: {clone_base_dir}")
-
-    for source in sources:
-        # Strict check: must be a git url (or at least start with http/git/ssh)
-        # Strict check: must be a git url (or at least start with http/git/ssh)
-        if not (source.startswith('http') or source.startswith('git') or source.startswith('ssh')):
-             print(f"Skipping non-git source: {source}")
-             continue
-
-        # Normalize URL for hashing (remove .git and trailing slashes) to ensure uniqueness
-        normalized_source = source.strip().rstrip('/')
-        if normalized_source.endswith('.git'):
-            normalized_source = normalized_source[:-4]
-
-        # Create a directory name based on the repo name or hash to avoid collisions and be readable
-        repo_name = normalized_source.split('/')[-1]
-        # Add hash to ensure uniqueness if multiple repos have same name
-        url_hash = hashlib.md5(normalized_source.encode()).hexdigest()[:8]
-        target_dir_name = f"{repo_name}_{url_hash}"
-        
-        target_path = os.path.join(clone_base_dir, target_dir_name)
-        
-        if not os.path.exists(target_path):
-            print(f"Cloning {source} into {target_path}...")
-            try:
-                os.makedirs(os.path.dirname(target_path), exist_ok=True)
-                subprocess.check_call(['git', 'clone', source, target_path])
-            except subprocess.CalledProcessError as e:
-                error_msg = f"Error cloning repository {source}: {e}"
-                print(error_msg)
-                return [], error_msg
-        
-        # Get current commit hash
-        try:
-            commit_hash = subprocess.check_output(['git', '-C', target_path, 'rev-parse', 'HEAD']).decode('utf-8').strip()
-        except Exception as e:
-            print(f"Error getting commit hash for {target_path}: {e}")
-            commit_hash = 'master' # Fallback
-
-        project_infos.append({
-            'path': target_path,
-            'url': source,
-            'commit': commit_hash
-        })
-            
-    return project_infos, None
-
 # Load Config
 config = load_config()
 # Support both 'sources' (list) and legacy 'source' (string)
 sources = config.get('sources', config.get('source'))
-if not sources:
-    print("WARNING: No 'sources' configured in config.yaml or 'SOURCES' environment variable.")
-    print("The visualizer will start empty. Add sources via config or env var, or load them via the UI.")
 
-PROJECT_INFOS, _ = resolve_project_paths(sources)
+# Process role:
+# - 'standalone' (default): this process clones, parses, schedules and serves.
+# - 'leader': same as standalone, and publishes every parse as a snapshot file.
+# - 'worker': serves the leader's snapshot read-only and forwards mutating
+#   requests to the leader, so scheduler jobs run exactly once per deployment.
+ROLE = config.get('role', 'standalone')
+LEADER_URL = config.get('leader_url', 'http://127.0.0.1:5002')
+
+# Every gunicorn worker has its own registry: the pid label keeps their
+# counters apart, so each series only ever increases
+metric_labels = {'role': ROLE}
+if ROLE == 'worker':
+    metric_labels['worker'] = str(os.getpid())
+metrics.configure(config.get('enable_metrics', False), const_labels=metric_labels)
+
+def get_snapshot_path(app_config):
+    snapshot_file = app_config.get('snapshot_file')
+    if not snapshot_file:
+        clone_base_dir = app_config.get('clone_dir', 'repo_data')
+        snapshot_file = os.path.join(clone_base_dir, 'graph.snapshot')
+    return os.path.abspath(snapshot_file)
+
+SNAPSHOT_PATH = get_snapshot_path(config)
+KNOWLEDGE_FILE = 'repo_documentation.md'
+
+def branch_snapshot_path(branch):
+    """Snapshot file holding the graph of an extra indexed branch."""
+    return f"{SNAPSHOT_PATH}.{hashlib.md5(branch.encode()).hexdigest()[:8]}"
+
+# Worker-side snapshots of extra branches, opened on first request
+branch_snapshots = {}
+
+def get_branch_snapshot(branch):
+    if branch not in branch_snapshots:
+        branch_snapshots[branch] = GraphSnapshot(branch_snapshot_path(branch))
+    return branch_snapshots[branch]
+
+if ROLE == 'worker':
+    print(f"Running as worker, serving snapshot {SNAPSHOT_PATH}")
+    PROJECT_INFOS = []
+    parser = None
+    scheduler = None
+    tasks = None
+    temp_repos = None
+    snapshot = GraphSnapshot(SNAPSHOT_PATH)
+else:
+    if not sources:
+        print("WARNING: No 'sources' configured in config.yaml or 'SOURCES' environment variable.")
+        print("The visualizer will start empty. Add sources via config or env var, or load them via the UI.")
 
-print(f"Using Zuul project paths: {PROJECT_INFOS}")
-parser = ZuulParser(PROJECT_INFOS)
+    PROJECT_INFOS, _ = resolve_project_paths(sources)
+
+    print(f"Using Zuul project paths: {PROJECT_INFOS}")
+    parser = ZuulParser(PROJECT_INFOS)
+    snapshot = None
+    tasks = TaskManager(max_workers=config.get('load_repo_workers', 2))
+    temp_repos = TempRepoCache(config, PROJECT_INFOS, parser)
+
+def publish_snapshot():
+    """Writes the current graph for worker processes (leader role only)."""
+    if ROLE != 'leader':
+        return
+    try:
+        # Under the index lock: the graph and repo list come from the same
+        # parse, and concurrent publishes cannot write an older graph last
+        with parser.lock:
+            with metrics.timer('zuul_viz_graph_serialize_seconds'):
+                graph_bytes = app.json.dumps(parser.get_graph_data()).encode('utf-8')
+            metrics.set('zuul_viz_graph_bytes', len(graph_bytes))
+            branches = parser.get_branches()
+            # Branch graphs first, so a worker never sees a branch listed without its file
+            for branch in branches:
+                branch_bytes = app.json.dumps(parser.get_graph_data(branch)).encode('utf-8')
+                write_snapshot(branch_snapshot_path(branch), branch_bytes,
+                               {'branch': branch, 'analysis': parser.get_analysis(branch)})
+            write_snapshot(SNAPSHOT_PATH, graph_bytes, {'repos': active_repos(), 'branches': branches,
+                                                        'analysis': parser.get_analysis()})
+    except Exception as e:
+        print(f"Failed to publish snapshot {SNAPSHOT_PATH}: {e}")
+
+def active_repos():
+    # Copies: the scheduler updates commits in place while responses are serialized
+    with parser.lock:
+        return [dict(info) for info in parser.project_infos]
 
-# Initialize Scheduler
 # Initialize Scheduler
 def refresh_parser():
     print("Refreshing parser cache...")
+    # A lowered budget takes effect on the next sync
+    temp_repos.enforce()
     parser.parse()
+    publish_snapshot()
+
+def refresh_project(project_info):
+    with parser.lock:
+        # A clear or eviction may have dropped the repo while it was being fetched
+        if not any(info is project_info for info in parser.project_infos):
+            return
+        print(f"Refreshing jobs of {project_info['path']}...")
+        parser.parse_project(project_info)
+    publish_snapshot()
+
+if ROLE != 'worker':
+    scheduler = JobScheduler(config, PROJECT_INFOS, on_update_callback=refresh_parser,
+                             on_repo_update_callback=refresh_project)
+    temp_repos.repo_lock = scheduler.repo_lock
+    scheduler.start()
+
+def forward_to_leader():
+    target = LEADER_URL.rstrip('/') + request.full_path.rstrip('?')
+    headers = {}
+    if request.content_type:
+        headers['Content-Type'] = request.content_type
+    # The leader verifies webhook signatures against the original headers
+    for name in webhooks.FORWARDED_HEADERS:
+        if name in request.headers:
+            headers[name] = request.headers[name]
+    leader_request = urllib.request.Request(
+        target, data=request.get_data() or None, headers=headers, method=request.method
+    )
+    try:
+        with urllib.request.urlopen(leader_request, timeout=600) as resp:
+            return Response(resp.read(), status=resp.status, content_type=resp.headers.get('Content-Type'))
+    except urllib.error.HTTPError as e:
+        return Response(e.read(), status=e.code, content_type=e.headers.get('Content-Type'))
+    except urllib.error.URLError as e:
+        print(f"Leader unavailable at {LEADER_URL}: {e.reason}")
+        return jsonify({'error': 'Leader process unavailable'}), 503
+
+def leader_only(view):
+    """Routes that mutate repositories or the parser run on the leader only."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if ROLE == 'worker':
+            return forward_to_leader()
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.before_request
+def start_request_timer():
+    if metrics.enabled:
+        g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        metrics.observe('zuul_viz_http_request_seconds', time.perf_counter() - start,
+                        endpoint=request.endpoint or 'unknown', method=request.method)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    if not metrics.enabled:
+        return jsonify({'error': 'Metrics are disabled (set enable_metrics or ENABLE_METRICS)'}), 404
+    if request.args.get('format') == 'json':
+        return jsonify(metrics.export())
+
+    leader_series = None
+    if ROLE == 'worker':
+        # Parsing and fetching happen on the leader: merge its series in
+        try:
+            with urllib.request.urlopen(f"{LEADER_URL.rstrip('/')}/metrics?format=json", timeout=5) as resp:
+                leader_series = json.loads(resp.read())
+        except (urllib.error.URLError, ValueError) as e:
+            print(f"Could not fetch leader metrics: {e}")
+    return Response(metrics.render(extra=leader_series), mimetype='text/plain; version=0.0.4')
 
-scheduler = JobScheduler(config, PROJECT_INFOS, on_update_callback=refresh_parser)
-scheduler.start()
+def available_branches():
+    if ROLE == 'worker':
+        return snapshot.meta.get('branches', [])
+    return parser.get_branches()
 
 @app.route('/api/graph', methods=['GET'])
 def get_graph():
+    # ?branch= selects one of the extra indexed branches; default is each repo's HEAD
+    branch = request.args.get('branch') or None
+    if branch is not None and branch not in available_branches():
+        return jsonify({'error': f"Unknown branch '{branch}'", 'branches': available_branches()}), 404
+
+    if ROLE == 'worker':
+        # Serve the leader's pre-serialized graph without decoding it
+        graph_bytes = (get_branch_snapshot(branch) if branch else snapshot).graph_bytes()
+        if graph_bytes is None:
+            return jsonify({'nodes': [], 'edges': []})
+        return Response(graph_bytes, mimetype='application/json')
+
     # Use cached data
-    data = parser.get_graph_data()
+    data = parser.get_graph_data(branch)
+    if not metrics.enabled:
+        return jsonify(data)
+    with metrics.timer('zuul_viz_graph_serialize_seconds'):
+        response = jsonify(data)
+    metrics.set('zuul_viz_graph_bytes', response.content_length)
+    return response
+
+@app.route('/api/graph/columnar', methods=['GET'])
+def get_graph_columnar():
+    """The job graph in the compact columnar format described in graph_format.py."""
+    branch = request.args.get('branch') or None
+    if branch is not None and branch not in available_branches():
+        return jsonify({'error': f"Unknown branch '{branch}'", 'branches': available_branches()}), 404
+
+    if ROLE == 'worker':
+        data = (get_branch_snapshot(branch) if branch else snapshot).get_columnar()
+        if data is None:
+            data = graph_format.encode_graph({})
+    else:
+        data = parser.get_columnar(branch)
+    return Response(data, mimetype=graph_format.CONTENT_TYPE)
+
+@app.route('/api/analysis', methods=['GET'])
+def get_analysis():
+    """Critical paths, fan-out hotspots, dangling references and cycles of the graph."""
+    branch = request.args.get('branch') or None
+    if branch is not None and branch not in available_branches():
+        return jsonify({'error': f"Unknown branch '{branch}'", 'branches': available_branches()}), 404
+
+    if ROLE == 'worker':
+        # Computed by the leader once per parse and published with the snapshot
+        data = (get_branch_snapshot(branch) if branch else snapshot).meta.get('analysis')
+        if data is None:
+            return jsonify({'error': 'No analysis published yet'}), 503
+    else:
+        data = parser.get_analysis(branch)
+
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        data = {**data, 'critical_paths': data['critical_paths'][:limit],
+                'fanout_hotspots': data['fanout_hotspots'][:limit]}
+    return jsonify(data)
+
+@app.route('/api/jobs/<path:name>/resolved', methods=['GET'])
+def get_resolved_job(name):
+    """The job as Zuul sees it once its parents are applied: merged vars, roles, playbooks, etc."""
+    branch = request.args.get('branch') or None
+    if branch is not None and branch not in available_branches():
+        return jsonify({'error': f"Unknown branch '{branch}'", 'branches': available_branches()}), 404
+
+    if ROLE == 'worker':
+        data = (get_branch_snapshot(branch) if branch else snapshot).get_resolved_job(name)
+    else:
+        data = parser.get_resolved_job(name, branch)
+    if data is None:
+        return jsonify({'error': f"Unknown job '{name}'"}), 404
+    if temp_repos:
+        temp_repos.touch_job(name)
     return jsonify(data)
 
 @app.route('/api/chat', methods=['POST'])
@@ -122,6 +288,8 @@ def chat():
     data = request.json
     question = data.get('question', '')
     job_name = data.get('jobName')
+    if job_name and temp_repos:
+        temp_repos.touch_job(job_name)
     
     # Load knowledge
     knowledge_text = ""
@@ -146,16 +314,21 @@ Question: {question}
 
 Answer helpfuly and concisely based ONLY on the provided documentation.
 """
-            response = model.generate_content(prompt)
+            with metrics.timer('zuul_viz_ai_request_seconds'):
+                response = model.generate_content(prompt)
             return jsonify({'answer': response.text})
         except Exception as e:
             print(f"AI Error: {e}")
             return jsonify({'answer': "Error querying AI service. Check logs."})
 
     # ... (fallback logic) ...
-    if not parser.jobs:
-        parser.parse()  
-    job = parser.jobs.get(job_name)
+    if ROLE == 'worker':
+        jobs = snapshot.get_jobs()
+    else:
+        if not parser.jobs:
+            parser.parse()
+        jobs = parser.jobs
+    job = jobs.get(job_name)
     if not job:
          return jsonify({'answer': f"Job '{job_name}' not found or no job selected."})
 
@@ -179,63 +352,138 @@ Answer helpfuly and concisely based ONLY on the provided documentation.
     if 'dependency' in question or 'depend' in question:
         deps = job.get('dependencies', [])
         return jsonify({'answer': f"Dependencies: {deps}"})
-        
-    KNOWLEDGE_FILE = 'repo_documentation.md' # Defined locally now or global constant moved down if needed, but safe here logic wise
 
 
     return jsonify({'answer': "AI is not configured or failed. Basic keyword search found nothing specific."})
 
 @app.route('/api/load-repo', methods=['POST'])
+@leader_only
 def load_repo():
     data = request.json
     url = data.get('url')
     
     if not url:
         return jsonify({'error': 'URL is required'}), 400
-        
-    try:
-        # Resolve just this new path
-        new_infos, error = resolve_project_paths([url])
-        if error:
-             return jsonify({'error': f'Failed to resolve repository path: {error}'}), 400
-        if not new_infos:
-             return jsonify({'error': 'Failed to resolve repository path: Unknown error'}), 400
-             
-        new_info = new_infos[0]
-        
-        # Add to parser if not already there (check by path or url)
-        exists = False
-        for info in parser.project_infos:
-            if info['path'] == new_info['path']:
-                exists = True
-                break
-        
-        if not exists:
-            parser.project_infos.append(new_info)
+
+    # Concurrent loads of the same repository share one background task
+    task, created = tasks.submit(git_utils.normalize_source(url), load_repo_task, url)
+    return jsonify({
+        'message': 'Repository load started' if created else 'Repository load already in progress',
+        'job_id': task['id'],
+        'status_url': f"/api/jobs-status/{task['id']}",
+    }), 202
+
+def load_repo_task(report, url):
+    """Clones and incrementally parses a single repository (runs in the background)."""
+    def clone_progress(phase, percent):
+        # Map git's two clone phases onto 0-80% of the overall progress
+        if phase == 'Receiving objects':
+            report('cloning', int(percent * 0.6), phase)
+        else:
+            report('cloning', 60 + int(percent * 0.2), phase)
+
+    report('cloning', 0)
+    # Resolve just this new path
+    new_infos, error = resolve_project_paths([url], progress_callback=clone_progress)
+    if error:
+        raise RuntimeError(f'Failed to resolve repository path: {error}')
+    if not new_infos:
+        raise RuntimeError('Failed to resolve repository path: Unknown error')
+
+    new_info = new_infos[0]
+
+    report('parsing', 80)
+    # project_infos is only changed under the index lock, so a concurrent
+    # clear, sync or eviction sees it either before or after this load
+    with parser.lock:
+        # A clear may have deleted the clone while we were resolving it
+        if not os.path.isdir(new_info['path']):
+            raise RuntimeError('Repository was removed while loading, try again')
+
+        # Add to parser if not already there (check by path)
+        existing = next((info for info in parser.project_infos if info['path'] == new_info['path']), None)
+        if existing:
+            existing['commit'] = new_info['commit']
+            new_info = existing
+        else:
             # scheduler.project_infos is the same list object as parser.project_infos
             # so we only need to append once to update both.
-            
-        parser.parse()
-        
-        # Save to history - REMOVED (Client side handling)
-        # save_history_entry(url, new_info['path'])
-        
-        # Trigger explicit update/doc gen for this new repo
-        scheduler.force_run()
-        
-        return jsonify({'message': 'Repository loaded successfully', 'path': new_info['path'], 'all_paths': parser.project_infos})
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+            parser.project_infos.append(new_info)
+        temp_repos.touch(new_info['path'])
+
+        # Only the new repository is parsed; the rest of the index is untouched
+        parser.parse_project(new_info)
+        # Make room by evicting the least recently viewed temporary repos
+        evicted = temp_repos.enforce(keep=new_info['path'])
+    publish_snapshot()
+
+    return {'path': new_info['path'], 'jobs': len(parser.jobs), 'evicted': [info['path'] for info in evicted]}
+
+@app.route('/api/jobs-status/<task_id>', methods=['GET'])
+@leader_only
+def job_status(task_id):
+    task = tasks.get(task_id)
+    if not task:
+        return jsonify({'error': 'Unknown job id'}), 404
+    return jsonify(task)
+
+@app.route('/api/hooks/push', methods=['POST'])
+@leader_only
+def push_hook():
+    """Fetches and reparses only the repository a push event refers to."""
+    if not webhooks.verify_signature(config.get('webhook_secret'), request.headers,
+                                     request.get_data(), request.args.get('token')):
+        return jsonify({'error': 'Invalid webhook signature'}), 403
+
+    payload = request.get_json(silent=True)
+    urls, names = webhooks.extract_repositories(payload)
+    if not urls and not names:
+        return jsonify({'error': 'No repository found in payload'}), 400
+
+    matched = webhooks.match_projects(parser.project_infos, urls, names)
+    if not matched:
+        # Pushes to repositories we don't track are expected, not an error
+        return jsonify({'message': 'No matching repository', 'matched': []})
+
+    debounce = config.get('webhook_debounce', 5)
+    for info in matched:
+        scheduler.trigger_repo(info['path'], delay=debounce)
+    return jsonify({
+        'message': 'Update scheduled',
+        'matched': [info['path'] for info in matched],
+        'debounce': debounce,
+    }), 202
 
 @app.route('/api/repos', methods=['GET'])
 def get_repos():
     # Return currently active repos
+    if ROLE == 'worker':
+        return jsonify({'active': snapshot.get_repos()})
     return jsonify({
-        'active': parser.project_infos 
+        'active': active_repos()
     })
 
+@app.route('/api/repos/view', methods=['POST'])
+@leader_only
+def view_repo():
+    """Records that a repo (by path) or a job's repo was viewed, for LRU eviction."""
+    data = request.get_json(silent=True) or {}
+    if data.get('job'):
+        found = temp_repos.touch_job(data['job'])
+    elif data.get('path'):
+        found = temp_repos.touch(data['path'])
+    else:
+        return jsonify({'error': 'job or path is required'}), 400
+    if not found:
+        return jsonify({'error': 'Unknown job or repository'}), 404
+    return jsonify({'message': 'View recorded'})
+
+@app.route('/api/branches', methods=['GET'])
+def get_branches():
+    return jsonify({'branches': available_branches()})
+
 @app.route('/api/system/sync', methods=['POST'])
+@leader_only
 def sync_system():
     try:
         scheduler.force_run()
@@ -243,6 +491,12 @@ def sync_system():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/system/schedule', methods=['GET'])
+@leader_only
+def system_schedule():
+    # Per-repository update intervals, failures and next run times
+    return jsonify({'repos': scheduler.get_schedule()})
+
 @app.route('/api/system/status', methods=['GET'])
 def system_status():
     ai_client = get_ai_client()
@@ -251,39 +505,40 @@ def system_status():
     })
 
 @app.route('/api/clear', methods=['POST'])
+@leader_only
 def clear_graph():
     global parser
     
     # Get static config sources to protect them
-    config = load_config()
-    static_sources = config.get('sources', config.get('source')) or []
-    if isinstance(static_sources, str):
-        static_sources = [static_sources]
-    
-    static_urls = set(static_sources)
+    static_urls = static_source_urls()
 
-    # Clean up non-static repos
-    for info in parser.project_infos:
-        url = info.get('url')
-        path = info.get('path')
-        
-        if url not in static_urls:
-            if os.path.exists(path):
-                print(f"Deleting non-static repo: {path}")
-                try:
-                    shutil.rmtree(path)
-                except Exception as e:
-                    print(f"Failed to delete {path}: {e}")
-
-    # Clear all paths from memory while maintaining shared reference if they are the same
-    if parser.project_infos is scheduler.project_infos:
-        parser.project_infos.clear()
-    else:
-        parser.project_infos = []
-        scheduler.project_infos = []
-    
-    parser.jobs = {}
-    parser.cached_data = None
+    # Under the index lock, so no load or parse interleaves with the cleanup
+    with parser.lock:
+        # Clean up non-static repos
+        for info in parser.project_infos:
+            url = info.get('url')
+            path = info.get('path')
+
+            if url not in static_urls:
+                # Not while the scheduler is fetching or resetting it
+                with scheduler.repo_lock(path):
+                    if os.path.exists(path):
+                        print(f"Deleting non-static repo: {path}")
+                        try:
+                            shutil.rmtree(path)
+                        except Exception as e:
+                            print(f"Failed to delete {path}: {e}")
+
+        # Clear all paths from memory while maintaining shared reference if they are the same
+        if parser.project_infos is scheduler.project_infos:
+            parser.project_infos.clear()
+        else:
+            parser.project_infos = []
+            scheduler.project_infos = []
+            temp_repos.project_infos = parser.project_infos
+
+        parser.clear()
+    publish_snapshot()
     return jsonify({'message': 'Graph cleared and temporary repos deleted'})
     
 @app.route('/', defaults={'path': ''})
@@ -296,5 +551,5 @@ def serve(path):
 if __name__ == '__main__':
     host = os.environ.get('HOST', '0.0.0.0')
     port = int(os.environ.get('PORT', 5001))
-    debug = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
+    debug = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     app.run(debug=debug, host=host, port=port)
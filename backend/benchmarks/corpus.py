@@ -0,0 +1,134 @@
+import os
+import random
+import subprocess
+
+GIT_ENV = {
+    'GIT_AUTHOR_NAME': 'zuul-visualizer-bench',
+    'GIT_AUTHOR_EMAIL': 'bench@example.com',
+    'GIT_COMMITTER_NAME': 'zuul-visualizer-bench',
+    'GIT_COMMITTER_EMAIL': 'bench@example.com',
+}
+
+def _git(*args, cwd=None):
+    env = dict(os.environ, **GIT_ENV)
+    subprocess.check_call(['git', *args], cwd=cwd, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+class SyntheticCorpus:
+    """
+    Generates synthetic Zuul config repositories for benchmarks and tests.
+
+    Every project is a local bare repository (served through a file:// URL so
+    it goes through the regular clone/fetch code paths) plus a working copy
+    used to push new commits.
+
+    - projects: number of repositories
+    - jobs: jobs per project
+    - depth: length of the parent chains inside a project
+    - fanout: dependencies per job, picked among previously defined jobs
+    - vars_per_job: number of vars on each job
+    - files: zuul.d files per project the jobs are spread across
+    """
+
+    def __init__(self, base_dir, projects=5, jobs=50, depth=4, fanout=2, vars_per_job=5, files=4, seed=0):
+        self.base_dir = os.path.abspath(base_dir)
+        self.projects = projects
+        self.jobs = jobs
+        self.depth = max(1, depth)
+        self.fanout = fanout
+        self.vars_per_job = vars_per_job
+        self.files = max(1, files)
+        self.rng = random.Random(seed)
+        self.sources = []
+        self.work_dirs = []
+        self.revision = 0
+
+    @property
+    def params(self):
+        return {
+            'projects': self.projects,
+            'jobs': self.jobs,
+            'depth': self.depth,
+            'fanout': self.fanout,
+            'vars_per_job': self.vars_per_job,
+            'files': self.files,
+        }
+
+    def generate(self):
+        os.makedirs(self.base_dir, exist_ok=True)
+        defined = ['base']
+        for p in range(self.projects):
+            work_dir = os.path.join(self.base_dir, 'work', f'project{p}')
+            bare_dir = os.path.join(self.base_dir, 'remotes', f'project{p}.git')
+            os.makedirs(work_dir, exist_ok=True)
+            _git('init', '-q', work_dir)
+
+            self._write_project(work_dir, p, defined)
+            _git('add', '-A', cwd=work_dir)
+            _git('commit', '-q', '-m', 'Initial Zuul config', cwd=work_dir)
+            _git('clone', '-q', '--bare', work_dir, bare_dir)
+            _git('remote', 'add', 'origin', bare_dir, cwd=work_dir)
+
+            self.work_dirs.append(work_dir)
+            self.sources.append(f'file://{bare_dir}')
+        return self.sources
+
+    def _job_name(self, project, job):
+        return f'project{project}-job{job}'
+
+    def _write_project(self, work_dir, project, defined):
+        zuul_d = os.path.join(work_dir, 'zuul.d')
+        os.makedirs(zuul_d, exist_ok=True)
+        per_file = [[] for _ in range(self.files)]
+
+        if project == 0:
+            per_file[0].append(['- job:', '    name: base', '    abstract: true', '    timeout: 1800'])
+
+        for j in range(self.jobs):
+            name = self._job_name(project, j)
+            level = j % self.depth
+            parent = 'base' if level == 0 else self._job_name(project, j - 1)
+            lines = ['- job:', f'    name: {name}', f'    parent: {parent}',
+                     f'    description: Synthetic job {name} (revision {self.revision})',
+                     f'    run: playbooks/{name}.yaml']
+
+            candidates = defined[1:]
+            deps = self.rng.sample(candidates, min(self.fanout, len(candidates)))
+            if deps:
+                lines.append('    dependencies:')
+                lines.extend(f'      - {dep}' for dep in deps)
+
+            if self.vars_per_job:
+                lines.append('    vars:')
+                for v in range(self.vars_per_job):
+                    if v % 5 == 4:
+                        lines.append(f'      nested_{v}:')
+                        lines.append(f'        key: value-{self.rng.randint(0, 1000)}')
+                        lines.append(f'        enabled: {str(v % 2 == 0).lower()}')
+                    else:
+                        lines.append(f'      var_{v}: value-{self.rng.randint(0, 1000)}')
+
+            per_file[j % self.files].append(lines)
+            defined.append(name)
+
+        for i, stanzas in enumerate(per_file):
+            with open(os.path.join(zuul_d, f'jobs-{i}.yaml'), 'w') as f:
+                for stanza in stanzas:
+                    f.write('\n'.join(stanza) + '\n\n')
+
+        with open(os.path.join(zuul_d, 'project.yaml'), 'w') as f:
+            f.write('- project:\n    check:\n      jobs:\n')
+            for j in range(min(self.jobs, 10)):
+                f.write(f'        - {self._job_name(project, j)}\n')
+
+    def touch(self, project):
+        """Commits a change to one job of a project and pushes it to the bare remote."""
+        self.revision += 1
+        work_dir = self.work_dirs[project]
+        path = os.path.join(work_dir, 'zuul.d', 'jobs-0.yaml')
+        with open(path) as f:
+            content = f.read()
+        with open(path, 'w') as f:
+            f.write(content.replace('(revision ', f'(revision {self.revision}.', 1))
+        _git('commit', '-q', '-am', f'Update revision {self.revision}', cwd=work_dir)
+        _git('push', '-q', 'origin', 'HEAD', cwd=work_dir)
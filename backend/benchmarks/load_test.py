@@ -0,0 +1,304 @@
+"""
+Replays mixed API traffic against a local instance of the app and reports
+latency percentiles, throughput and consistency invariants.
+
+The app is started in-process on 127.0.0.1 with a synthetic corpus of local
+bare repositories as its sources, so nothing leaves the machine. Traffic is a
+weighted mix of graph polls, job detail fetches, syncs, repo loads and clears.
+
+Usage (from the backend directory):
+    python benchmarks/load_test.py --threads 8 --duration 30 --output load.json
+
+Exits with status 1 if an invariant was violated.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.corpus import SyntheticCorpus  # noqa: E402
+from benchmarks.run_benchmarks import current_commit, stdout_to_stderr  # noqa: E402
+
+# Relative weights of each operation in the traffic mix
+DEFAULT_MIX = {
+    'graph': 50,
+    'job_detail': 30,
+    'load_repo': 8,
+    'sync': 4,
+    'clear': 2,
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def check_invariants(parser):
+    """
+    Consistency of the shared index, checked while holding the index lock.
+    Returns a list of violation messages (empty when consistent).
+    """
+    violations = []
+    with parser.lock:
+        paths = [info['path'] for info in parser.project_infos]
+        if len(paths) != len(set(paths)):
+            violations.append(f'duplicate repositories in project_infos: {paths}')
+        for path in paths:
+            if not os.path.isdir(path):
+                violations.append(f'repository {path} is listed but its clone is gone')
+        known = set(paths)
+        orphaned = {path for path in parser.job_projects.values() if path not in known}
+        if orphaned:
+            violations.append(f'jobs indexed for repositories that are not loaded: {sorted(orphaned)}')
+        if set(parser.jobs) != set(parser.job_projects):
+            violations.append('jobs and job_projects disagree')
+        graph = parser.get_graph_data()
+        node_ids = [node['id'] for node in graph['nodes']]
+        if len(node_ids) != len(set(node_ids)):
+            violations.append('duplicate nodes in the graph')
+        if set(node_ids) != set(parser.jobs):
+            violations.append('graph nodes do not match the job index')
+    return violations
+
+
+class LoadGenerator:
+    def __init__(self, base_url, load_sources, mix, threads, duration, seed=0):
+        self.base_url = base_url.rstrip('/')
+        self.load_sources = load_sources
+        self.mix = mix
+        self.threads = threads
+        self.duration = duration
+        self.random = random.Random(seed)
+        self.samples = {name: [] for name in mix}
+        self.errors = {name: 0 for name in mix}
+        self.violations = []
+        self.job_names = []
+        self.lock = threading.Lock()
+
+    def request(self, method, path, body=None, timeout=120):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'} if data else {})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    # Operations return True on success
+
+    def op_graph(self):
+        status, payload = self.request('GET', '/api/graph')
+        if status != 200:
+            return False
+        graph = json.loads(payload)
+        node_ids = [node['id'] for node in graph['nodes']]
+        if len(node_ids) != len(set(node_ids)):
+            self.violation('graph response contains duplicate nodes')
+        with self.lock:
+            self.job_names = node_ids
+        return True
+
+    def op_job_detail(self):
+        with self.lock:
+            names = self.job_names
+        if not names:
+            return self.op_graph()
+        job_name = self.random.choice(names)
+        status, _ = self.request('GET', f'/api/jobs/{urllib.parse.quote(job_name)}/resolved')
+        # The job may have been evicted or cleared since the graph was fetched
+        return status in (200, 404)
+
+    def op_load_repo(self):
+        url = self.random.choice(self.load_sources)
+        status, payload = self.request('POST', '/api/load-repo', {'url': url})
+        if status != 202:
+            return False
+        status_url = json.loads(payload)['status_url']
+        while True:
+            status, payload = self.request('GET', status_url)
+            if status != 200:
+                return False
+            task = json.loads(payload)
+            if task['status'] == 'completed':
+                return True
+            if task['status'] == 'failed':
+                # Losing a race with a clear is an expected, reported outcome
+                return 'removed while loading' in (task.get('error') or '')
+            time.sleep(0.05)
+
+    def op_sync(self):
+        status, _ = self.request('POST', '/api/system/sync')
+        return status == 200
+
+    def op_clear(self):
+        status, _ = self.request('POST', '/api/clear')
+        return status == 200
+
+    def violation(self, message):
+        with self.lock:
+            if message not in self.violations:
+                self.violations.append(message)
+
+    def worker(self, deadline, seed):
+        rng = random.Random(seed)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                ok = getattr(self, f'op_{name}')()
+            except Exception as e:
+                print(f'{name} failed: {e}', file=sys.stderr)
+                ok = False
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.samples[name].append(elapsed)
+                if not ok:
+                    self.errors[name] += 1
+
+    def run(self):
+        deadline = time.perf_counter() + self.duration
+        threads = [threading.Thread(target=self.worker, args=(deadline, self.random.random()), daemon=True)
+                   for _ in range(self.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        operations = {}
+        for name, samples in self.samples.items():
+            operations[name] = {
+                'count': len(samples),
+                'errors': self.errors[name],
+                'p50_seconds': percentile(samples, 0.5),
+                'p99_seconds': percentile(samples, 0.99),
+                'max_seconds': max(samples) if samples else None,
+            }
+        total = sum(len(samples) for samples in self.samples.values())
+        return {
+            'seconds': elapsed,
+            'requests': total,
+            'throughput_per_second': total / elapsed if elapsed else None,
+            'operations': operations,
+        }
+
+
+def wait_idle(app_module, timeout=120):
+    """Waits for background repo loads and scheduler runs to finish."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with app_module.tasks.lock:
+            busy = any(task['status'] in ('queued', 'running') for task in app_module.tasks.tasks.values())
+        # Per-repo jobs stay scheduled; only one-off jobs (startup, force_run) count as busy
+        busy = busy or any(not job.id.startswith('repo_update:') for job in app_module.scheduler.scheduler.get_jobs())
+        if not busy:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def run(args, work_dir):
+    corpus = SyntheticCorpus(
+        os.path.join(work_dir, 'corpus'), projects=args.projects + args.loadable, jobs=args.jobs,
+        depth=args.depth, fanout=args.fanout, seed=args.seed,
+    )
+    corpus.generate()
+    static_sources = corpus.sources[:args.projects]
+    load_sources = corpus.sources[args.projects:]
+
+    # The app reads its configuration at import time
+    os.environ['CLONE_DIR'] = os.path.join(work_dir, 'clones')
+    os.environ['SOURCES'] = ','.join(static_sources)
+    os.environ['CHECKOUT_MODE'] = args.checkout_mode
+    os.environ['ALLOW_LOCAL_SOURCES'] = 'true' # The corpus is served through file:// URLs
+    os.environ['ENABLE_AI'] = 'false'
+    os.environ['GEMINI_API_KEY'] = ''
+    os.environ['ZUUL_VIZ_ROLE'] = 'standalone'
+    os.environ['MAX_TEMP_REPOS'] = str(args.max_temp_repos)
+    app_module = importlib.import_module('app')
+    app_module.refresh_parser()
+
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    try:
+        generator = LoadGenerator(f'http://127.0.0.1:{server.server_port}', load_sources,
+                                  DEFAULT_MIX, args.threads, args.duration, seed=args.seed)
+        report = generator.run()
+        if not wait_idle(app_module):
+            generator.violation('background work did not finish after the run')
+        violations = generator.violations + check_invariants(app_module.parser)
+    finally:
+        server.shutdown()
+        app_module.scheduler.shutdown()
+        app_module.tasks.shutdown()
+
+    return {
+        'commit': current_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': sys.version.split()[0],
+        'params': {**corpus.params, 'static_projects': args.projects, 'loadable_projects': args.loadable,
+                   'threads': args.threads, 'duration': args.duration, 'mix': DEFAULT_MIX,
+                   'checkout_mode': args.checkout_mode, 'seed': args.seed},
+        'results': report,
+        'invariants': {'ok': not violations, 'violations': violations},
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--projects', type=int, default=3, help='static repositories (config sources)')
+    arg_parser.add_argument('--loadable', type=int, default=4, help='repositories loaded through /api/load-repo')
+    arg_parser.add_argument('--jobs', type=int, default=100, help='jobs per repository')
+    arg_parser.add_argument('--depth', type=int, default=4, help='inheritance depth')
+    arg_parser.add_argument('--fanout', type=int, default=2, help='dependencies per job')
+    arg_parser.add_argument('--threads', type=int, default=8, help='concurrent clients')
+    arg_parser.add_argument('--duration', type=float, default=20, help='seconds of traffic')
+    arg_parser.add_argument('--max-temp-repos', type=int, default=2, help='temporary repo budget, to exercise eviction')
+    arg_parser.add_argument('--checkout-mode', choices=['worktree', 'bare'], default='worktree')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    arg_parser.add_argument('--keep', action='store_true', help='keep the generated corpus directory')
+    args = arg_parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='zuul-viz-load-')
+    try:
+        with stdout_to_stderr():
+            report = run(args, work_dir)
+    finally:
+        if args.keep:
+            print(f"Corpus kept in {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 0 if report['invariants']['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
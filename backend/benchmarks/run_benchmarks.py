@@ -0,0 +1,196 @@
+"""
+Benchmarks the parse/sync/serve hot paths against a synthetic Zuul corpus.
+
+Usage (from the backend directory):
+    python benchmarks/run_benchmarks.py --projects 20 --jobs 200 --output results.json
+
+Results are emitted as JSON so runs can be compared across commits.
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from flask import Flask  # noqa: E402
+from benchmarks.corpus import SyntheticCorpus  # noqa: E402
+from git_utils import resolve_project_paths  # noqa: E402
+from graph_format import encode_graph  # noqa: E402
+from parser import ZuulParser  # noqa: E402
+from scheduler import JobScheduler  # noqa: E402
+
+
+def measure(func, repeat):
+    """Runs func repeat times and returns timing stats plus the last result."""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+    return {
+        'min_seconds': min(durations),
+        'median_seconds': statistics.median(durations),
+        'max_seconds': max(durations),
+        'runs': repeat,
+    }, result
+
+
+def peak_rss_kb():
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+@contextlib.contextmanager
+def stdout_to_stderr():
+    """Sends stdout (including git subprocesses) to stderr, keeping stdout for the report."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def disk_usage(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if not os.path.islink(file_path):
+                total += os.path.getsize(file_path)
+    return total
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(['git', '-C', BACKEND_DIR, 'rev-parse', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def run(args, work_dir):
+    corpus = SyntheticCorpus(
+        os.path.join(work_dir, 'corpus'), projects=args.projects, jobs=args.jobs, depth=args.depth,
+        fanout=args.fanout, vars_per_job=args.vars, files=args.files, seed=args.seed,
+    )
+    corpus.generate()
+
+    # resolve_project_paths and the scheduler read clone_dir/sources through load_config
+    clone_dir = os.path.join(work_dir, 'clones')
+    os.environ['CLONE_DIR'] = clone_dir
+    os.environ['SOURCES'] = ','.join(corpus.sources)
+    os.environ['CHECKOUT_MODE'] = args.checkout_mode
+    os.environ['ALLOW_LOCAL_SOURCES'] = 'true' # The corpus is served through file:// URLs
+
+    results = {}
+
+    start = time.perf_counter()
+    project_infos, error = resolve_project_paths(corpus.sources)
+    if error:
+        raise RuntimeError(error)
+    results['clone'] = {'seconds': time.perf_counter() - start, 'disk_bytes': disk_usage(clone_dir)}
+
+    parser = ZuulParser(project_infos)
+
+    def cold_parse():
+        # Parsed blobs survive parse() in bare mode: drop them so every run parses all files
+        parser.blob_cache = {}
+        return parser.parse()
+    results['cold_parse'], _ = measure(cold_parse, args.repeat)
+    results['cold_parse']['jobs'] = len(parser.jobs)
+
+    def build_graph():
+        parser.cached_data = None
+        return parser.get_graph_data()
+    results['get_graph_data'], graph = measure(build_graph, args.repeat)
+    results['get_graph_data']['nodes'] = len(graph['nodes'])
+    results['get_graph_data']['edges'] = len(graph['edges'])
+
+    # Same JSON provider settings as the /api/graph response
+    json_provider = Flask(__name__).json
+    results['graph_serialization'], payload = measure(lambda: json_provider.dumps(graph), args.repeat)
+    results['graph_serialization']['bytes'] = len(payload.encode('utf-8'))
+
+    results['columnar_serialization'], columnar = measure(lambda: encode_graph(parser.jobs), args.repeat)
+    results['columnar_serialization']['bytes'] = len(columnar)
+
+    scheduler = JobScheduler({}, project_infos, on_update_callback=parser.parse)
+    results['sync_no_changes'], _ = measure(scheduler.update_repos_and_docs, args.repeat)
+
+    # Incremental reparse: push a change to one repo, fetch it, reparse only that project
+    def incremental():
+        corpus.touch(0)
+        info = project_infos[0]
+        scheduler._fetch_repo(info)
+        start = time.perf_counter()
+        parser.parse_project(info)
+        return time.perf_counter() - start
+    durations = [incremental() for _ in range(args.repeat)]
+    results['incremental_reparse'] = {
+        'min_seconds': min(durations),
+        'median_seconds': statistics.median(durations),
+        'max_seconds': max(durations),
+        'runs': args.repeat,
+    }
+
+    return {
+        'commit': current_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': sys.version.split()[0],
+        'params': {**corpus.params, 'seed': args.seed, 'repeat': args.repeat, 'checkout_mode': args.checkout_mode},
+        'results': results,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--projects', type=int, default=5, help='number of repositories')
+    arg_parser.add_argument('--jobs', type=int, default=100, help='jobs per repository')
+    arg_parser.add_argument('--depth', type=int, default=4, help='inheritance depth')
+    arg_parser.add_argument('--fanout', type=int, default=2, help='dependencies per job')
+    arg_parser.add_argument('--vars', type=int, default=5, help='vars per job')
+    arg_parser.add_argument('--files', type=int, default=4, help='zuul.d files per repository')
+    arg_parser.add_argument('--checkout-mode', choices=['worktree', 'bare'], default='worktree',
+                            help='clone with working trees or as bare mirrors parsed from git objects')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--repeat', type=int, default=3, help='runs per measurement')
+    arg_parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    arg_parser.add_argument('--keep', action='store_true', help='keep the generated corpus directory')
+    args = arg_parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='zuul-viz-bench-')
+    try:
+        with stdout_to_stderr():
+            report = run(args, work_dir)
+    finally:
+        if args.keep:
+            print(f"Corpus kept in {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
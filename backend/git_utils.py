@@ -0,0 +1,232 @@
+import hashlib
+import os
+import re
+import subprocess
+from ai_utils import load_config
+from metrics import registry as metrics
+
+PROGRESS_RE = re.compile(r'(Receiving objects|Resolving deltas):\s+(\d+)%')
+
+def normalize_source(source):
+    """Normalizes a git URL (no .git suffix or trailing slashes) so the same repo always maps to one entry."""
+    normalized_source = source.strip().rstrip('/')
+    if normalized_source.endswith('.git'):
+        normalized_source = normalized_source[:-4]
+    return normalized_source
+
+def repo_dir_name(source):
+    """Readable, collision-free clone directory name for a git URL."""
+    normalized_source = normalize_source(source)
+    repo_name = normalized_source.split('/')[-1]
+    # Add hash to ensure uniqueness if multiple repos have same name
+    url_hash = hashlib.md5(normalized_source.encode()).hexdigest()[:8]
+    return f"{repo_name}_{url_hash}"
+
+def clone(source, target_path, progress_callback=None, extra_args=()):
+    """
+    Clones source into target_path.
+
+    When progress_callback is given, git's progress output is parsed and the
+    callback is invoked with (phase, percent) as the clone advances.
+    Raises subprocess.CalledProcessError on failure, like check_call.
+    """
+    if not progress_callback:
+        subprocess.check_call(['git', 'clone', *extra_args, source, target_path])
+        return
+
+    cmd = ['git', 'clone', '--progress', *extra_args, source, target_path]
+    proc = subprocess.Popen(cmd, stderr=subprocess.PIPE)
+    last = None
+    buffer = b''
+    # git rewrites progress lines with '\r', so split on both line endings
+    while True:
+        chunk = proc.stderr.read(256)
+        if not chunk:
+            break
+        buffer += chunk
+        lines = re.split(rb'[\r\n]', buffer)
+        buffer = lines.pop()
+        for line in lines:
+            match = PROGRESS_RE.search(line.decode('utf-8', 'replace'))
+            if match and (match.group(1), match.group(2)) != last:
+                last = (match.group(1), match.group(2))
+                progress_callback(match.group(1), int(match.group(2)))
+    returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+def clone_bare(source, target_path, progress_callback=None):
+    """
+    Clones source as a bare repository whose local branches mirror the remote
+    ones, so a plain `git fetch origin` keeps every branch up to date.
+    """
+    clone(source, target_path, progress_callback=progress_callback, extra_args=['--bare'])
+    subprocess.check_call(['git', '-C', target_path, 'config', 'remote.origin.fetch', '+refs/heads/*:refs/heads/*'])
+
+def ls_tree(repo_path, ref, paths=()):
+    """Returns (mode, type, sha, path) for every blob under paths at ref."""
+    cmd = ['git', '-C', repo_path, 'ls-tree', '-r', '-z', '--full-tree', ref, '--', *paths]
+    output = subprocess.check_output(cmd)
+    entries = []
+    for record in output.split(b'\0'):
+        if not record:
+            continue
+        info, _, path = record.partition(b'\t')
+        mode, obj_type, sha = info.decode('ascii').split()
+        entries.append((mode, obj_type, sha, path.decode('utf-8', 'replace')))
+    return entries
+
+def branch_ref(project_info, branch):
+    """Ref holding a branch: local heads in bare mirrors, remote-tracking refs in clones."""
+    if project_info.get('bare'):
+        return f'refs/heads/{branch}'
+    return f'refs/remotes/origin/{branch}'
+
+def list_refs(repo_path):
+    """Returns {refname: sha} for every branch in the repository, in one git call."""
+    output = subprocess.check_output([
+        'git', '-C', repo_path, 'for-each-ref', '--format=%(refname) %(objectname)',
+        'refs/heads', 'refs/remotes/origin',
+    ]).decode('utf-8')
+    return dict(line.split(' ', 1) for line in output.splitlines() if line)
+
+class CatFileBatch:
+    """
+    Long-lived `git cat-file --batch` process for one repository.
+
+    Objects are requested over stdin and streamed back over stdout, so reading
+    hundreds of blobs costs one process instead of one per file.
+    """
+
+    # Requests written before reading responses back, so neither pipe fills up
+    BATCH_SIZE = 256
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.proc = None
+
+    def _ensure_process(self):
+        if self.proc is None or self.proc.poll() is not None:
+            self.proc = subprocess.Popen(
+                ['git', '-C', self.repo_path, 'cat-file', '--batch'],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            )
+        return self.proc
+
+    def _read_response(self, proc):
+        header = proc.stdout.readline()
+        if not header:
+            raise RuntimeError(f"git cat-file exited unexpectedly in {self.repo_path}")
+        if header.endswith(b' missing\n') or header.endswith(b' ambiguous\n'):
+            return None
+        size = int(header.split()[2])
+        data = proc.stdout.read(size)
+        proc.stdout.read(1) # Trailing newline after the object contents
+        return data
+
+    def read(self, object_name):
+        """Returns the raw contents of an object, or None if it does not exist."""
+        return self.read_many([object_name])[0]
+
+    def read_many(self, object_names):
+        proc = self._ensure_process()
+        results = []
+        for i in range(0, len(object_names), self.BATCH_SIZE):
+            batch = object_names[i:i + self.BATCH_SIZE]
+            proc.stdin.write(b''.join(name.encode('utf-8') + b'\n' for name in batch))
+            proc.stdin.flush()
+            results.extend(self._read_response(proc) for _ in batch)
+        return results
+
+    def close(self):
+        if self.proc and self.proc.poll() is None:
+            self.proc.stdin.close()
+            self.proc.wait()
+        self.proc = None
+
+def resolve_project_paths(sources, progress_callback=None):
+    project_infos = []
+    if not sources:
+        return [], None
+    
+    if isinstance(sources, str):
+        sources = [sources]
+
+    # Remove duplicates from sources while preserving order
+    seen_sources = set()
+    unique_sources = []
+    for s in sources:
+        if s not in seen_sources:
+            unique_sources.append(s)
+            seen_sources.add(s)
+    sources = unique_sources
+
+    # Get clone directory from config
+    config = load_config()
+    clone_base_dir = config.get('clone_dir', 'repo_data')
+    if not os.path.isabs(clone_base_dir):
+        clone_base_dir = os.path.abspath(clone_base_dir)
+    # 'bare' keeps bare mirrors and parses straight from git objects
+    bare = config.get('checkout_mode', 'worktree') == 'bare'
+    # Extra branches to index per repository: {url: [branch, ...]}
+    branch_config = {
+        normalize_source(url): list(branches)
+        for url, branches in (config.get('branches') or {}).items()
+    }
+    # file:// sources would let any client of /api/load-repo clone (and expose)
+    # repositories from the server's filesystem: only for tests and benchmarks
+    allow_local = config.get('allow_local_sources', False)
+    rejected = []
+        
+    print(f"Cloning repositories into: {clone_base_dir}")
+
+    for source in sources:
+        # Strict check: must be a git url (http/git/ssh, or file:// for local mirrors)
+        if not (source.startswith('http') or source.startswith('git') or source.startswith('ssh') or source.startswith('file://')):
+             print(f"Skipping non-git source: {source}")
+             continue
+        if source.startswith('file://') and not allow_local:
+            print(f"Skipping local source (allow_local_sources is off): {source}")
+            rejected.append(source)
+            continue
+
+        # Directory name is derived from the normalized URL (repo name + hash)
+        target_path = os.path.join(clone_base_dir, repo_dir_name(source) + ('.git' if bare else ''))
+        
+        if not os.path.exists(target_path):
+            print(f"Cloning {source} into {target_path}...")
+            try:
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                with metrics.timer('zuul_viz_repo_fetch_seconds', repo=os.path.basename(target_path), operation='clone'):
+                    if bare:
+                        clone_bare(source, target_path, progress_callback=progress_callback)
+                    else:
+                        clone(source, target_path, progress_callback=progress_callback)
+            except subprocess.CalledProcessError as e:
+                metrics.inc('zuul_viz_repo_fetch_failures_total', repo=os.path.basename(target_path), operation='clone')
+                error_msg = f"Error cloning repository {source}: {e}"
+                print(error_msg)
+                return [], error_msg
+        
+        # Get current commit hash
+        try:
+            commit_hash = subprocess.check_output(['git', '-C', target_path, 'rev-parse', 'HEAD']).decode('utf-8').strip()
+        except Exception as e:
+            print(f"Error getting commit hash for {target_path}: {e}")
+            commit_hash = 'master' # Fallback
+
+        project_info = {
+            'path': target_path,
+            'url': source,
+            'commit': commit_hash
+        }
+        if bare:
+            project_info['bare'] = True
+        branches = branch_config.get(normalize_source(source))
+        if branches:
+            project_info['branches'] = branches
+        project_infos.append(project_info)
+
+    if rejected and not project_infos:
+        return [], f"Local sources are not allowed: {', '.join(rejected)}"
+    return project_infos, None
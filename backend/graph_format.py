@@ -0,0 +1,185 @@
+import json
+import mmap
+import struct
+import sys
+
+# Columnar job graph: a compact alternative to the /api/graph JSON.
+#
+# All integers are little-endian and every array starts on a 4-byte boundary,
+# so browsers can view them with typed arrays and Python with memoryview
+# casts, without building a dict per job.
+#
+#   header            MAGIC, then u32 version, jobs (N), strings (S),
+#                     dependencies (D), string bytes, var bytes
+#   string_offsets    u32[S + 1]   byte offsets into string_data
+#   parents           i32[N]       string index of the parent, -1 if none
+#   dep_offsets       u32[N + 1]   job i depends on deps[dep_offsets[i]:dep_offsets[i + 1]]
+#   deps              u32[D]       string indexes
+#   dep_flags         u8[D]        DEP_SOFT if the dependency is soft, padded to 4 bytes
+#   sources           i32[N]       string index of the source URL, -1 if none
+#   var_offsets       u32[N + 1]   job i's vars are var_data[var_offsets[i]:var_offsets[i + 1]]
+#   string_data       UTF-8, padded to 4 bytes
+#   var_data          one compact JSON object per job (empty when it has no vars)
+#
+# Strings 0..N-1 are the job names, in index order. Parents and dependencies
+# naming jobs that are not indexed get strings after those.
+
+MAGIC = b'ZVGRAPH\0'
+VERSION = 2
+HEADER = struct.Struct('<8s6I')
+CONTENT_TYPE = 'application/vnd.zuul-viz.graph'
+# dep_flags bits
+DEP_SOFT = 1
+
+
+def _dependencies(job):
+    """(name, soft) of each dependency; they can be strings or {'name', 'soft'} dicts."""
+    result = []
+    for dep in job.get('dependencies') or []:
+        if isinstance(dep, str):
+            result.append((dep, False))
+        elif dep.get('name'):
+            result.append((dep['name'], bool(dep.get('soft'))))
+    return result
+
+
+def _u32(values, code='I'):
+    return struct.pack(f'<{len(values)}{code}', *values)
+
+
+def encode_graph(jobs):
+    """Encodes a job index ({name: job}) in the columnar format."""
+    names = list(jobs)
+    string_index = {name: i for i, name in enumerate(names)}
+
+    def intern(value):
+        if value not in string_index:
+            string_index[value] = len(names)
+            names.append(value)
+        return string_index[value]
+
+    parents = []
+    dep_offsets = [0]
+    deps = []
+    dep_flags = bytearray()
+    sources = []
+    var_offsets = [0]
+    var_blocks = []
+    var_size = 0
+    for name in list(jobs):
+        job = jobs[name]
+        parent = job.get('parent')
+        parents.append(intern(parent) if parent else -1)
+        for dep, soft in _dependencies(job):
+            deps.append(intern(dep))
+            dep_flags.append(DEP_SOFT if soft else 0)
+        dep_offsets.append(len(deps))
+        source = job.get('source_url')
+        sources.append(intern(source) if source else -1)
+        block = b''
+        if job.get('vars'):
+            block = json.dumps(job['vars'], separators=(',', ':'), default=str).encode('utf-8')
+        var_blocks.append(block)
+        var_size += len(block)
+        var_offsets.append(var_size)
+
+    encoded = [name.encode('utf-8') for name in names]
+    string_offsets = [0]
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+    string_data = b''.join(encoded)
+    string_data += b'\0' * (-len(string_data) % 4)
+    dep_flags += b'\0' * (-len(dep_flags) % 4)
+
+    return b''.join([
+        HEADER.pack(MAGIC, VERSION, len(jobs), len(names), len(deps), len(string_data), var_size),
+        _u32(string_offsets),
+        _u32(parents, 'i'),
+        _u32(dep_offsets),
+        _u32(deps),
+        bytes(dep_flags),
+        _u32(sources, 'i'),
+        _u32(var_offsets),
+        string_data,
+    ] + var_blocks)
+
+
+def write_graph(path, jobs):
+    with open(path, 'wb') as f:
+        f.write(encode_graph(jobs))
+
+
+class GraphReader:
+    """
+    Zero-copy view of an encoded graph (bytes, or a file through open()).
+
+    Arrays are exposed as memoryviews cast to 32-bit integers, strings are
+    only decoded when asked for.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        magic, version, jobs, strings, deps, string_bytes, var_bytes = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ValueError('Not a columnar graph')
+        if version != VERSION:
+            raise ValueError(f'Unsupported columnar graph version {version}')
+        self.job_count = jobs
+        self.string_count = strings
+
+        offset = HEADER.size
+        self.string_offsets, offset = self._array(offset, strings + 1, 'I')
+        self.parents, offset = self._array(offset, jobs, 'i')
+        self.dep_offsets, offset = self._array(offset, jobs + 1, 'I')
+        self.deps, offset = self._array(offset, deps, 'I')
+        self.dep_flags = self.buffer[offset:offset + deps]
+        offset += deps + -deps % 4
+        self.sources, offset = self._array(offset, jobs, 'i')
+        self.var_offsets, offset = self._array(offset, jobs + 1, 'I')
+        self.string_data = self.buffer[offset:offset + string_bytes]
+        offset += string_bytes
+        self.var_data = self.buffer[offset:offset + var_bytes]
+        self._index = None
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _array(self, offset, count, code):
+        end = offset + count * 4
+        view = self.buffer[offset:end]
+        if sys.byteorder == 'little':
+            return view.cast(code), end
+        return struct.unpack(f'<{count}{code}', view), end
+
+    def string(self, index):
+        return str(self.string_data[self.string_offsets[index]:self.string_offsets[index + 1]], 'utf-8')
+
+    def name(self, job):
+        return self.string(job)
+
+    def index(self, name):
+        """Job index of a name, or None. Builds a name lookup on first use."""
+        if self._index is None:
+            self._index = {self.string(i): i for i in range(self.job_count)}
+        return self._index.get(name)
+
+    def parent(self, job):
+        parent = self.parents[job]
+        return None if parent < 0 else self.string(parent)
+
+    def dependencies(self, job):
+        return [self.string(self.deps[i]) for i in range(self.dep_offsets[job], self.dep_offsets[job + 1])]
+
+    def soft_dependencies(self, job):
+        """Whether each of dependencies(job) is soft, in the same order."""
+        return [bool(self.dep_flags[i] & DEP_SOFT) for i in range(self.dep_offsets[job], self.dep_offsets[job + 1])]
+
+    def source(self, job):
+        source = self.sources[job]
+        return None if source < 0 else self.string(source)
+
+    def vars(self, job):
+        block = self.var_data[self.var_offsets[job]:self.var_offsets[job + 1]]
+        return json.loads(bytes(block)) if len(block) else {}
@@ -0,0 +1,85 @@
+# Production launch configuration:
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# The gunicorn master spawns a single leader process bound to localhost. The
+# leader owns the JobScheduler, cloning and parsing, and publishes every parse
+# to a snapshot file. The HTTP workers run with ZUUL_VIZ_ROLE=worker: they
+# serve the graph from the memory-mapped snapshot and forward mutating
+# requests to the leader.
+#
+# The leader is itself a gunicorn server with this file as its config and
+# ZUUL_VIZ_ROLE=leader: one worker process (so the scheduler runs once), which
+# its own master restarts if it dies. The main master restarts the leader if
+# it exits, and shuts down if it keeps exiting, rather than leaving workers
+# serving a stale snapshot.
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+leader_port = os.environ.get('LEADER_PORT', '5002')
+# More leader exits than this within the window stop the whole server
+LEADER_MAX_RESTARTS = int(os.environ.get('LEADER_MAX_RESTARTS', '5'))
+LEADER_RESTART_WINDOW = 300
+LEADER_RESTART_DELAY = 2
+
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+# Forwarded repo loads can take a while on large repositories
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '600'))
+
+if os.environ.get('ZUUL_VIZ_ROLE') == 'leader':
+    bind = f'127.0.0.1:{leader_port}'
+    workers = 1
+else:
+    bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '5001')}"
+    workers = int(os.environ.get('WEB_CONCURRENCY', '4'))
+    raw_env = [
+        'ZUUL_VIZ_ROLE=worker',
+        f'LEADER_URL=http://127.0.0.1:{leader_port}',
+    ]
+
+    def _start_leader(server):
+        env = dict(os.environ)
+        env.update({'ZUUL_VIZ_ROLE': 'leader', 'FLASK_DEBUG': 'false'})
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+        server.log.info(f"Starting leader process on 127.0.0.1:{leader_port}")
+        return subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', os.path.abspath(__file__), 'app:app'],
+                                cwd=app_dir, env=env)
+
+    def _supervise_leader(server):
+        exits = []
+        while True:
+            code = server.leader_process.wait()
+            if server.leader_stopping.is_set():
+                return
+            now = time.monotonic()
+            exits = [t for t in exits if now - t < LEADER_RESTART_WINDOW] + [now]
+            if len(exits) > LEADER_MAX_RESTARTS:
+                server.log.error(f"Leader exited {len(exits)} times in {LEADER_RESTART_WINDOW}s, shutting down")
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+            server.log.warning(f"Leader process exited with status {code}, restarting")
+            time.sleep(LEADER_RESTART_DELAY)
+            if server.leader_stopping.is_set():
+                return
+            server.leader_process = _start_leader(server)
+
+    def on_starting(server):
+        server.leader_stopping = threading.Event()
+        server.leader_process = _start_leader(server)
+        threading.Thread(target=_supervise_leader, args=(server,), name='leader-supervisor', daemon=True).start()
+
+    def on_exit(server):
+        stopping = getattr(server, 'leader_stopping', None)
+        if stopping:
+            stopping.set()
+        leader = getattr(server, 'leader_process', None)
+        if leader and leader.poll() is None:
+            server.log.info("Stopping leader process")
+            leader.terminate()
+            try:
+                leader.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                leader.kill()
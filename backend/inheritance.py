@@ -0,0 +1,170 @@
+from collections.abc import Mapping
+
+# How each attribute combines with the value inherited from the parent, after
+# Zuul's job inheritance rules. Attributes not listed are overridden by the
+# child when it sets them.
+DEEP_MERGED = {'vars', 'extra-vars', 'host-vars', 'group-vars'} # child keys win, recursively
+PARENT_FIRST = {'pre-run'}                # parent's playbooks run before the child's
+CHILD_FIRST = {'post-run', 'cleanup-run'} # child's playbooks run before the parent's
+ROLES = {'roles'}                         # child's roles first, then inherited ones not repeated
+BY_NAME = {'required-projects', 'secrets'} # union keyed by name, child's entry wins
+UNION = {'tags', 'provides', 'requires'}
+# Links to where each var is defined: merged like vars (child keys win), not
+# reported in attribute_sources
+SOURCE_LINKS = {'vars_source'}
+# Properties of a job definition itself: never inherited
+NOT_INHERITED = {
+    'name', 'parent', 'abstract', 'intermediate', 'final', 'protected',
+    'source_file', 'source_line', 'source_path', 'source_url',
+}
+# Derived data added to graph nodes, not part of the job
+IGNORED = {'inherited_vars'}
+
+
+def _plain(value):
+    """Copies YAML containers into plain dicts/lists, so results never share the parser's objects."""
+    if isinstance(value, Mapping):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return _plain(value)
+    return [_plain(value)]
+
+
+def _merge_dicts(base, override):
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, Mapping) and isinstance(merged.get(key), Mapping):
+            merged[key] = _merge_dicts(merged[key], value)
+        else:
+            merged[key] = _plain(value)
+    return merged
+
+
+def _entry_key(entry):
+    if isinstance(entry, Mapping):
+        return entry.get('name') or entry.get('zuul') or repr(sorted(entry.items()))
+    return entry
+
+
+def _role_key(role):
+    if isinstance(role, Mapping):
+        return (role.get('zuul') or role.get('galaxy'), role.get('name'))
+    return role
+
+
+def _union_by(inherited, child, key):
+    merged = {key(entry): entry for entry in inherited}
+    for entry in child:
+        merged[key(entry)] = entry
+    return list(merged.values())
+
+
+def _apply(inherited, name, job):
+    """Returns the resolution of job, given the resolution of its parent (None for a root job)."""
+    if inherited is None:
+        resolved, sources, chain, errors = {}, {}, [], []
+    else:
+        resolved = {key: value for key, value in inherited['job'].items() if key not in NOT_INHERITED}
+        sources = {key: value for key, value in inherited['attribute_sources'].items() if key not in NOT_INHERITED}
+        chain = list(inherited['inheritance'])
+        errors = list(inherited['errors'])
+        if inherited['job'].get('final'):
+            errors.append(f"Job '{name}' inherits from final job '{inherited['name']}'")
+
+    for key, value in job.items():
+        if key in IGNORED:
+            continue
+        if key in SOURCE_LINKS:
+            resolved[key] = {**(resolved.get(key) or {}), **_plain(value or {})}
+            continue
+        if key in DEEP_MERGED and isinstance(value, Mapping):
+            resolved[key] = _merge_dicts(resolved.get(key) or {}, value)
+        elif key in PARENT_FIRST:
+            resolved[key] = resolved.get(key, []) + _as_list(value)
+        elif key in CHILD_FIRST:
+            resolved[key] = _as_list(value) + resolved.get(key, [])
+        elif key in ROLES:
+            child_roles = _as_list(value)
+            child_keys = {_role_key(role) for role in child_roles}
+            resolved[key] = child_roles + [role for role in resolved.get(key, []) if _role_key(role) not in child_keys]
+        elif key in BY_NAME:
+            resolved[key] = _union_by(resolved.get(key, []), _as_list(value), _entry_key)
+        elif key in UNION:
+            resolved[key] = _union_by(resolved.get(key, []), _as_list(value), lambda entry: entry)
+        else:
+            resolved[key] = _plain(value)
+            sources[key] = [name]
+            continue
+        sources[key] = sources.get(key, []) + [name]
+
+    chain.append(name)
+    return {
+        'name': name,
+        'inheritance': chain,
+        'job': resolved,
+        'attribute_sources': sources,
+        'errors': errors,
+    }
+
+
+def resolve_job(jobs, name, memo=None):
+    """
+    The effective configuration of a job after applying its whole parent
+    chain, or None if the job is not indexed.
+
+    The result holds the merged job, the inheritance chain (root first), the
+    jobs each attribute came from and any inheritance errors (undefined
+    parent, cycle, inheriting from a final job).
+
+    memo ({name: (job, parent_result, result)}) is reused across calls: a
+    job is only resolved again if its definition or one of its ancestors'
+    was replaced in the index.
+    """
+    if name not in jobs:
+        return None
+
+    chain = []
+    seen = set()
+    errors = []
+    current = name
+    while True:
+        if current in seen:
+            errors.append(f"Inheritance cycle through job '{current}'")
+            break
+        seen.add(current)
+        chain.append(current)
+        parent = jobs[current].get('parent')
+        if not parent:
+            break
+        if parent not in jobs:
+            errors.append(f"Parent job '{parent}' of '{current}' is not defined")
+            break
+        current = parent
+
+    if errors:
+        # A broken chain depends on jobs outside of it (the missing parent,
+        # where the cycle was entered): resolved again on every call
+        memo = None
+
+    inherited = None
+    for job_name in reversed(chain):
+        job = jobs[job_name]
+        entry = memo.get(job_name) if memo is not None else None
+        if entry and entry[0] is job and entry[1] is inherited:
+            inherited = entry[2]
+            continue
+        result = _apply(inherited, job_name, job)
+        if inherited is None:
+            result['errors'] = errors + result['errors']
+        if memo is not None:
+            memo[job_name] = (job, inherited, result)
+        inherited = result
+    return inherited
@@ -0,0 +1,164 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    'zuul_viz_repo_fetch_seconds': 'Time spent cloning or fetching a repository.',
+    'zuul_viz_repo_fetch_failures_total': 'Failed clone or fetch operations.',
+    'zuul_viz_sync_seconds': 'Duration of a full repository sync run.',
+    'zuul_viz_parse_seconds': 'Duration of a ZuulParser parse run.',
+    'zuul_viz_parse_file_seconds': 'Time spent parsing a single Zuul config file.',
+    'zuul_viz_jobs': 'Number of jobs in the index.',
+    'zuul_viz_edges': 'Number of edges in the graph.',
+    'zuul_viz_graph_build_seconds': 'Time spent building graph data from the job index.',
+    'zuul_viz_analysis_seconds': 'Time spent computing the graph analysis.',
+    'zuul_viz_resolve_seconds': 'Time spent resolving a job through its inheritance chain.',
+    'zuul_viz_graph_cache_total': 'Graph data cache lookups by result.',
+    'zuul_viz_graph_serialize_seconds': 'Time spent serializing graph data to JSON.',
+    'zuul_viz_graph_bytes': 'Size of the last serialized graph.',
+    'zuul_viz_http_request_seconds': 'HTTP request latency by endpoint.',
+    'zuul_viz_ai_request_seconds': 'Latency of AI model calls.',
+}
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class Registry:
+    """
+    Minimal in-process metrics registry rendered in the Prometheus text format.
+
+    Disabled by default: every recording call returns immediately, so the
+    instrumentation left in hot paths costs a single attribute check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.const_labels = {}
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def configure(self, enabled, const_labels=None):
+        self.enabled = bool(enabled)
+        self.const_labels = dict(const_labels or {})
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {'buckets': [0] * len(DEFAULT_BUCKETS), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(DEFAULT_BUCKETS):
+                if value <= bound:
+                    hist['buckets'][i] += 1
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def remove(self, **labels):
+        """Drops every series carrying these label values (e.g. of a repository that is gone)."""
+        wanted = set(labels.items())
+        with self.lock:
+            for series in (self.counters, self.gauges, self.histograms):
+                for key in [key for key in series if wanted <= set(key[1])]:
+                    del series[key]
+
+    def timer(self, name, **labels):
+        """Context manager observing the duration of its block into histogram name."""
+        if not self.enabled:
+            return _NOOP_TIMER
+        return self._timer(name, labels)
+
+    @contextmanager
+    def _timer(self, name, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def export(self):
+        """Raw series (with const labels applied), for merging into another process' render()."""
+        const = tuple(self.const_labels.items())
+        with self.lock:
+            return {
+                'counter': [[name, const + labels, value] for (name, labels), value in self.counters.items()],
+                'gauge': [[name, const + labels, value] for (name, labels), value in self.gauges.items()],
+                'histogram': [[name, const + labels, {**value, 'buckets': list(value['buckets'])}] for (name, labels), value in self.histograms.items()],
+            }
+
+    def render(self, extra=None):
+        """
+        Renders the Prometheus text format. extra is the export() of another
+        process (the leader, in production mode); its series are merged into
+        the same metric families.
+        """
+        families = {}
+        for source in (self.export(), extra or {}):
+            for metric_type in ('counter', 'gauge', 'histogram'):
+                for name, labels, value in source.get(metric_type, []):
+                    families.setdefault((name, metric_type), []).append((tuple(map(tuple, labels)), value))
+
+        lines = []
+        for name, metric_type in sorted(families):
+            if name in HELP:
+                lines.append(f'# HELP {name} {HELP[name]}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for labels, value in families[(name, metric_type)]:
+                if metric_type != 'histogram':
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+                    continue
+                for bound, count in zip(DEFAULT_BUCKETS, value['buckets']):
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {count}')
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {value["count"]}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {value["sum"]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {value["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for k, v in labels:
+        v = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{k}="{v}"')
+    return '{' + ','.join(parts) + '}'
+
+
+# Process-wide registry used by all modules
+registry = Registry()
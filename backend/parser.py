@@ -1,24 +1,234 @@
 import os
+import subprocess
+import threading
 from ruamel.yaml import YAML
+from metrics import registry as metrics
+import git_utils
+from analysis import analyze_jobs
+from graph_format import encode_graph
+from inheritance import resolve_job
+
+# Where Zuul looks for in-repo configuration, in load order
+CONFIG_FILES = ['zuul.yaml', '.zuul.yaml']
+CONFIG_DIRS = ['zuul.d', '.zuul.d']
+CONFIG_PATHS = CONFIG_FILES + CONFIG_DIRS
+
+def select_config_blobs(entries):
+    """
+    Picks the Zuul config files out of ls-tree entries, in the same order and
+    with the same .zuul.ignore handling as the working tree parser.
+    Returns a list of (sha, relative_path).
+    """
+    ignored_dirs = {os.path.dirname(path) for _, _, _, path in entries if os.path.basename(path) == '.zuul.ignore'}
+    blobs = {path: sha for _, obj_type, sha, path in entries if obj_type == 'blob'}
+
+    selected = [(blobs[name], name) for name in CONFIG_FILES if name in blobs]
+    for dirname in CONFIG_DIRS:
+        for path in sorted(blobs):
+            if (path.startswith(dirname + '/') and path.endswith('.yaml')
+                    and os.path.dirname(path) not in ignored_dirs):
+                selected.append((blobs[path], path))
+    return selected
 
 class ZuulParser:
     def __init__(self, project_infos):
         # project_infos is a list of dicts: {'path': ..., 'url': ..., 'commit': ...}
         self.project_infos = project_infos
         self.jobs = {}
+        self.job_projects = {} # job name -> path of the project defining it
         self.yaml = YAML()
         self.cached_data = None
+        self.cat_files = {} # repo path -> git_utils.CatFileBatch, for bare mirrors
+        # Extra branch indexes: branch -> {'jobs': {...}, 'job_projects': {...}, 'cached_data': ..., 'version': n}
+        self.branches = {}
+        # Parsed YAML keyed by blob sha, shared by every branch/commit containing
+        # the same file. Entries no indexed (project, branch) uses are dropped.
+        self.blob_cache = {}
+        # (project path, branch or None for the default index) -> blob shas its jobs came from
+        self.project_blobs = {}
+        # Bumped whenever the index changes; derived results are cached per generation
+        self.generation = 0
+        # (kind, branch) -> (index version, result); branch is None for the default index
+        self.derived_cache = {}
+        # branch -> memo of inheritance.resolve_job, pruned when the generation changes
+        self.resolved_memo = {}
+        self._resolved_generation = None
+        # Guards jobs/cached_data: parses run from the scheduler and background tasks
+        self.lock = threading.RLock()
 
     def parse(self):
+        with self.lock, metrics.timer('zuul_viz_parse_seconds', scope='full'):
+            # Reset jobs
+            self.jobs = {}
+            self.job_projects = {}
+            self.cached_data = None # Invalidate cache
+            self.project_blobs = {}
 
-        # Reset jobs
-        self.jobs = {}
-        self.cached_data = None # Invalidate cache
-        
+            for info in self.project_infos:
+                self._parse_project_path(info)
+
+            self._build_branch_indexes()
+            self._prune_blob_cache()
+            self.generation += 1
+
+            # Stop cat-file processes of repositories that are gone
+            current_paths = {info['path'] for info in self.project_infos}
+            for path in list(self.cat_files):
+                if path not in current_paths:
+                    self.cat_files.pop(path).close()
+
+            metrics.set('zuul_viz_jobs', len(self.jobs))
+            return self.jobs
+
+    def parse_project(self, project_info):
+        """Incrementally (re)parses a single project without touching the others."""
+        with self.lock, metrics.timer('zuul_viz_parse_seconds', scope='project'):
+            self._remove_project_jobs(project_info['path'])
+            self._parse_project_path(project_info)
+            self._update_branch_indexes(project_info['path'])
+            self._prune_blob_cache()
+            self.generation += 1
+            metrics.set('zuul_viz_jobs', len(self.jobs))
+            return self.jobs
+
+    def remove_project(self, project_path):
+        """Drops the jobs defined by a project from the index."""
+        with self.lock:
+            self._remove_project_jobs(project_path)
+            # Its mirror is about to be deleted: stop the cat-file process reading it
+            cat_file = self.cat_files.pop(project_path, None)
+            if cat_file is not None:
+                cat_file.close()
+            self._update_branch_indexes(project_path)
+            self._prune_blob_cache()
+            self.generation += 1
+
+    def _remove_project_jobs(self, project_path):
+        names = [name for name, path in self.job_projects.items() if path == project_path]
+        for name in names:
+            del self.jobs[name]
+            del self.job_projects[name]
+        self.project_blobs.pop((project_path, None), None)
+        self.cached_data = None
+
+    def _prune_blob_cache(self):
+        """Drops parsed blobs of commits, branches and projects that are no longer indexed."""
+        used = set().union(*self.project_blobs.values())
+        self.blob_cache = {sha: data for sha, data in self.blob_cache.items() if sha in used}
+
+    def clear(self):
+        with self.lock:
+            self.close()
+            self.jobs = {}
+            self.job_projects = {}
+            self.cached_data = None
+            self.branches = {}
+            self.blob_cache = {}
+            self.project_blobs = {}
+            self.generation += 1
+
+    def get_branches(self):
+        with self.lock:
+            return list(self.branches)
+
+    def _build_branch_indexes(self):
+        """
+        Builds one job index per configured branch. A project with the branch
+        contributes the jobs of that branch, read from git objects (no
+        checkout); projects without it contribute their default branch jobs,
+        like branchless config repos do in Zuul. Files whose blob is the same
+        as on another branch are not parsed again (see blob_cache).
+        """
+        default_jobs = self._jobs_by_project()
+        refs_by_path = {}
+        self.branches = {branch: self._new_branch_index(branch, default_jobs, refs_by_path)
+                         for branch in self._branch_names()}
+
+    def _update_branch_indexes(self, project_path):
+        """
+        Replaces the contribution of a single (re)parsed or removed project
+        in every branch index. Other projects' branch jobs are kept as they
+        are, so only the touched project's refs and trees are read.
+        """
+        branch_names = self._branch_names()
+        if not branch_names and not self.branches:
+            return
+        info = next((i for i in self.project_infos if i['path'] == project_path), None)
+        default_jobs = {project_path: [name for name, path in self.job_projects.items() if path == project_path]}
+        refs_by_path = {}
+        branches = {}
+        for branch in branch_names:
+            index = self.branches.get(branch)
+            if index is None:
+                # Newly configured branch: every project contributes
+                index = self._new_branch_index(branch, self._jobs_by_project(), refs_by_path)
+            else:
+                jobs = self._project_branch_jobs(info, branch, default_jobs, refs_by_path) if info else {}
+                self._set_branch_contribution(index, project_path, jobs)
+            branches[branch] = index
+        self.branches = branches
+        # Forget the blobs of the removed project and of branches no longer configured
+        for key in list(self.project_blobs):
+            path, branch = key
+            if branch is not None and (branch not in branches or (path == project_path and info is None)):
+                del self.project_blobs[key]
+
+    def _branch_names(self):
+        branch_names = []
         for info in self.project_infos:
-            self._parse_project_path(info)
-                
-        return self.jobs
+            for branch in info.get('branches', []):
+                if branch not in branch_names:
+                    branch_names.append(branch)
+        return branch_names
+
+    def _jobs_by_project(self):
+        default_jobs = {}
+        for name, path in self.job_projects.items():
+            default_jobs.setdefault(path, []).append(name)
+        return default_jobs
+
+    def _new_branch_index(self, branch, default_jobs, refs_by_path):
+        # version: generation of the index's last change, for the derived caches
+        index = {'jobs': {}, 'job_projects': {}, 'cached_data': None, 'version': self.generation + 1}
+        for info in self.project_infos:
+            jobs = self._project_branch_jobs(info, branch, default_jobs, refs_by_path)
+            index['jobs'].update(jobs)
+            index['job_projects'].update(dict.fromkeys(jobs, info['path']))
+        return index
+
+    def _project_branch_jobs(self, info, branch, default_jobs, refs_by_path):
+        """Jobs a project contributes to the index of a branch."""
+        if branch in info.get('branches', []):
+            if info['path'] not in refs_by_path:
+                refs_by_path[info['path']] = self._list_refs(info['path'])
+            commit = refs_by_path[info['path']].get(git_utils.branch_ref(info, branch))
+            if commit:
+                jobs = {}
+                self.project_blobs[(info['path'], branch)] = self._parse_git_objects({**info, 'commit': commit}, jobs=jobs)
+                return jobs
+            print(f"Warning: Branch {branch} not found in {info['path']}")
+        self.project_blobs.pop((info['path'], branch), None)
+        return {name: self.jobs[name] for name in default_jobs.get(info['path'], [])}
+
+    def _set_branch_contribution(self, index, project_path, jobs):
+        previous = [name for name, path in index['job_projects'].items() if path == project_path]
+        if len(previous) == len(jobs) and all(index['jobs'].get(name) is job and index['job_projects'].get(name) == project_path
+                                              for name, job in jobs.items()):
+            return
+        for name in previous:
+            del index['jobs'][name]
+            del index['job_projects'][name]
+        index['jobs'].update(jobs)
+        index['job_projects'].update(dict.fromkeys(jobs, project_path))
+        index['cached_data'] = None
+        index['version'] = self.generation + 1
+
+    def _list_refs(self, repo_path):
+        try:
+            return git_utils.list_refs(repo_path)
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            print(f"Error listing branches of {repo_path}: {e}")
+            return {}
 
     def _parse_project_path(self, project_info):
         project_path = project_info['path']
@@ -26,18 +236,65 @@ class ZuulParser:
             print(f"Warning: Path does not exist: {project_path}")
             return
 
+        if project_info.get('bare'):
+            self.project_blobs[(project_path, None)] = self._parse_git_objects(project_info)
+            return
+
         # Check for zuul.yaml or .zuul.yaml
-        for filename in ['zuul.yaml', '.zuul.yaml']:
+        for filename in CONFIG_FILES:
             file_path = os.path.join(project_path, filename)
             if os.path.exists(file_path):
                 self._parse_file(file_path, project_info)
 
         # Check for zuul.d or .zuul.d directories
-        for dirname in ['zuul.d', '.zuul.d']:
+        for dirname in CONFIG_DIRS:
             dir_path = os.path.join(project_path, dirname)
             if os.path.exists(dir_path) and os.path.isdir(dir_path):
                 self._parse_directory(dir_path, project_info)
 
+    def _parse_git_objects(self, project_info, jobs=None):
+        """
+        Parses the Zuul config at project_info['commit'] straight from the
+        object database. Blobs already in blob_cache are not read or parsed again.
+        Returns the shas of the blobs used.
+        """
+        repo_path = project_info['path']
+        ref = project_info.get('commit') or 'HEAD'
+        try:
+            entries = git_utils.ls_tree(repo_path, ref, CONFIG_PATHS)
+        except subprocess.CalledProcessError as e:
+            print(f"Error listing Zuul config of {repo_path} at {ref}: {e}")
+            return set()
+
+        blobs = select_config_blobs(entries)
+        missing = [sha for sha, _ in blobs if sha not in self.blob_cache]
+        contents = dict(zip(missing, self._cat_file(repo_path).read_many(missing)))
+        used = set()
+        for sha, relative_path in blobs:
+            content = None
+            if sha not in self.blob_cache:
+                if contents.get(sha) is None:
+                    print(f"Warning: Missing blob {sha} for {relative_path} in {repo_path}")
+                    continue
+                content = contents[sha].decode('utf-8', 'replace')
+            used.add(sha)
+            self._parse_file(os.path.join(repo_path, relative_path), project_info,
+                             content, blob_sha=sha, jobs=jobs)
+        return used
+
+    def _cat_file(self, repo_path):
+        cat_file = self.cat_files.get(repo_path)
+        if cat_file is None:
+            cat_file = self.cat_files[repo_path] = git_utils.CatFileBatch(repo_path)
+        return cat_file
+
+    def close(self):
+        """Stops the git cat-file processes kept for bare mirrors."""
+        with self.lock:
+            for cat_file in self.cat_files.values():
+                cat_file.close()
+            self.cat_files = {}
+
     def _parse_directory(self, dir_path, project_info):
         for root, _, files in os.walk(dir_path):
             if '.zuul.ignore' in files:
@@ -46,71 +303,97 @@ class ZuulParser:
                 if file.endswith('.yaml'):
                     self._parse_file(os.path.join(root, file), project_info)
 
-    def _parse_file(self, file_path, project_info):
-        try:
+    def _parse_file(self, file_path, project_info, content=None, blob_sha=None, jobs=None):
+        # No repo label: temporary repos come and go, per-repo cost is in the project parse scope
+        with metrics.timer('zuul_viz_parse_file_seconds'):
+            self._parse_file_jobs(file_path, project_info, content, blob_sha, jobs)
+
+    def _load_config(self, file_path, content, blob_sha):
+        if blob_sha and blob_sha in self.blob_cache:
+            return self.blob_cache[blob_sha]
+        if content is None:
             with open(file_path, 'r') as f:
-                data = self.yaml.load(f)
-                if data:
-                    for item in data:
-                        if 'job' in item:
-                            job = item['job']
-                            
-                            # Calculate relative path and git URL
-                            repo_root = project_info['path']
-                            relative_path = os.path.relpath(file_path, repo_root)
-                            repo_url = project_info['url']
-                            commit = project_info['commit']
-                            
-                            # Construct web URL
-                            # Remove .git suffix if present
-                            base_url = repo_url
-                            if base_url.endswith('.git'):
-                                base_url = base_url[:-4]
+                content = f.read()
+        data = self.yaml.load(content)
+        if blob_sha:
+            self.blob_cache[blob_sha] = data
+        return data
+
+    def _parse_file_jobs(self, file_path, project_info, content=None, blob_sha=None, jobs=None):
+        """Indexes the jobs of a config file into jobs (the default index when None)."""
+        try:
+            data = self._load_config(file_path, content, blob_sha)
+            if data:
+                for item in data:
+                    if 'job' in item:
+                        job = item['job']
+                        if blob_sha:
+                            # Cached data is shared across branches: annotate a copy
+                            job = job.copy()
+                        
+                        # Calculate relative path and git URL
+                        repo_root = project_info['path']
+                        relative_path = os.path.relpath(file_path, repo_root)
+                        repo_url = project_info['url']
+                        commit = project_info['commit']
+                        
+                        # Construct web URL
+                        # Remove .git suffix if present
+                        base_url = repo_url
+                        if base_url.endswith('.git'):
+                            base_url = base_url[:-4]
+                        
+                        # Determine URL format
+                        # GitLab usually has /-/blob/, GitHub has /blob/
+                        # Heuristic: if 'gitlab' in domain, use /-/blob/, else /blob/
+                        if 'gitlab' in base_url:
+                            blob_segment = '-/blob'
+                        else:
+                            blob_segment = 'blob'
                             
-                            # Determine URL format
-                            # GitLab usually has /-/blob/, GitHub has /blob/
-                            # Heuristic: if 'gitlab' in domain, use /-/blob/, else /blob/
-                            if 'gitlab' in base_url:
-                                blob_segment = '-/blob'
-                            else:
-                                blob_segment = 'blob'
-                                
-                            line_num = 1
-                            if hasattr(job, 'lc') and job.lc.line is not None:
-                                line_num = job.lc.line + 1
-                                
-                            source_url = f"{base_url}/{blob_segment}/{commit}/{relative_path}#L{line_num}"
+                        line_num = 1
+                        if hasattr(job, 'lc') and job.lc.line is not None:
+                            line_num = job.lc.line + 1
                             
-                            job['source_file'] = relative_path
-                            job['source_line'] = line_num
+                        source_url = f"{base_url}/{blob_segment}/{commit}/{relative_path}#L{line_num}"
+                        
+                        job['source_file'] = relative_path
+                        job['source_line'] = line_num
+                        
+                        # Extract vars source locations
+                        if 'vars' in job and isinstance(job['vars'], dict) and hasattr(job['vars'], 'lc'):
+                            vars_source = {}
+                            for var_name in job['vars']:
+                                try:
+                                    # ruamel.yaml stores line info (line, col)
+                                    # line is 0-indexed
+                                    line_info = job['vars'].lc.item(var_name)
+                                    if line_info:
+                                        var_line = line_info[0] + 1
+                                        var_url = f"{base_url}/{blob_segment}/{commit}/{relative_path}#L{var_line}"
+                                        vars_source[var_name] = var_url
+                                except Exception as e:
+                                    # If we can't get line info, just skip
+                                    pass
+                            job['vars_source'] = vars_source
+
+                        job['source_path'] = file_path # Keep absolute path for internal use if needed, or remove
+                        job['source_url'] = source_url
                             
-                            # Extract vars source locations
-                            if 'vars' in job and isinstance(job['vars'], dict) and hasattr(job['vars'], 'lc'):
-                                vars_source = {}
-                                for var_name in job['vars']:
-                                    try:
-                                        # ruamel.yaml stores line info (line, col)
-                                        # line is 0-indexed
-                                        line_info = job['vars'].lc.item(var_name)
-                                        if line_info:
-                                            var_line = line_info[0] + 1
-                                            var_url = f"{base_url}/{blob_segment}/{commit}/{relative_path}#L{var_line}"
-                                            vars_source[var_name] = var_url
-                                    except Exception as e:
-                                        # If we can't get line info, just skip
-                                        pass
-                                job['vars_source'] = vars_source
-
-                            job['source_path'] = file_path # Keep absolute path for internal use if needed, or remove
-                            job['source_url'] = source_url
-                                
-                            self.jobs[job['name']] = job
+                        if jobs is not None:
+                            jobs[job['name']] = job
+                            continue
+                        self.jobs[job['name']] = job
+                        self.job_projects[job['name']] = project_info['path']
+                        self.cached_data = None
         except Exception as e:
             print(f"Error parsing {file_path}: {e}")
 
-    def _get_inherited_vars(self, job_name):
+    def _get_inherited_vars(self, job_name, jobs=None):
+        if jobs is None:
+            jobs = self.jobs
         inherited = []
-        current_job = self.jobs.get(job_name)
+        current_job = jobs.get(job_name)
         
         # Traverse up the hierarchy
         while current_job:
@@ -118,7 +401,7 @@ class ZuulParser:
             if not parent_name:
                 break
                 
-            parent_job = self.jobs.get(parent_name)
+            parent_job = jobs.get(parent_name)
             if not parent_job:
                 break
             
@@ -135,14 +418,106 @@ class ZuulParser:
             
         return inherited
 
-    def get_graph_data(self):
+    def get_graph_data(self, branch=None):
+        """Graph of the default branch, or of a configured branch (None if unknown)."""
+        with self.lock:
+            if branch is None:
+                return self._build_graph_data()
+            index = self.branches.get(branch)
+            if index is None:
+                return None
+            if index['cached_data'] is None:
+                index['cached_data'] = self._compute_graph_data(index['jobs'])
+            return index['cached_data']
+
+    def get_analysis(self, branch=None):
+        """
+        Critical paths, fan-out hotspots, dangling references and cycles of
+        the default index or of a branch (None if unknown). Computed once per
+        change of that index.
+        """
+        def compute(jobs):
+            with metrics.timer('zuul_viz_analysis_seconds'):
+                return analyze_jobs(jobs)
+        return self._derived('analysis', branch, compute)
+
+    def get_columnar(self, branch=None):
+        """The job index in the compact columnar format (see graph_format), or None for an unknown branch."""
+        def compute(jobs):
+            with metrics.timer('zuul_viz_graph_serialize_seconds', format='columnar'):
+                return encode_graph(jobs)
+        return self._derived('columnar', branch, compute)
+
+    def get_resolved_job(self, name, branch=None):
+        """
+        Effective configuration of a job after Zuul inheritance (see
+        inheritance.resolve_job), or None if the job or branch is unknown.
+
+        Resolved lazily. Results survive reparses for every job whose
+        definition and ancestors were left untouched, e.g. by parse_project
+        of an unrelated repository.
+        """
+        with self.lock:
+            if branch is None:
+                jobs = self.jobs
+            elif branch in self.branches:
+                jobs = self.branches[branch]['jobs']
+            else:
+                return None
+            if self._resolved_generation != self.generation:
+                self._prune_resolved()
+            with metrics.timer('zuul_viz_resolve_seconds'):
+                return resolve_job(jobs, name, self.resolved_memo.setdefault(branch, {}))
+
+    def _prune_resolved(self):
+        indexes = {None: self.jobs, **{branch: index['jobs'] for branch, index in self.branches.items()}}
+        memos = {}
+        for branch, memo in self.resolved_memo.items():
+            jobs = indexes.get(branch)
+            if jobs is not None:
+                memos[branch] = {name: entry for name, entry in memo.items() if jobs.get(name) is entry[0]}
+        self.resolved_memo = memos
+        self._resolved_generation = self.generation
+
+    def _derived(self, kind, branch, compute):
+        with self.lock:
+            version = self._index_version(branch)
+            if version is None:
+                return None
+            cached = self.derived_cache.get((kind, branch))
+            if cached and cached[0] == version:
+                return cached[1]
+            result = compute(self.jobs if branch is None else self.branches[branch]['jobs'])
+            # Drop results of indexes that changed since, instead of keeping them around
+            self.derived_cache = {key: value for key, value in self.derived_cache.items()
+                                  if value[0] == self._index_version(key[1])}
+            self.derived_cache[(kind, branch)] = (version, result)
+            return result
+
+    def _index_version(self, branch):
+        """Generation of the last change to the default index (None) or a branch index."""
+        if branch is None:
+            return self.generation
+        index = self.branches.get(branch)
+        return index['version'] if index else None
+
+    def _build_graph_data(self):
         if self.cached_data:
+            metrics.inc('zuul_viz_graph_cache_total', result='hit')
             return self.cached_data
 
+        metrics.inc('zuul_viz_graph_cache_total', result='miss')
+        with metrics.timer('zuul_viz_graph_build_seconds'):
+            self.cached_data = self._compute_graph_data(self.jobs)
+        metrics.set('zuul_viz_edges', len(self.cached_data['edges']))
+        return self.cached_data
+
+    def _compute_graph_data(self, jobs):
+
         nodes = []
         edges = []
         
-        for job_name, job in self.jobs.items():
+        for job_name, job in jobs.items():
             # Node
             nodes.append({
                 'id': job_name,
@@ -150,7 +525,7 @@ class ZuulParser:
                     'label': job_name, 
                     'details': {
                         **job, 
-                        'inherited_vars': self._get_inherited_vars(job_name)
+                        'inherited_vars': self._get_inherited_vars(job_name, jobs)
                     } 
                 }
             })
@@ -181,6 +556,5 @@ class ZuulParser:
                             'label': 'depends on'
                         })
 
-        
-        self.cached_data = {'nodes': nodes, 'edges': edges}
-        return self.cached_data
+
+        return {'nodes': nodes, 'edges': edges}
@@ -0,0 +1,123 @@
+import contextlib
+import os
+import shutil
+import time
+from ai_utils import load_config
+from metrics import registry as metrics
+
+
+def static_source_urls():
+    """URLs configured in sources; every other loaded repository is temporary."""
+    fresh_config = load_config()
+    static_sources = fresh_config.get('sources', fresh_config.get('source')) or []
+    if isinstance(static_sources, str):
+        static_sources = [static_sources]
+    return set(static_sources)
+
+
+def disk_usage(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if not os.path.islink(file_path):
+                total += os.path.getsize(file_path)
+    return total
+
+
+class TempRepoCache:
+    """
+    Keeps repositories loaded through /api/load-repo within a budget.
+
+    Temporary (non static) projects are tracked by when they were last viewed
+    (loaded again, or one of their jobs opened). When the budget is exceeded
+    the least recently viewed ones are evicted: their jobs are dropped from
+    the index and their clone directory is deleted. Static sources are never
+    evicted. Budgets set to 0 or None are unlimited:
+    - max_temp_repos: number of temporary projects
+    - max_temp_jobs: jobs defined by temporary projects
+    - max_temp_disk_mb: size of their clone directories
+
+    repo_lock(path) returns the lock the scheduler fetches a repository
+    under; the clone is deleted while holding it.
+    """
+
+    def __init__(self, app_config, project_infos, parser, repo_lock=None):
+        self.project_infos = project_infos # Same list object as parser/scheduler
+        self.parser = parser
+        self.repo_lock = repo_lock or (lambda path: contextlib.nullcontext())
+        self.max_repos = app_config.get('max_temp_repos', 20)
+        self.max_jobs = app_config.get('max_temp_jobs')
+        max_disk_mb = app_config.get('max_temp_disk_mb')
+        self.max_disk = max_disk_mb * 1024 * 1024 if max_disk_mb else None
+        self.disk_sizes = {} # path -> (commit, bytes), measured once per commit
+
+    def touch(self, path):
+        """Marks a project as just viewed."""
+        for info in self.project_infos:
+            if info['path'] == path:
+                info['last_viewed'] = time.time()
+                return True
+        return False
+
+    def touch_job(self, job_name):
+        path = self.parser.job_projects.get(job_name)
+        return path is not None and self.touch(path)
+
+    def _disk_size(self, info):
+        cached = self.disk_sizes.get(info['path'])
+        if cached and cached[0] == info.get('commit'):
+            return cached[1]
+        size = disk_usage(info['path'])
+        self.disk_sizes[info['path']] = (info.get('commit'), size)
+        return size
+
+    def _over_budget(self, temp_infos):
+        if self.max_repos and len(temp_infos) > self.max_repos:
+            return True
+        if self.max_jobs:
+            temp_paths = {info['path'] for info in temp_infos}
+            if sum(1 for path in self.parser.job_projects.values() if path in temp_paths) > self.max_jobs:
+                return True
+        if self.max_disk and sum(self._disk_size(info) for info in temp_infos) > self.max_disk:
+            return True
+        return False
+
+    def enforce(self, keep=None):
+        """
+        Evicts least recently viewed temporary projects until the budget is
+        met. keep is a path that must not be evicted (the repo being loaded).
+        Returns the evicted project_infos entries.
+        """
+        # The parser lock guards project_infos against concurrent loads and clears
+        with self.parser.lock:
+            static_urls = static_source_urls()
+            temp_infos = [info for info in self.project_infos if info.get('url') not in static_urls]
+            # Oldest first; never viewed counts as oldest
+            temp_infos.sort(key=lambda info: info.get('last_viewed', 0))
+            evicted = []
+            while self._over_budget(temp_infos):
+                candidate = next((info for info in temp_infos if info['path'] != keep), None)
+                if candidate is None:
+                    break
+                temp_infos.remove(candidate)
+                self._evict(candidate)
+                evicted.append(candidate)
+            return evicted
+
+    def _evict(self, info):
+        path = info['path']
+        print(f"Evicting temporary repo: {path}")
+        if info in self.project_infos:
+            self.project_infos.remove(info)
+        self.parser.remove_project(path)
+        self.disk_sizes.pop(path, None)
+        # Its clone/fetch series would otherwise stay in /metrics forever
+        metrics.remove(repo=os.path.basename(path))
+        try:
+            # Not while a fetch or reset is writing to it
+            with self.repo_lock(path):
+                if os.path.exists(path):
+                    shutil.rmtree(path)
+        except Exception as e:
+            print(f"Failed to delete {path}: {e}")
@@ -1,91 +1,322 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime, timedelta
 import subprocess
 import os
-import hashlib
+import random
+import threading
+import time
 import traceback
-import shutil
-from ai_utils import load_config
+from git_utils import branch_ref, list_refs, normalize_source
+from metrics import registry as metrics
+from repo_cache import static_source_urls
 
 class JobScheduler:
-    def __init__(self, app_config, project_infos, on_update_callback=None):
+    """
+    Keeps the cloned repositories up to date.
+
+    Each static repository gets its own scheduled job with its own interval:
+    - repos whose HEAD keeps changing are polled more often, down to
+      min_update_interval, and static ones less often, up to max_update_interval
+    - failed fetches back off exponentially without delaying other repos
+    - every run is jittered so repos don't all fetch at the same moment
+    After a per-repo update only that project is reparsed (on_repo_update_callback).
+
+    A full sync (update_repos_and_docs) still runs at startup and on force_run.
+    """
+
+    def __init__(self, app_config, project_infos, on_update_callback=None, on_repo_update_callback=None):
         self.config = app_config
         self.project_infos = project_infos # Reference to mutable list from app.py
         self.scheduler = BackgroundScheduler()
         self.on_update_callback = on_update_callback
-    
+        self.on_repo_update_callback = on_repo_update_callback
+        self.repo_state = {} # path -> scheduling state, see _get_state
+        self.repo_locks = {} # path -> lock serializing git operations on that repo
+        self.state_lock = threading.Lock()
+        # Serializes replacing repo_update jobs (hooks vs rescheduling after a run)
+        self.schedule_lock = threading.Lock()
+        # A full sync runs at most once at a time; triggers during a run queue one more
+        self.sync_running = False
+        self.sync_requested = False
+
+        self.base_interval = self.config.get('doc_update_interval', 86400)
+        self.min_interval = self.config.get('min_update_interval', max(60, self.base_interval // 4))
+        self.max_interval = self.config.get('max_update_interval', self.base_interval * 4)
+        self.jitter = self.config.get('update_jitter', 0.1) # Fraction of the interval
+        self.adaptive = self.config.get('adaptive_intervals', True)
+        # Per repo overrides: {url: seconds}
+        self.repo_intervals = {
+            normalize_source(url): seconds
+            for url, seconds in (self.config.get('repo_intervals') or {}).items()
+        }
+
     def start(self):
-        interval = self.config.get('doc_update_interval', 86400)
-        self.scheduler.add_job(
-            self.update_repos_and_docs, 
-            'interval', 
-            seconds=interval, 
-            id='doc_update_job'
-        )
         self.scheduler.start()
-        print(f"Scheduler started with interval {interval}s")
+        print(f"Scheduler started with base interval {self.base_interval}s")
 
-        # Run once on startup in background (small delay to let app start)
+        # Run once on startup in background; it also schedules the per-repo jobs
         self.scheduler.add_job(self.update_repos_and_docs, 'date', run_date=None, id='startup_job')
 
     def shutdown(self):
         self.scheduler.shutdown()
 
     def force_run(self):
-        """Manually trigger the update job"""
-        job = self.scheduler.get_job('doc_update_job')
-        if job:
-            job.modify(next_run_time=None) # Trigger immediately
-        else:
-            self.scheduler.add_job(self.update_repos_and_docs, 'date', run_date=None)
+        """
+        Manually trigger a full update of every repository. Repeated triggers
+        collapse into a single pending run.
+        """
+        with self.state_lock:
+            if self.sync_running:
+                # Picked up by the running sync once it finishes
+                self.sync_requested = True
+                return True
+        self.scheduler.add_job(
+            self.update_repos_and_docs,
+            'date',
+            run_date=None,
+            id='full_sync',
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
         return True
 
+    def _static_urls(self):
+        return static_source_urls()
+
+    def _get_state(self, info):
+        path = info['path']
+        with self.state_lock:
+            state = self.repo_state.get(path)
+            if state is None:
+                interval = self.repo_intervals.get(normalize_source(info.get('url', '')), self.base_interval)
+                state = self.repo_state[path] = {
+                    'url': info.get('url'),
+                    'base_interval': interval,
+                    'interval': interval,
+                    'failures': 0,
+                    'last_run': None,
+                    'last_change': None,
+                    'last_duration': None,
+                    'next_run': None,
+                }
+            return state
+
+    def _job_id(self, path):
+        return f'repo_update:{path}'
+
+    def _schedule_repo(self, info, delay, keep_earlier=False):
+        """
+        Schedules the next update of a repository. With keep_earlier, a job
+        already pending sooner (e.g. a hook that arrived during the fetch
+        that just ended) is left in place.
+        """
+        state = self._get_state(info)
+        jittered = delay + random.uniform(0, delay * self.jitter)
+        run_date = datetime.now() + timedelta(seconds=jittered)
+        with self.schedule_lock:
+            if keep_earlier:
+                pending = self.scheduler.get_job(self._job_id(info['path']))
+                next_run_time = getattr(pending, 'next_run_time', None)
+                if isinstance(next_run_time, datetime) and next_run_time <= run_date.astimezone(next_run_time.tzinfo):
+                    state['next_run'] = next_run_time.isoformat()
+                    return
+            state['next_run'] = run_date.isoformat()
+            self.scheduler.add_job(
+                self.update_repo,
+                'date',
+                run_date=run_date,
+                args=[info['path']],
+                id=self._job_id(info['path']),
+                replace_existing=True,
+            )
+
+    def sync_repo_jobs(self):
+        """Schedules a job for every static repository and drops jobs of removed ones."""
+        static_urls = self._static_urls()
+        wanted = {}
+        for info in self.project_infos[:]:
+            if info.get('url') in static_urls:
+                wanted[self._job_id(info['path'])] = info
+
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith('repo_update:') and job.id not in wanted:
+                job.remove()
+        with self.state_lock:
+            for path in list(self.repo_state):
+                if self._job_id(path) not in wanted:
+                    del self.repo_state[path]
+                    self.repo_locks.pop(path, None)
+
+        for job_id, info in wanted.items():
+            if not self.scheduler.get_job(job_id):
+                self._schedule_repo(info, self._get_state(info)['interval'])
+
+    def _next_interval(self, state, changed, failed):
+        if failed:
+            # Exponential backoff from the repo's base interval
+            return min(self.max_interval, state['base_interval'] * (2 ** state['failures']))
+        if not self.adaptive:
+            return state['base_interval']
+        if changed:
+            return max(self.min_interval, state['interval'] / 2)
+        return min(self.max_interval, state['interval'] * 1.5)
+
+    def trigger_repo(self, path, delay=0):
+        """
+        Runs the update of one repository after delay seconds (e.g. from a
+        webhook). Triggering again before it ran pushes the run back, so a
+        burst of pushes results in a single fetch.
+        """
+        run_date = datetime.now() + timedelta(seconds=delay)
+        with self.schedule_lock:
+            self.scheduler.add_job(
+                self.update_repo,
+                'date',
+                run_date=run_date,
+                args=[path],
+                kwargs={'triggered_by': 'hook'},
+                id=self._job_id(path),
+                replace_existing=True,
+            )
+
+    def update_repo(self, path, triggered_by='schedule'):
+        """Scheduled job: fetches a single repository and reparses it if it changed."""
+        info = next((i for i in self.project_infos if i['path'] == path), None)
+        if info is None:
+            return
+
+        state = self._get_state(info)
+        start = time.time()
+        changed = False
+        failed = False
+        try:
+            changed = self._fetch_repo(info)
+        except subprocess.CalledProcessError as e:
+            print(f"Failed to update {path}: {e}")
+            failed = True
+
+        state['last_run'] = datetime.now().isoformat()
+        state['last_duration'] = time.time() - start
+        if failed:
+            state['failures'] += 1
+        elif state['failures']:
+            # Recovered: restart adaptation from the base interval, not the backoff
+            state['failures'] = 0
+            state['interval'] = state['base_interval']
+        if changed:
+            state['last_change'] = state['last_run']
+        # Pushes announced by a webhook say nothing about how often to poll
+        if triggered_by != 'hook' or failed:
+            state['interval'] = self._next_interval(state, changed, failed)
+
+        if changed and self.on_repo_update_callback:
+            try:
+                self.on_repo_update_callback(info)
+            except Exception as e:
+                print(f"Error in repo refresh callback for {path}: {e}")
+
+        # The repo may have been removed while we were fetching. A job pending
+        # now was added while we fetched (a hook): it must not be pushed back.
+        if any(i['path'] == path for i in self.project_infos):
+            self._schedule_repo(info, state['interval'], keep_earlier=True)
+
+    def get_schedule(self):
+        with self.state_lock:
+            return {path: dict(state) for path, state in self.repo_state.items()}
+
+    def repo_lock(self, path):
+        """Lock held while a repository is fetched; take it before deleting the clone."""
+        with self.state_lock:
+            return self.repo_locks.setdefault(path, threading.Lock())
+
+    def _fetch_repo(self, info):
+        """
+        Fetches a repository and moves its checkout to the remote HEAD.
+        Returns True if the commit (or one of its indexed branches) changed. Raises CalledProcessError on failure.
+        """
+        with self.repo_lock(info['path']):
+            return self._fetch_repo_locked(info)
+
+    def _fetch_repo_locked(self, info):
+        target_path = info['path']
+        # Bare mirrors are their own git dir and have no working tree to reset
+        bare = info.get('bare', False)
+        git_dir = target_path if bare else os.path.join(target_path, '.git')
+        if not (os.path.exists(target_path) and os.path.isdir(git_dir)):
+            return False
+
+        print(f"Updating {target_path}...")
+        try:
+            with metrics.timer('zuul_viz_repo_fetch_seconds', repo=os.path.basename(target_path), operation='fetch'):
+                if bare:
+                    # The refspec set by clone_bare updates every local branch
+                    subprocess.check_call(['git', '-C', target_path, 'fetch', '--prune', 'origin'])
+                else:
+                    # Use fetch/reset --hard to ensure we mirror remote exactly and avoid rebase issues
+                    subprocess.check_call(['git', '-C', target_path, 'fetch', 'origin'])
+            if not bare:
+                # Determine default branch (usually HEAD refers to it on remote)
+                subprocess.check_call(['git', '-C', target_path, 'reset', '--hard', 'origin/HEAD'])
+        except subprocess.CalledProcessError:
+            metrics.inc('zuul_viz_repo_fetch_failures_total', repo=os.path.basename(target_path), operation='fetch')
+            raise
+
+        # Update commit hash
+        commit_hash = subprocess.check_output(['git', '-C', target_path, 'rev-parse', 'HEAD']).decode('utf-8').strip()
+        changed = commit_hash != info.get('commit')
+        info['commit'] = commit_hash # Update in place
+
+        # Extra indexed branches move independently of HEAD
+        if info.get('branches'):
+            refs = list_refs(target_path)
+            branch_commits = {branch: refs.get(branch_ref(info, branch)) for branch in info['branches']}
+            if branch_commits != info.get('branch_commits'):
+                changed = changed or 'branch_commits' in info
+                info['branch_commits'] = branch_commits
+        return changed
+
     def update_repos_and_docs(self):
-        print("Starting repository and documentation update...")
+        with self.state_lock:
+            if self.sync_running:
+                self.sync_requested = True
+                return
+            self.sync_running = True
         try:
-            # Load config to check for static repos
-            fresh_config = load_config()
-            static_sources = fresh_config.get('sources', fresh_config.get('source')) or []
-            if isinstance(static_sources, str):
-                static_sources = [static_sources]
-            static_urls = set(static_sources)
+            while True:
+                with metrics.timer('zuul_viz_sync_seconds'):
+                    self._update_repos_and_docs()
+                # Triggered again while running: once more, for pushes that
+                # landed after the fetches started
+                with self.state_lock:
+                    if not self.sync_requested:
+                        self.sync_running = False
+                        return
+                    self.sync_requested = False
+        except BaseException:
+            with self.state_lock:
+                self.sync_running = False
+            raise
 
+    def _update_repos_and_docs(self):
+        print("Starting repository and documentation update...")
+        try:
             # 1. Update Repositories
-            # We iterate over a copy of the list because we might remove items
+            # Temporary repos are kept too: they are evicted by TempRepoCache
+            # (least recently viewed first) rather than all at once here.
+            # We iterate over a copy of the list because it may change meanwhile
             for info in self.project_infos[:]:
-                url = info.get('url')
                 target_path = info['path']
-                
-                # Check for cleanup
-                if url not in static_urls:
-                     print(f"Cleaning up temporary repo: {target_path}")
-                     try:
-                         if os.path.exists(target_path):
-                             shutil.rmtree(target_path)
-                         self.project_infos.remove(info)
-                         continue # Skip update since we deleted it
-                     except Exception as e:
-                         print(f"Failed to delete {target_path}: {e}")
-
-                if os.path.exists(target_path) and os.path.isdir(os.path.join(target_path, '.git')):
-                    print(f"Updating {target_path}...")
-                    try:
-                        # Use fetch/reset --hard to ensure we mirror remote exactly and avoid rebase issues
-                        subprocess.check_call(['git', '-C', target_path, 'fetch', 'origin'])
-                        # Determine default branch (usually HEAD refers to it on remote)
-                        subprocess.check_call(['git', '-C', target_path, 'reset', '--hard', 'origin/HEAD'])
-                        
-                        # Update commit hash
-                        commit_hash = subprocess.check_output(['git', '-C', target_path, 'rev-parse', 'HEAD']).decode('utf-8').strip()
-                        info['commit'] = commit_hash # Update in place
-                        
-                    except subprocess.CalledProcessError as e:
-                        print(f"Failed to update {target_path}: {e}")
-            
+                try:
+                    self._fetch_repo(info)
+                except subprocess.CalledProcessError as e:
+                    print(f"Failed to update {target_path}: {e}")
+
             # 2. Generate Documentation
             # 2. Generate Documentation
             # Documentation generation removed as per request
-                
-            
+
+
             # 3. Refresh Parser Cache
             if self.on_update_callback:
                 print("Triggering cache refresh...")
@@ -94,8 +325,11 @@ class JobScheduler:
                 except Exception as e:
                      print(f"Error in refresh callback: {e}")
 
+            # 4. (Re)schedule the per-repo update jobs
+            self.sync_repo_jobs()
+
             print("Update completed successfully.")
-            
+
         except Exception as e:
             print(f"Error in update job: {e}")
             traceback.print_exc()
@@ -0,0 +1,131 @@
+import json
+import mmap
+import os
+import tempfile
+import threading
+from graph_format import encode_graph
+from inheritance import resolve_job
+
+
+def write_snapshot(path, graph_bytes, meta=None):
+    """
+    Atomically writes a graph snapshot to path.
+
+    The file layout is a single JSON header line followed by the already
+    serialized graph, so readers can hand the graph bytes straight to the
+    client without decoding them.
+    """
+    header = dict(meta or {})
+    header['graph_length'] = len(graph_bytes)
+    header_bytes = json.dumps(header).encode('utf-8') + b'\n'
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    # Write to a temp file in the same directory and rename over the old one,
+    # so readers never observe a half-written snapshot.
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header_bytes)
+            f.write(graph_bytes)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class GraphSnapshot:
+    """
+    Read-only view of a snapshot file written by the leader process.
+
+    The file is memory-mapped and only re-mapped when the leader replaces it,
+    so every worker shares the same page cache instead of holding its own
+    parsed copy of the graph.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # (stat_key, mmap, meta, graph_offset), swapped as a whole so readers
+        # never see a header from one snapshot and bytes from another.
+        self._state = None
+        self._jobs = (None, {})
+        self._columnar = (None, None)
+        self._resolved = (None, {}) # (jobs, resolve_job memo), reset with each snapshot
+        self._lock = threading.Lock()
+
+    def _current(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        stat_key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        state = self._state
+        if state and state[0] == stat_key:
+            return state
+
+        with self._lock:
+            state = self._state
+            if state and state[0] == stat_key:
+                return state
+            with open(self.path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            header_end = mapped.find(b'\n')
+            meta = json.loads(mapped[:header_end])
+            # The old mapping is left to the garbage collector: another thread
+            # may still be slicing it.
+            self._state = (stat_key, mapped, meta, header_end + 1)
+            return self._state
+
+    @property
+    def meta(self):
+        state = self._current()
+        return state[2] if state else {}
+
+    def is_ready(self):
+        return self._current() is not None
+
+    def graph_bytes(self):
+        state = self._current()
+        if not state:
+            return None
+        _, mapped, meta, offset = state
+        return mapped[offset:offset + meta['graph_length']]
+
+    def get_repos(self):
+        return self.meta.get('repos', [])
+
+    def get_jobs(self):
+        """Job details keyed by name, decoded lazily once per snapshot."""
+        state = self._current()
+        if not state:
+            return {}
+        stat_key, jobs = self._jobs
+        if stat_key != state[0]:
+            _, mapped, meta, offset = state
+            graph = json.loads(mapped[offset:offset + meta['graph_length']])
+            jobs = {node['id']: node['data']['details'] for node in graph.get('nodes', [])}
+            self._jobs = (state[0], jobs)
+        return jobs
+
+    def get_columnar(self):
+        """The snapshot's jobs in the columnar format, encoded once per snapshot."""
+        state = self._current()
+        if not state:
+            return None
+        stat_key, data = self._columnar
+        if stat_key != state[0]:
+            data = encode_graph(self.get_jobs())
+            self._columnar = (state[0], data)
+        return data
+
+    def get_resolved_job(self, name):
+        """Effective configuration of a job (see inheritance.resolve_job), memoized per snapshot."""
+        jobs = self.get_jobs()
+        resolved_jobs, memo = self._resolved
+        if resolved_jobs is not jobs:
+            memo = {}
+            self._resolved = (jobs, memo)
+        return resolve_job(jobs, name, memo)
@@ -0,0 +1,108 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+class TaskManager:
+    """
+    Runs long operations (like loading a repository) in background threads.
+
+    Each task gets an id whose status can be polled. Tasks are deduplicated by
+    key: submitting a key that is already queued or running returns the
+    existing task instead of starting a second one.
+    """
+
+    def __init__(self, max_workers=2, retention=3600):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='task')
+        self.retention = retention # Seconds to keep finished tasks around for polling
+        self.tasks = {}
+        self.active_keys = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key, func, *args):
+        """
+        Schedules func(report, *args) and returns (task, created).
+        report(stage, progress=None, message=None) updates the task status.
+        """
+        with self.lock:
+            self._prune()
+            existing_id = self.active_keys.get(key)
+            if existing_id:
+                return dict(self.tasks[existing_id]), False
+
+            task_id = uuid.uuid4().hex
+            now = time.time()
+            self.tasks[task_id] = {
+                'id': task_id,
+                'key': key,
+                'status': 'queued',
+                'stage': 'queued',
+                'progress': 0,
+                'message': None,
+                'result': None,
+                'error': None,
+                'created_at': now,
+                'updated_at': now,
+            }
+            self.active_keys[key] = task_id
+            task = dict(self.tasks[task_id])
+
+        self.executor.submit(self._run, task_id, func, args)
+        return task, True
+
+    def get(self, task_id):
+        with self.lock:
+            task = self.tasks.get(task_id)
+            return dict(task) if task else None
+
+    def wait(self, task_id, timeout=None):
+        """Blocks until the task finishes; mostly useful for tests and scripts."""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            task = self.get(task_id)
+            if not task or task['status'] in ('completed', 'failed'):
+                return task
+            if deadline is not None and time.time() > deadline:
+                return task
+            time.sleep(0.01)
+
+    def _update(self, task_id, **fields):
+        with self.lock:
+            task = self.tasks.get(task_id)
+            if task:
+                task.update(fields)
+                task['updated_at'] = time.time()
+
+    def _run(self, task_id, func, args):
+        def report(stage, progress=None, message=None):
+            fields = {'stage': stage, 'message': message}
+            if progress is not None:
+                fields['progress'] = progress
+            self._update(task_id, **fields)
+
+        self._update(task_id, status='running', stage='starting')
+        try:
+            result = func(report, *args)
+            self._update(task_id, status='completed', stage='done', progress=100, result=result)
+        except Exception as e:
+            traceback.print_exc()
+            self._update(task_id, status='failed', stage='failed', error=str(e))
+        finally:
+            with self.lock:
+                key = self.tasks[task_id]['key']
+                if self.active_keys.get(key) == task_id:
+                    del self.active_keys[key]
+
+    def _prune(self):
+        # Caller holds the lock
+        cutoff = time.time() - self.retention
+        expired = [
+            task_id for task_id, task in self.tasks.items()
+            if task['status'] in ('completed', 'failed') and task['updated_at'] < cutoff
+        ]
+        for task_id in expired:
+            del self.tasks[task_id]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,81 @@
+from analysis import analyze_jobs
+
+def test_critical_paths_follow_dependencies():
+    jobs = {
+        'build': {'name': 'build'},
+        'unit': {'name': 'unit', 'dependencies': ['build']},
+        'deploy': {'name': 'deploy', 'dependencies': ['unit', {'name': 'build'}]},
+        'lint': {'name': 'lint'},
+        'docs': {'name': 'docs', 'dependencies': ['lint']},
+    }
+    result = analyze_jobs(jobs)
+    assert result['critical_paths'] == [
+        {'length': 3, 'jobs': ['build', 'unit', 'deploy']},
+        {'length': 2, 'jobs': ['lint', 'docs']},
+    ]
+    assert result['edges'] == 4
+    assert analyze_jobs(jobs, limit=1)['critical_paths'] == result['critical_paths'][:1]
+
+def test_fanout_hotspots_count_inheritance_descendants():
+    jobs = {
+        'base': {'name': 'base'},
+        'tox': {'name': 'tox', 'parent': 'base'},
+        'tox-py3': {'name': 'tox-py3', 'parent': 'tox'},
+        'tox-pep8': {'name': 'tox-pep8', 'parent': 'tox'},
+        'other': {'name': 'other', 'parent': 'base', 'dependencies': ['tox']},
+    }
+    hotspots = analyze_jobs(jobs)['fanout_hotspots']
+    assert hotspots[0] == {'job': 'base', 'descendants': 4, 'children': 2, 'dependents': 0}
+    assert hotspots[1] == {'job': 'tox', 'descendants': 2, 'children': 2, 'dependents': 1}
+    assert len(hotspots) == 2
+
+def test_dangling_references():
+    jobs = {
+        'child': {'name': 'child', 'parent': 'missing-parent', 'dependencies': ['missing-dep']},
+    }
+    assert analyze_jobs(jobs)['dangling'] == [
+        {'job': 'child', 'type': 'parent', 'missing': 'missing-parent'},
+        {'job': 'child', 'type': 'dependency', 'missing': 'missing-dep'},
+    ]
+
+def test_cycles_per_edge_type():
+    jobs = {
+        'a': {'name': 'a', 'parent': 'c'},
+        'b': {'name': 'b', 'parent': 'a'},
+        'c': {'name': 'c', 'parent': 'b', 'dependencies': ['b']},
+        'self': {'name': 'self', 'dependencies': ['self']},
+        'ok': {'name': 'ok', 'dependencies': ['a']},
+    }
+    result = analyze_jobs(jobs)
+    assert result['cycles'] == [
+        {'kind': 'parent', 'jobs': ['a', 'b', 'c']},
+        {'kind': 'dependency', 'jobs': ['self']},
+    ]
+    # Dependency chains ignore the self-dependent job, which has no finite length
+    assert [path['jobs'] for path in result['critical_paths']] == [['b', 'c'], ['a', 'ok']]
+
+def test_parent_cycle_has_no_hotspots():
+    jobs = {
+        'a': {'name': 'a', 'parent': 'b'},
+        'b': {'name': 'b', 'parent': 'a'},
+    }
+    result = analyze_jobs(jobs)
+    assert result['cycles'] == [{'kind': 'parent', 'jobs': ['a', 'b']}]
+    assert result['fanout_hotspots'] == []
+
+def test_mixed_edges_are_not_a_cycle():
+    # base depends on its own child: valid in Zuul, the edge types do not combine
+    jobs = {
+        'base': {'name': 'base', 'dependencies': ['child']},
+        'child': {'name': 'child', 'parent': 'base'},
+    }
+    assert analyze_jobs(jobs)['cycles'] == []
+
+def test_long_chain_does_not_recurse():
+    jobs = {'job0': {'name': 'job0'}}
+    for i in range(1, 5000):
+        jobs[f'job{i}'] = {'name': f'job{i}', 'parent': f'job{i - 1}', 'dependencies': [f'job{i - 1}']}
+    result = analyze_jobs(jobs)
+    assert result['critical_paths'][0]['length'] == 5000
+    assert result['fanout_hotspots'][0] == {'job': 'job0', 'descendants': 4999, 'children': 1, 'dependents': 1}
+    assert result['cycles'] == []
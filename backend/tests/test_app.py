@@ -1,5 +1,9 @@
 
+import hashlib
+import hmac
+import json
 import pytest
+import threading
 from unittest.mock import MagicMock, patch
 import app
 
@@ -18,6 +22,58 @@ def test_get_graph(mock_parser, client):
     assert rv.status_code == 200
     assert rv.json == mock_data
 
+@patch('app.parser')
+def test_get_graph_branch(mock_parser, client):
+    mock_parser.get_branches.return_value = ['stable/1']
+    mock_parser.get_graph_data.return_value = {'nodes': [{'id': 'job1'}], 'edges': []}
+
+    rv = client.get('/api/graph?branch=stable/1')
+    assert rv.status_code == 200
+    mock_parser.get_graph_data.assert_called_once_with('stable/1')
+
+    rv = client.get('/api/graph?branch=unknown')
+    assert rv.status_code == 404
+    assert rv.json['branches'] == ['stable/1']
+
+    rv = client.get('/api/branches')
+    assert rv.json == {'branches': ['stable/1']}
+
+@patch('app.parser')
+def test_get_graph_columnar(mock_parser, client):
+    mock_parser.get_columnar.return_value = b'ZVGRAPH\0data'
+    rv = client.get('/api/graph/columnar')
+    assert rv.status_code == 200
+    assert rv.data == b'ZVGRAPH\0data'
+    assert rv.content_type == 'application/vnd.zuul-viz.graph'
+
+@patch('app.parser')
+def test_get_analysis(mock_parser, client):
+    mock_parser.get_branches.return_value = []
+    mock_parser.get_analysis.return_value = {
+        'critical_paths': [{'length': 2, 'jobs': ['a', 'b']}, {'length': 2, 'jobs': ['c', 'd']}],
+        'fanout_hotspots': [], 'dangling': [], 'cycles': [],
+    }
+    rv = client.get('/api/analysis?limit=1')
+    assert rv.status_code == 200
+    assert rv.json['critical_paths'] == [{'length': 2, 'jobs': ['a', 'b']}]
+    mock_parser.get_analysis.assert_called_once_with(None)
+
+    assert client.get('/api/analysis?branch=unknown').status_code == 404
+
+@patch('app.parser')
+def test_get_resolved_job(mock_parser, client):
+    mock_parser.get_branches.return_value = ['stable']
+    mock_parser.get_resolved_job.return_value = {'name': 'org/unit', 'inheritance': ['base', 'org/unit'],
+                                                 'job': {'name': 'org/unit'}, 'attribute_sources': {}, 'errors': []}
+    rv = client.get('/api/jobs/org/unit/resolved?branch=stable')
+    assert rv.status_code == 200
+    assert rv.json['inheritance'] == ['base', 'org/unit']
+    mock_parser.get_resolved_job.assert_called_once_with('org/unit', 'stable')
+
+    mock_parser.get_resolved_job.return_value = None
+    assert client.get('/api/jobs/missing/resolved').status_code == 404
+    assert client.get('/api/jobs/org/unit/resolved?branch=unknown').status_code == 404
+
 @patch('app.parser')
 @patch('app.resolve_project_paths')
 def test_load_repo_validation(mock_resolve, mock_parser, client):
@@ -26,10 +82,14 @@ def test_load_repo_validation(mock_resolve, mock_parser, client):
     assert rv.status_code == 400
     assert 'error' in rv.json
     
-    # Test resolution failure
+    # Test resolution failure, reported through the job status
     mock_resolve.return_value = ([], "Some error")
     rv = client.post('/api/load-repo', json={'url': 'bad-url'})
-    assert rv.status_code == 400
+    assert rv.status_code == 202
+    app.tasks.wait(rv.json['job_id'], timeout=5)
+
+    rv = client.get(rv.json['status_url'])
+    assert rv.json['status'] == 'failed'
     assert 'Failed to resolve' in rv.json['error']
 
 @patch('app.parser')
@@ -40,8 +100,119 @@ def test_load_repo_success(mock_scheduler, mock_resolve, mock_parser, client):
     mock_parser.project_infos = []
     
     rv = client.post('/api/load-repo', json={'url': 'git://foo'})
-    assert rv.status_code == 200
-    assert 'successfully' in rv.json['message']
+    assert rv.status_code == 202
+    task = app.tasks.wait(rv.json['job_id'], timeout=5)
+    assert task['status'] == 'completed'
+    assert task['progress'] == 100
     
     # Verify it was added to parser and scheduler
     assert len(mock_parser.project_infos) == 1
+    # Only the new repository is parsed, and no full sync is triggered
+    mock_parser.parse_project.assert_called_once_with(mock_parser.project_infos[0])
+    mock_parser.parse.assert_not_called()
+    mock_scheduler.force_run.assert_not_called()
+
+@patch('app.parser')
+@patch('app.resolve_project_paths')
+def test_load_repo_deduplicates_same_url(mock_resolve, mock_parser, client):
+    release = threading.Event()
+    def slow_resolve(urls, progress_callback=None):
+        release.wait(5)
+        return [{'path': '/tmp', 'url': urls[0], 'commit': 'HEAD'}], None
+    mock_resolve.side_effect = slow_resolve
+    mock_parser.project_infos = []
+
+    first = client.post('/api/load-repo', json={'url': 'https://example.com/repo.git'})
+    second = client.post('/api/load-repo', json={'url': 'https://example.com/repo/'})
+    release.set()
+
+    assert first.json['job_id'] == second.json['job_id']
+    app.tasks.wait(first.json['job_id'], timeout=5)
+    assert mock_resolve.call_count == 1
+
+def test_job_status_unknown(client):
+    rv = client.get('/api/jobs-status/does-not-exist')
+    assert rv.status_code == 404
+
+@patch('app.snapshot')
+@patch('app.ROLE', 'worker')
+def test_worker_serves_snapshot(mock_snapshot, client):
+    mock_snapshot.graph_bytes.return_value = b'{"nodes": [], "edges": [{"id": "a-b"}]}'
+
+    rv = client.get('/api/graph')
+    assert rv.status_code == 200
+    assert rv.json == {'nodes': [], 'edges': [{'id': 'a-b'}]}
+
+@patch('app.forward_to_leader')
+@patch('app.scheduler')
+@patch('app.ROLE', 'worker')
+def test_worker_forwards_mutations(mock_scheduler, mock_forward, client):
+    mock_forward.return_value = ({'message': 'forwarded'}, 200)
+
+    rv = client.post('/api/system/sync')
+    assert rv.json == {'message': 'forwarded'}
+    mock_forward.assert_called_once()
+    mock_scheduler.force_run.assert_not_called()
+
+def test_metrics_endpoint(client):
+    app.metrics.configure(True)
+    try:
+        client.get('/api/system/status')
+        rv = client.get('/metrics')
+        assert rv.status_code == 200
+        assert 'zuul_viz_http_request_seconds_count{endpoint="system_status",method="GET"} 1' in rv.get_data(as_text=True)
+    finally:
+        app.metrics.configure(False)
+        app.metrics.reset()
+
+    assert client.get('/metrics').status_code == 404
+
+@patch('app.parser')
+@patch('app.scheduler')
+def test_push_hook_triggers_matching_repo(mock_scheduler, mock_parser, client):
+    mock_parser.project_infos = [
+        {'path': '/repos/zuul-jobs', 'url': 'https://github.com/example-org/zuul-jobs.git', 'commit': 'a'},
+        {'path': '/repos/other', 'url': 'https://github.com/example-org/other', 'commit': 'b'},
+    ]
+    payload = {'repository': {'clone_url': 'https://github.com/example-org/zuul-jobs.git'}}
+
+    rv = client.post('/api/hooks/push', json=payload)
+    assert rv.status_code == 202
+    assert rv.json['matched'] == ['/repos/zuul-jobs']
+    mock_scheduler.trigger_repo.assert_called_once_with('/repos/zuul-jobs', delay=rv.json['debounce'])
+    mock_scheduler.force_run.assert_not_called()
+
+    rv = client.post('/api/hooks/push', json={'repository': {'clone_url': 'https://example.com/unknown'}})
+    assert rv.status_code == 200
+    assert rv.json['matched'] == []
+
+@patch('app.parser')
+@patch('app.scheduler')
+def test_worker_forwards_webhook_signature(mock_scheduler, mock_parser, client):
+    mock_parser.project_infos = [{'path': '/repos/zuul-jobs', 'url': 'https://github.com/example-org/zuul-jobs', 'commit': 'a'}]
+    body = json.dumps({'repository': {'clone_url': 'https://github.com/example-org/zuul-jobs.git'}}).encode()
+    signature = 'sha256=' + hmac.new(b's3cret', body, hashlib.sha256).hexdigest()
+    forwarded = []
+
+    def urlopen(leader_request, timeout=None):
+        forwarded.append(leader_request)
+        response = MagicMock(status=202, headers={'Content-Type': 'application/json'})
+        response.read.return_value = b'{}'
+        response.__enter__.return_value = response
+        return response
+
+    with patch.dict(app.config, {'webhook_secret': 's3cret'}):
+        with patch('app.ROLE', 'worker'), patch('app.urllib.request.urlopen', side_effect=urlopen):
+            for headers in ({'X-Hub-Signature-256': signature, 'X-GitHub-Event': 'push'},
+                            {'X-Hub-Signature-256': 'sha256=bad'}):
+                client.post('/api/hooks/push', data=body, content_type='application/json', headers=headers)
+
+        # The leader sees the same request the code host sent to the worker
+        statuses = []
+        for leader_request in forwarded:
+            rv = client.open(leader_request.selector, method=leader_request.get_method(),
+                             data=leader_request.data, headers=dict(leader_request.header_items()))
+            statuses.append(rv.status_code)
+    assert statuses == [202, 403]
+    assert forwarded[0].get_header('X-github-event') == 'push'
+    mock_scheduler.trigger_repo.assert_called_once()
@@ -0,0 +1,86 @@
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+import app
+import git_utils
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.load_test import check_invariants
+from parser import ZuulParser
+from repo_cache import TempRepoCache
+
+@pytest.fixture
+def live_app(tmp_path, monkeypatch):
+    """The app wired to a real parser over local corpus repos (no static sources)."""
+    corpus = SyntheticCorpus(tmp_path / 'corpus', projects=3, jobs=5, depth=2, fanout=1, vars_per_job=1, files=1)
+    corpus.generate()
+    monkeypatch.setenv('CLONE_DIR', str(tmp_path / 'clones'))
+    monkeypatch.setenv('ALLOW_LOCAL_SOURCES', 'true')
+    infos = []
+    zuul_parser = ZuulParser(infos)
+    monkeypatch.setattr(app, 'parser', zuul_parser)
+    monkeypatch.setattr(app, 'scheduler', MagicMock(project_infos=infos))
+    monkeypatch.setattr(app, 'temp_repos', TempRepoCache({'max_temp_repos': 2}, infos, zuul_parser))
+    with patch('repo_cache.load_config', return_value={'sources': []}):
+        yield corpus
+
+def load(url):
+    return app.load_repo_task(lambda *args, **kwargs: None, url)
+
+def test_clear_during_load_keeps_index_consistent(live_app):
+    url = live_app.sources[0]
+    load(url)
+
+    # A clear lands while the reload is resolving the (already cloned) repo
+    def resolve_then_clear(urls, progress_callback=None):
+        result = git_utils.resolve_project_paths(urls)
+        with app.app.test_client() as client:
+            client.post('/api/clear')
+        return result
+
+    with patch('app.resolve_project_paths', side_effect=resolve_then_clear):
+        with pytest.raises(RuntimeError, match='removed while loading'):
+            load(url)
+    assert check_invariants(app.parser) == []
+    assert app.parser.project_infos == []
+
+def test_repo_update_after_clear_is_dropped(live_app):
+    load(live_app.sources[0])
+    info = app.parser.project_infos[0]
+    # Static repos keep their clone on clear, so a late reparse would find jobs
+    with patch('app.static_source_urls', return_value={live_app.sources[0]}):
+        with app.app.test_client() as client:
+            client.post('/api/clear')
+
+    # The scheduler fetched the repo before the clear and reports the change after it
+    app.refresh_project(info)
+    assert app.parser.jobs == {}
+    assert check_invariants(app.parser) == []
+
+def test_concurrent_loads_clears_and_parses(live_app):
+    errors = []
+
+    def loader(url):
+        for _ in range(5):
+            try:
+                load(url)
+            except RuntimeError as e:
+                if 'removed while loading' not in str(e):
+                    errors.append(e)
+
+    def clearer():
+        with app.app.test_client() as client:
+            for _ in range(5):
+                client.post('/api/clear')
+                app.parser.parse()
+
+    threads = [threading.Thread(target=loader, args=(url,)) for url in live_app.sources]
+    threads.append(threading.Thread(target=clearer))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+
+    assert errors == []
+    assert check_invariants(app.parser) == []
+    # Eviction kept the temporary repos within budget
+    assert len(app.parser.project_infos) <= 2
@@ -0,0 +1,34 @@
+import subprocess
+from benchmarks.corpus import SyntheticCorpus
+from parser import ZuulParser
+
+def clone_all(corpus, tmp_path):
+    infos = []
+    for i, source in enumerate(corpus.sources):
+        path = str(tmp_path / f'clone{i}')
+        subprocess.check_call(['git', 'clone', '-q', source, path])
+        infos.append({'path': path, 'url': source, 'commit': 'HEAD'})
+    return infos
+
+def test_corpus_parses_to_expected_graph(tmp_path):
+    corpus = SyntheticCorpus(tmp_path / 'corpus', projects=2, jobs=6, depth=3, fanout=1, vars_per_job=5, files=2)
+    corpus.generate()
+    assert all(source.startswith('file://') for source in corpus.sources)
+
+    zuul_parser = ZuulParser(clone_all(corpus, tmp_path))
+    zuul_parser.parse()
+
+    # 6 jobs per project plus the shared base job
+    assert len(zuul_parser.jobs) == 13
+    assert zuul_parser.jobs['project1-job2']['parent'] == 'project1-job1'
+    assert zuul_parser.jobs['project1-job3']['parent'] == 'base'
+    assert len(zuul_parser.jobs['project1-job0']['vars']) == 5
+    assert len(zuul_parser.jobs['project1-job0']['dependencies']) == 1
+
+def test_touch_pushes_new_commit(tmp_path):
+    corpus = SyntheticCorpus(tmp_path / 'corpus', projects=1, jobs=2)
+    corpus.generate()
+    bare = corpus.sources[0][len('file://'):]
+    before = subprocess.check_output(['git', '-C', bare, 'rev-parse', 'HEAD'])
+    corpus.touch(0)
+    assert subprocess.check_output(['git', '-C', bare, 'rev-parse', 'HEAD']) != before
@@ -0,0 +1,65 @@
+import subprocess
+import git_utils
+
+def test_normalize_source():
+    assert git_utils.normalize_source('https://example.com/org/repo.git') == 'https://example.com/org/repo'
+    assert git_utils.normalize_source(' https://example.com/org/repo/ ') == 'https://example.com/org/repo'
+
+def test_repo_dir_name_is_stable_across_url_spellings():
+    name = git_utils.repo_dir_name('https://example.com/org/repo.git')
+    assert name.startswith('repo_')
+    assert name == git_utils.repo_dir_name('https://example.com/org/repo/')
+
+def test_clone_reports_progress(tmp_path):
+    origin = tmp_path / 'origin'
+    subprocess.check_call(['git', 'init', '-q', str(origin)])
+    (origin / 'zuul.yaml').write_text('- job:\n    name: test\n')
+    subprocess.check_call(['git', '-C', str(origin), 'add', '.'])
+    subprocess.check_call(['git', '-C', str(origin), '-c', 'user.name=t', '-c', 'user.email=t@t',
+                           'commit', '-q', '-m', 'init'])
+
+    progress = []
+    target = tmp_path / 'clone'
+    git_utils.clone(f'file://{origin}', str(target), progress_callback=lambda phase, pct: progress.append(pct))
+    assert (target / 'zuul.yaml').exists()
+    assert progress and progress[-1] == 100
+
+def test_ls_tree_and_cat_file_batch(tmp_path):
+    repo = tmp_path / 'repo'
+    subprocess.check_call(['git', 'init', '-q', str(repo)])
+    (repo / 'zuul.d').mkdir()
+    (repo / 'zuul.d' / 'jobs.yaml').write_text('- job:\n    name: a\n')
+    (repo / 'README').write_text('readme\n')
+    subprocess.check_call(['git', '-C', str(repo), 'add', '.'])
+    subprocess.check_call(['git', '-C', str(repo), '-c', 'user.name=t', '-c', 'user.email=t@t',
+                           'commit', '-q', '-m', 'init'])
+
+    entries = git_utils.ls_tree(str(repo), 'HEAD', ['zuul.d'])
+    assert [(obj_type, path) for _, obj_type, _, path in entries] == [('blob', 'zuul.d/jobs.yaml')]
+
+    cat_file = git_utils.CatFileBatch(str(repo))
+    try:
+        sha = entries[0][2]
+        assert cat_file.read(sha) == b'- job:\n    name: a\n'
+        # The same process serves many requests, including missing objects
+        assert cat_file.read_many(['HEAD:README', 'HEAD:nope', sha]) == [b'readme\n', None, b'- job:\n    name: a\n']
+    finally:
+        cat_file.close()
+
+def test_local_sources_require_opt_in(tmp_path, monkeypatch):
+    origin = tmp_path / 'origin'
+    subprocess.check_call(['git', 'init', '-q', str(origin)])
+    subprocess.check_call(['git', '-C', str(origin), '-c', 'user.name=t', '-c', 'user.email=t@t',
+                           'commit', '-q', '--allow-empty', '-m', 'init'])
+    monkeypatch.setenv('CLONE_DIR', str(tmp_path / 'clones'))
+    monkeypatch.delenv('ALLOW_LOCAL_SOURCES', raising=False)
+
+    infos, error = git_utils.resolve_project_paths([f'file://{origin}'])
+    assert infos == []
+    assert 'not allowed' in error
+    assert not (tmp_path / 'clones').exists()
+
+    monkeypatch.setenv('ALLOW_LOCAL_SOURCES', 'true')
+    infos, error = git_utils.resolve_project_paths([f'file://{origin}'])
+    assert error is None
+    assert len(infos) == 1
@@ -0,0 +1,73 @@
+import json
+import os
+import pytest
+from benchmarks.corpus import SyntheticCorpus
+from graph_format import GraphReader, encode_graph, write_graph
+from parser import ZuulParser
+from tests.test_corpus import clone_all
+
+JOBS = {
+    'base': {'name': 'base', 'vars': {'nested': {'list': [1, 2]}, 'flag': True}, 'source_url': 'https://example.com/a'},
+    'child-ü': {'name': 'child-ü', 'parent': 'base', 'dependencies': ['base', {'name': 'missing', 'soft': True}],
+                'source_url': 'https://example.com/a'},
+    'orphan': {'name': 'orphan', 'parent': 'unknown-parent'},
+}
+FRONTEND_FIXTURE = os.path.join(os.path.dirname(__file__), '..', '..', 'frontend', 'src', '__tests__',
+                                'fixtures', 'graph.bin')
+
+def test_round_trip():
+    reader = GraphReader(encode_graph(JOBS))
+    assert reader.job_count == 3
+    assert [reader.name(i) for i in range(reader.job_count)] == list(JOBS)
+    child = reader.index('child-ü')
+    assert reader.parent(child) == 'base'
+    assert reader.dependencies(child) == ['base', 'missing']
+    assert reader.soft_dependencies(child) == [False, True]
+    assert reader.parent(reader.index('orphan')) == 'unknown-parent'
+    assert reader.parent(reader.index('base')) is None
+    assert reader.vars(reader.index('base')) == JOBS['base']['vars']
+    assert reader.vars(child) == {}
+    assert reader.source(child) == 'https://example.com/a'
+    assert reader.source(reader.index('orphan')) is None
+    # Strings are interned: one entry per distinct name/URL
+    assert reader.string_count == 6
+    # Parent indexes of defined jobs point straight at the job
+    assert reader.parents[child] == reader.index('base')
+
+def test_memory_mapped(tmp_path):
+    path = tmp_path / 'graph.bin'
+    write_graph(path, JOBS)
+    reader = GraphReader.open(path)
+    assert list(reader.dep_offsets) == [0, 0, 2, 2]
+    assert reader.dependencies(1) == ['base', 'missing']
+    assert reader.soft_dependencies(1) == [False, True]
+    assert reader.soft_dependencies(0) == []
+
+def test_frontend_fixture_is_current():
+    # frontend/src/__tests__/columnarGraph.test.js decodes this file; regenerate with
+    # python -m tests.test_graph_format
+    with open(FRONTEND_FIXTURE, 'rb') as f:
+        assert f.read() == encode_graph(JOBS)
+
+def test_rejects_other_data():
+    with pytest.raises(ValueError):
+        GraphReader(b'{"nodes": []}' + b'\0' * 32)
+
+def test_smaller_than_json(tmp_path):
+    corpus = SyntheticCorpus(tmp_path / 'corpus', projects=2, jobs=50, depth=3, fanout=2, vars_per_job=3, files=2)
+    corpus.generate()
+    zuul_parser = ZuulParser(clone_all(corpus, tmp_path))
+    zuul_parser.parse()
+
+    data = zuul_parser.get_columnar()
+    assert zuul_parser.get_columnar() is data # Cached for the generation
+    assert len(data) * 5 < len(json.dumps(zuul_parser.get_graph_data(), default=str))
+
+    reader = GraphReader(data)
+    for i in range(reader.job_count):
+        job = zuul_parser.jobs[reader.name(i)]
+        assert reader.parent(i) == job.get('parent')
+        assert reader.vars(i) == json.loads(json.dumps(job.get('vars') or {}))
+
+if __name__ == '__main__':
+    write_graph(FRONTEND_FIXTURE, JOBS)
@@ -0,0 +1,89 @@
+from inheritance import resolve_job
+
+JOBS = {
+    'base': {
+        'name': 'base', 'pre-run': 'playbooks/base/pre.yaml', 'post-run': ['playbooks/base/post.yaml'],
+        'roles': [{'zuul': 'org/zuul-jobs'}], 'nodeset': 'ubuntu-focal', 'timeout': 1800,
+        'vars': {'tox': {'envlist': 'py3', 'extra_args': '-v'}, 'debug': False},
+        'required-projects': ['org/requirements'], 'source_file': 'zuul.d/base.yaml',
+        'vars_source': {'tox': 'https://example.com/base.yaml#L7', 'debug': 'https://example.com/base.yaml#L9'},
+    },
+    'tox': {
+        'name': 'tox', 'parent': 'base', 'abstract': True, 'run': 'playbooks/tox/run.yaml',
+        'pre-run': 'playbooks/tox/pre.yaml', 'post-run': 'playbooks/tox/post.yaml',
+        'roles': [{'zuul': 'org/tox-roles'}, {'zuul': 'org/zuul-jobs'}],
+        'vars': {'tox': {'envlist': 'pep8'}}, 'irrelevant-files': ['^docs/.*$'],
+        'required-projects': [{'name': 'org/requirements', 'override-checkout': 'stable'}, 'org/lib'],
+    },
+    'tox-py3': {
+        'name': 'tox-py3', 'parent': 'tox', 'timeout': 3600, 'vars': {'debug': True},
+        'source_file': 'zuul.d/py3.yaml', 'vars_source': {'debug': 'https://example.com/py3.yaml#L4'},
+    },
+}
+
+def test_resolves_zuul_inheritance_rules():
+    result = resolve_job(JOBS, 'tox-py3')
+    job = result['job']
+    assert result['inheritance'] == ['base', 'tox', 'tox-py3']
+    assert result['errors'] == []
+    # Playbooks nest around the child's
+    assert job['pre-run'] == ['playbooks/base/pre.yaml', 'playbooks/tox/pre.yaml']
+    assert job['post-run'] == ['playbooks/tox/post.yaml', 'playbooks/base/post.yaml']
+    assert job['run'] == 'playbooks/tox/run.yaml'
+    # The child's roles come first, repeated ones are not duplicated
+    assert job['roles'] == [{'zuul': 'org/tox-roles'}, {'zuul': 'org/zuul-jobs'}]
+    assert job['vars'] == {'tox': {'envlist': 'pep8', 'extra_args': '-v'}, 'debug': True}
+    # Inherited vars keep their links, the child's own definitions win
+    assert job['vars_source'] == {'tox': 'https://example.com/base.yaml#L7', 'debug': 'https://example.com/py3.yaml#L4'}
+    assert job['required-projects'] == [{'name': 'org/requirements', 'override-checkout': 'stable'}, 'org/lib']
+    assert job['nodeset'] == 'ubuntu-focal'
+    assert job['timeout'] == 3600
+    assert job['irrelevant-files'] == ['^docs/.*$']
+    # Properties of the definition itself are not inherited
+    assert job['name'] == 'tox-py3'
+    assert 'abstract' not in job
+    assert job['source_file'] == 'zuul.d/py3.yaml'
+    assert result['attribute_sources']['timeout'] == ['tox-py3']
+    assert result['attribute_sources']['vars'] == ['base', 'tox', 'tox-py3']
+    assert 'vars_source' not in result['attribute_sources']
+    # The index is not modified
+    assert JOBS['tox-py3']['vars'] == {'debug': True}
+
+def test_unknown_job():
+    assert resolve_job(JOBS, 'missing') is None
+
+def test_inheritance_errors():
+    jobs = {
+        'orphan': {'name': 'orphan', 'parent': 'missing'},
+        'final': {'name': 'final', 'final': True},
+        'child': {'name': 'child', 'parent': 'final'},
+        'a': {'name': 'a', 'parent': 'b'},
+        'b': {'name': 'b', 'parent': 'a'},
+    }
+    assert resolve_job(jobs, 'orphan')['errors'] == ["Parent job 'missing' of 'orphan' is not defined"]
+    assert resolve_job(jobs, 'child')['errors'] == ["Job 'child' inherits from final job 'final'"]
+    assert 'final' not in resolve_job(jobs, 'child')['job']
+    result = resolve_job(jobs, 'a')
+    assert result['errors'] == ["Inheritance cycle through job 'a'"]
+    assert result['inheritance'] == ['b', 'a']
+
+def test_memo_only_recomputes_changed_chains():
+    jobs = dict(JOBS, other={'name': 'other', 'vars': {'x': 1}})
+    memo = {}
+    resolved = resolve_job(jobs, 'tox-py3', memo)
+    other = resolve_job(jobs, 'other', memo)
+    assert resolve_job(jobs, 'tox-py3', memo) is resolved
+
+    # Replacing an ancestor invalidates its descendants only
+    jobs['base'] = dict(jobs['base'], timeout=60)
+    assert resolve_job(jobs, 'other', memo) is other
+    updated = resolve_job(jobs, 'tox-py3', memo)
+    assert updated is not resolved
+    assert updated['job']['timeout'] == 3600
+    assert resolve_job(jobs, 'tox', memo)['job']['timeout'] == 60
+
+    # A parent defined later is picked up by a previously broken chain
+    broken = {'child': {'name': 'child', 'parent': 'late'}}
+    assert resolve_job(broken, 'child', memo)['errors']
+    broken['late'] = {'name': 'late', 'nodeset': 'centos'}
+    assert resolve_job(broken, 'child', memo)['job']['nodeset'] == 'centos'
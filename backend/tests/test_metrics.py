@@ -0,0 +1,52 @@
+import pytest
+from metrics import Registry
+
+@pytest.fixture
+def registry():
+    reg = Registry()
+    reg.configure(True, const_labels={'role': 'standalone'})
+    return reg
+
+def test_disabled_registry_records_nothing():
+    reg = Registry()
+    with reg.timer('zuul_viz_parse_seconds'):
+        pass
+    reg.inc('zuul_viz_graph_cache_total', result='hit')
+    reg.set('zuul_viz_jobs', 3)
+    assert reg.export() == {'counter': [], 'gauge': [], 'histogram': []}
+
+def test_render_prometheus_text(registry):
+    registry.inc('zuul_viz_graph_cache_total', result='hit')
+    registry.inc('zuul_viz_graph_cache_total', result='hit')
+    registry.set('zuul_viz_jobs', 42)
+    registry.observe('zuul_viz_parse_seconds', 0.2)
+
+    text = registry.render()
+    assert '# TYPE zuul_viz_graph_cache_total counter' in text
+    assert 'zuul_viz_graph_cache_total{role="standalone",result="hit"} 2' in text
+    assert 'zuul_viz_jobs{role="standalone"} 42' in text
+    assert 'zuul_viz_parse_seconds_bucket{role="standalone",le="0.1"} 0' in text
+    assert 'zuul_viz_parse_seconds_bucket{role="standalone",le="0.25"} 1' in text
+    assert 'zuul_viz_parse_seconds_count{role="standalone"} 1' in text
+
+def test_render_merges_other_process(registry):
+    leader = Registry()
+    leader.configure(True, const_labels={'role': 'leader'})
+    leader.set('zuul_viz_jobs', 7)
+    registry.set('zuul_viz_jobs', 42)
+
+    text = registry.render(extra=leader.export())
+    # One family header, both series
+    assert text.count('# TYPE zuul_viz_jobs gauge') == 1
+    assert 'zuul_viz_jobs{role="leader"} 7' in text
+    assert 'zuul_viz_jobs{role="standalone"} 42' in text
+
+def test_remove_series_by_label(registry):
+    registry.observe('zuul_viz_repo_fetch_seconds', 0.2, repo='temp_1', operation='clone')
+    registry.inc('zuul_viz_repo_fetch_failures_total', repo='temp_1', operation='fetch')
+    registry.observe('zuul_viz_repo_fetch_seconds', 0.2, repo='static_1', operation='clone')
+
+    registry.remove(repo='temp_1')
+    text = registry.render()
+    assert 'temp_1' not in text
+    assert 'zuul_viz_repo_fetch_seconds_count{role="standalone",operation="clone",repo="static_1"} 1' in text
@@ -1,8 +1,11 @@
 
 import pytest
 import os
+import subprocess
 from unittest.mock import MagicMock, patch
-from parser import ZuulParser
+from benchmarks.corpus import SyntheticCorpus
+from parser import CONFIG_PATHS, ZuulParser, select_config_blobs
+import git_utils
 
 @pytest.fixture
 def parser():
@@ -66,3 +69,214 @@ def test_parse_directory_structure(parser):
 
 # Since properly mocking ruamel.yaml and file I/O together is complex, 
 # we rely on the logic tests above for graph structure and inheritance.
+
+def test_parse_project_is_incremental(tmp_path):
+    repo_a = tmp_path / 'a'
+    repo_b = tmp_path / 'b'
+    for repo, job in ((repo_a, 'job-a'), (repo_b, 'job-b')):
+        (repo / 'zuul.d').mkdir(parents=True)
+        (repo / 'zuul.d' / 'jobs.yaml').write_text(f"- job:\n    name: {job}\n")
+
+    info_a = {'path': str(repo_a), 'url': 'https://github.com/test/a', 'commit': 'abc'}
+    info_b = {'path': str(repo_b), 'url': 'https://github.com/test/b', 'commit': 'def'}
+    zuul_parser = ZuulParser([info_a])
+    zuul_parser.parse()
+    job_a = zuul_parser.jobs['job-a']
+
+    zuul_parser.project_infos.append(info_b)
+    zuul_parser.parse_project(info_b)
+    assert set(zuul_parser.jobs) == {'job-a', 'job-b'}
+    # Jobs of other projects are not reparsed
+    assert zuul_parser.jobs['job-a'] is job_a
+
+    zuul_parser.remove_project(str(repo_b))
+    assert set(zuul_parser.jobs) == {'job-a'}
+
+def test_bare_mirror_parses_like_worktree(tmp_path, monkeypatch):
+    corpus = SyntheticCorpus(tmp_path / 'corpus', projects=2, jobs=5, depth=2, fanout=1, vars_per_job=2, files=3)
+    corpus.generate()
+    # Ignored directories are skipped in both modes
+    ignored = os.path.join(corpus.work_dirs[1], 'zuul.d', 'skipped')
+    os.makedirs(ignored)
+    with open(os.path.join(ignored, '.zuul.ignore'), 'w'):
+        pass
+    with open(os.path.join(ignored, 'extra.yaml'), 'w') as f:
+        f.write('- job:\n    name: ignored-job\n')
+    corpus.touch(1)
+    subprocess.check_call(['git', '-C', corpus.work_dirs[1], 'add', '-A'])
+    subprocess.check_call(['git', '-C', corpus.work_dirs[1], '-c', 'user.name=t', '-c', 'user.email=t@t',
+                           'commit', '-q', '-m', 'ignored'])
+    subprocess.check_call(['git', '-C', corpus.work_dirs[1], 'push', '-q', 'origin', 'HEAD'])
+
+    results = {}
+    for mode in ('worktree', 'bare'):
+        monkeypatch.setenv('CLONE_DIR', str(tmp_path / mode))
+        monkeypatch.setenv('ALLOW_LOCAL_SOURCES', 'true')
+        monkeypatch.setenv('CHECKOUT_MODE', mode)
+        infos, error = git_utils.resolve_project_paths(corpus.sources)
+        assert error is None
+        assert all(info.get('bare', False) == (mode == 'bare') for info in infos)
+        zuul_parser = ZuulParser(infos)
+        zuul_parser.parse()
+        zuul_parser.close()
+        results[mode] = {name: (job.get('parent'), job['source_file'], job['source_line'], job['source_url'])
+                         for name, job in zuul_parser.jobs.items()}
+
+    assert 'ignored-job' not in results['bare']
+    assert results['bare'] == results['worktree']
+    # No working tree is checked out for bare mirrors
+    assert not os.path.exists(tmp_path / 'bare' / os.listdir(tmp_path / 'bare')[0] / 'zuul.d')
+
+@pytest.mark.parametrize('mode', ['worktree', 'bare'])
+def test_branch_indexes_share_unchanged_blobs(tmp_path, monkeypatch, mode):
+    corpus = SyntheticCorpus(tmp_path / 'corpus', projects=2, jobs=4, depth=2, fanout=1, vars_per_job=1, files=2)
+    corpus.generate()
+    # stable/1 of project0 differs from master in a single file
+    work_dir = corpus.work_dirs[0]
+    subprocess.check_call(['git', '-C', work_dir, 'checkout', '-q', '-b', 'stable/1'])
+    with open(os.path.join(work_dir, 'zuul.d', 'jobs-0.yaml'), 'a') as f:
+        f.write('- job:\n    name: stable-only\n    parent: base\n')
+    subprocess.check_call(['git', '-C', work_dir, '-c', 'user.name=t', '-c', 'user.email=t@t',
+                           'commit', '-q', '-am', 'stable'])
+    subprocess.check_call(['git', '-C', work_dir, 'push', '-q', 'origin', 'stable/1'])
+
+    monkeypatch.setenv('CLONE_DIR', str(tmp_path / 'clones'))
+    monkeypatch.setenv('CHECKOUT_MODE', mode)
+    with patch('git_utils.load_config', return_value={'clone_dir': str(tmp_path / 'clones'), 'checkout_mode': mode,
+                                                      'allow_local_sources': True,
+                                                      'branches': {corpus.sources[0]: ['stable/1']}}):
+        infos, error = git_utils.resolve_project_paths(corpus.sources)
+    assert error is None
+    assert infos[0]['branches'] == ['stable/1']
+
+    zuul_parser = ZuulParser(infos)
+    with patch.object(zuul_parser.yaml, 'load', wraps=zuul_parser.yaml.load) as yaml_load:
+        zuul_parser.parse()
+    zuul_parser.close()
+
+    assert zuul_parser.get_branches() == ['stable/1']
+    assert zuul_parser.get_graph_data('unknown') is None
+    default_names = {node['id'] for node in zuul_parser.get_graph_data()['nodes']}
+    branch_names = {node['id'] for node in zuul_parser.get_graph_data('stable/1')['nodes']}
+    assert branch_names == default_names | {'stable-only'}
+    # Projects without the branch contribute their default jobs as they are
+    assert zuul_parser.branches['stable/1']['jobs']['project1-job0'] is zuul_parser.jobs['project1-job0']
+    config_files = [len(select_config_blobs(git_utils.ls_tree(info['path'], 'HEAD', CONFIG_PATHS))) for info in infos]
+    if mode == 'bare':
+        # Only the changed file of the branch is parsed again
+        assert yaml_load.call_count == sum(config_files) + 1
+    else:
+        # The branch is read from git objects, so its files are not shared with the checkout
+        assert yaml_load.call_count == sum(config_files) + config_files[0]
+
+    # Reparsing a project only replaces its own contribution to the branch index
+    stable_resolved = zuul_parser.get_resolved_job('stable-only', 'stable/1')
+    with patch('git_utils.list_refs', wraps=git_utils.list_refs) as list_refs, \
+         patch('git_utils.ls_tree', wraps=git_utils.ls_tree) as ls_tree:
+        zuul_parser.parse_project(infos[1])
+    list_refs.assert_not_called()
+    assert {c.args[0] for c in ls_tree.call_args_list} <= {infos[1]['path']}
+    assert zuul_parser.branches['stable/1']['jobs']['project1-job0'] is zuul_parser.jobs['project1-job0']
+    assert zuul_parser.get_resolved_job('stable-only', 'stable/1') is stable_resolved
+
+    zuul_parser.remove_project(infos[1]['path'])
+    assert 'project1-job0' not in zuul_parser.branches['stable/1']['jobs']
+    assert 'stable-only' in zuul_parser.branches['stable/1']['jobs']
+    zuul_parser.close()
+
+def test_blob_cache_keeps_only_indexed_blobs(tmp_path, monkeypatch):
+    corpus = SyntheticCorpus(tmp_path / 'corpus', projects=2, jobs=4, depth=2, fanout=1, vars_per_job=1, files=2)
+    corpus.generate()
+    monkeypatch.setenv('CLONE_DIR', str(tmp_path / 'clones'))
+    monkeypatch.setenv('ALLOW_LOCAL_SOURCES', 'true')
+    monkeypatch.setenv('CHECKOUT_MODE', 'bare')
+    infos, error = git_utils.resolve_project_paths(corpus.sources)
+    assert error is None
+    zuul_parser = ZuulParser(infos)
+    zuul_parser.parse()
+    size = len(zuul_parser.blob_cache)
+
+    for _ in range(2):
+        corpus.touch(0)
+        subprocess.check_call(['git', '-C', infos[0]['path'], 'fetch', '-q', 'origin'])
+        infos[0]['commit'] = subprocess.check_output(['git', '-C', infos[0]['path'], 'rev-parse', 'HEAD']).decode().strip()
+        zuul_parser.parse_project(infos[0])
+        # The blob of the previous commit is replaced, not kept alongside
+        assert len(zuul_parser.blob_cache) == size
+
+    project1_blobs = zuul_parser.project_blobs[(infos[1]['path'], None)]
+    zuul_parser.remove_project(infos[1]['path'])
+    assert not project1_blobs & set(zuul_parser.blob_cache)
+    assert len(zuul_parser.blob_cache) == size - len(project1_blobs)
+    zuul_parser.close()
+
+def test_analysis_cached_per_generation(tmp_path):
+    repo = tmp_path / 'repo'
+    (repo / 'zuul.d').mkdir(parents=True)
+    (repo / 'zuul.d' / 'jobs.yaml').write_text("- job:\n    name: job-a\n    parent: missing\n")
+    info = {'path': str(repo), 'url': 'https://github.com/test/repo', 'commit': 'abc'}
+    zuul_parser = ZuulParser([info])
+    zuul_parser.parse()
+
+    first = zuul_parser.get_analysis()
+    assert first['dangling'] == [{'job': 'job-a', 'type': 'parent', 'missing': 'missing'}]
+    assert zuul_parser.get_analysis() is first
+    assert zuul_parser.get_analysis('unknown') is None
+
+    (repo / 'zuul.d' / 'jobs.yaml').write_text("- job:\n    name: missing\n- job:\n    name: job-a\n    parent: missing\n")
+    zuul_parser.parse_project(info)
+    second = zuul_parser.get_analysis()
+    assert second is not first
+    assert second['dangling'] == []
+
+def test_resolved_job_invalidated_by_ancestor_changes(tmp_path):
+    base_repo = tmp_path / 'base'
+    (base_repo / 'zuul.d').mkdir(parents=True)
+    (base_repo / 'zuul.d' / 'jobs.yaml').write_text("- job:\n    name: base\n    timeout: 60\n")
+    other_repo = tmp_path / 'other'
+    (other_repo / 'zuul.d').mkdir(parents=True)
+    (other_repo / 'zuul.d' / 'jobs.yaml').write_text(
+        "- job:\n    name: unit\n    parent: base\n- job:\n    name: lint\n")
+    base_info = {'path': str(base_repo), 'url': 'https://github.com/test/base', 'commit': 'abc'}
+    other_info = {'path': str(other_repo), 'url': 'https://github.com/test/other', 'commit': 'abc'}
+    zuul_parser = ZuulParser([base_info, other_info])
+    zuul_parser.parse()
+
+    unit = zuul_parser.get_resolved_job('unit')
+    lint = zuul_parser.get_resolved_job('lint')
+    assert unit['inheritance'] == ['base', 'unit']
+    assert unit['job']['timeout'] == 60
+    assert zuul_parser.get_resolved_job('unit') is unit
+    assert zuul_parser.get_resolved_job('missing') is None
+    assert zuul_parser.get_resolved_job('unit', 'unknown') is None
+
+    # Only jobs inheriting from the reparsed project are resolved again
+    (base_repo / 'zuul.d' / 'jobs.yaml').write_text("- job:\n    name: base\n    timeout: 90\n")
+    zuul_parser.parse_project(base_info)
+    assert zuul_parser.get_resolved_job('lint') is lint
+    assert zuul_parser.get_resolved_job('unit')['job']['timeout'] == 90
+
+    zuul_parser.remove_project(base_info['path'])
+    assert zuul_parser.get_resolved_job('unit')['errors'] == ["Parent job 'base' of 'unit' is not defined"]
+    assert 'base' not in zuul_parser.resolved_memo[None]
+
+
+def test_branch_derived_results_survive_unrelated_updates(tmp_path):
+    repo = tmp_path / 'repo'
+    (repo / 'zuul.d').mkdir(parents=True)
+    (repo / 'zuul.d' / 'jobs.yaml').write_text("- job:\n    name: job-a\n")
+    empty = tmp_path / 'empty'
+    empty.mkdir()
+    info = {'path': str(repo), 'url': 'https://github.com/test/repo', 'commit': 'abc', 'branches': ['stable']}
+    empty_info = {'path': str(empty), 'url': 'https://github.com/test/empty', 'commit': 'abc'}
+    zuul_parser = ZuulParser([info, empty_info])
+    with patch.object(zuul_parser, '_list_refs', return_value={}):
+        zuul_parser.parse()
+
+    analysis = zuul_parser.get_analysis('stable')
+    # A project that contributes no jobs leaves the branch index (and its results) alone
+    with patch.object(zuul_parser, '_list_refs') as list_refs:
+        zuul_parser.parse_project(empty_info)
+    list_refs.assert_not_called()
+    assert zuul_parser.get_analysis('stable') is analysis
+    assert zuul_parser.get_analysis() is not None
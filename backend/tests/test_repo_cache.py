@@ -0,0 +1,127 @@
+import subprocess
+import threading
+import pytest
+from unittest.mock import patch
+from parser import ZuulParser
+from repo_cache import TempRepoCache
+
+def make_repo(tmp_path, name, jobs=1, size=0):
+    repo = tmp_path / name
+    (repo / 'zuul.d').mkdir(parents=True)
+    content = ''.join(f"- job:\n    name: {name}-job{i}\n" for i in range(jobs))
+    (repo / 'zuul.d' / 'jobs.yaml').write_text(content)
+    if size:
+        (repo / 'blob').write_bytes(b'x' * size)
+    return {'path': str(repo), 'url': f'https://example.com/{name}', 'commit': 'abc'}
+
+@pytest.fixture
+def static_config():
+    with patch('repo_cache.load_config', return_value={'sources': ['https://example.com/static']}):
+        yield
+
+def load(cache, parser, info, viewed_at):
+    parser.project_infos.append(info)
+    parser.parse_project(info)
+    info['last_viewed'] = viewed_at
+    return cache.enforce(keep=info['path'])
+
+def test_evicts_least_recently_viewed(tmp_path, static_config):
+    infos = [make_repo(tmp_path, 'static')]
+    parser = ZuulParser(infos)
+    parser.parse()
+    cache = TempRepoCache({'max_temp_repos': 2}, infos, parser)
+
+    a, b, c = (make_repo(tmp_path, name) for name in ('a', 'b', 'c'))
+    assert load(cache, parser, a, 1) == []
+    assert load(cache, parser, b, 2) == []
+    # Viewing a makes b the least recently viewed
+    a['last_viewed'] = 3
+    assert load(cache, parser, c, 4) == [b]
+
+    assert [info['url'] for info in infos] == ['https://example.com/static', a['url'], c['url']]
+    assert 'b-job0' not in parser.jobs
+    assert not (tmp_path / 'b').exists()
+    # Static sources are never evicted
+    assert 'static-job0' in parser.jobs
+
+def test_job_and_disk_budgets(tmp_path, static_config):
+    infos = []
+    parser = ZuulParser(infos)
+    cache = TempRepoCache({'max_temp_repos': 0, 'max_temp_jobs': 5}, infos, parser)
+    big, small = make_repo(tmp_path, 'big', jobs=4), make_repo(tmp_path, 'small', jobs=2)
+    assert load(cache, parser, big, 1) == []
+    # The repo being loaded is kept even when it is the most recently viewed
+    assert load(cache, parser, small, 2) == [big]
+
+    cache = TempRepoCache({'max_temp_repos': 0, 'max_temp_disk_mb': 1}, infos, parser)
+    large = make_repo(tmp_path, 'large', size=1024 * 1024)
+    assert load(cache, parser, large, 3) == [small]
+    assert [info['path'] for info in infos] == [large['path']]
+
+def test_touch_job(tmp_path, static_config):
+    info = make_repo(tmp_path, 'a')
+    parser = ZuulParser([info])
+    parser.parse()
+    cache = TempRepoCache({}, parser.project_infos, parser)
+    assert cache.touch_job('a-job0')
+    assert info['last_viewed'] > 0
+    assert not cache.touch_job('unknown')
+
+def test_eviction_stops_cat_file_of_bare_mirror(tmp_path, static_config):
+    work = make_repo(tmp_path, 'work')
+    subprocess.check_call(['git', 'init', '-q', work['path']])
+    subprocess.check_call(['git', '-C', work['path'], 'add', '.'])
+    subprocess.check_call(['git', '-C', work['path'], '-c', 'user.name=t', '-c', 'user.email=t@t',
+                           'commit', '-q', '-m', 'init'])
+    mirror = tmp_path / 'mirror.git'
+    subprocess.check_call(['git', 'clone', '-q', '--bare', work['path'], str(mirror)])
+    info = {'path': str(mirror), 'url': 'https://example.com/mirror', 'commit': 'HEAD', 'bare': True}
+
+    infos = []
+    parser = ZuulParser(infos)
+    cache = TempRepoCache({'max_temp_repos': 1}, infos, parser)
+    load(cache, parser, info, 1)
+    assert 'work-job0' in parser.jobs
+    assert parser.blob_cache
+    process = parser.cat_files[info['path']].proc
+
+    load(cache, parser, make_repo(tmp_path, 'other'), 2)
+    assert info['path'] not in parser.cat_files
+    # Its parsed blobs are dropped with it
+    assert parser.blob_cache == {}
+    assert process.wait(timeout=5) is not None
+    parser.close()
+
+def test_eviction_drops_repo_metrics(tmp_path, static_config, monkeypatch):
+    from metrics import registry
+    monkeypatch.setattr(registry, 'enabled', True)
+    infos = []
+    parser = ZuulParser(infos)
+    cache = TempRepoCache({'max_temp_repos': 1}, infos, parser)
+    a = make_repo(tmp_path, 'a')
+    registry.observe('zuul_viz_repo_fetch_seconds', 0.1, repo='a', operation='clone')
+    load(cache, parser, a, 1)
+    load(cache, parser, make_repo(tmp_path, 'b'), 2)
+    try:
+        assert 'repo="a"' not in registry.render()
+    finally:
+        registry.reset()
+
+def test_eviction_waits_for_repo_lock(tmp_path, static_config):
+    lock = threading.Lock()
+    infos = []
+    parser = ZuulParser(infos)
+    cache = TempRepoCache({'max_temp_repos': 1}, infos, parser, repo_lock=lambda path: lock)
+    a = make_repo(tmp_path, 'a')
+    load(cache, parser, a, 1)
+
+    # A fetch of a is in progress
+    lock.acquire()
+    loader = threading.Thread(target=load, args=(cache, parser, make_repo(tmp_path, 'b'), 2))
+    loader.start()
+    loader.join(timeout=0.5)
+    assert loader.is_alive()
+    assert (tmp_path / 'a').exists()
+    lock.release()
+    loader.join(timeout=5)
+    assert not (tmp_path / 'a').exists()
@@ -1,5 +1,7 @@
 
 import pytest
+import subprocess
+import time
 from unittest.mock import MagicMock, patch, call
 from scheduler import JobScheduler
 
@@ -28,7 +30,7 @@ def test_start(scheduler):
     scheduler.scheduler.add_job.assert_called()
     scheduler.scheduler.start.assert_called_once()
 
-@patch('scheduler.load_config')
+@patch('repo_cache.load_config')
 @patch('subprocess.check_call')
 @patch('subprocess.check_output')
 @patch('os.path.exists')
@@ -53,20 +55,103 @@ def test_update_repos_success(mock_isdir, mock_exists, mock_sub_output, mock_sub
     # Verify callback
     scheduler.on_update_callback.assert_called_once()
 
-@patch('scheduler.load_config')
+@patch('repo_cache.load_config')
 @patch('shutil.rmtree')
+@patch('subprocess.check_call')
+@patch('subprocess.check_output')
 @patch('os.path.exists')
-def test_cleanup_removed_repos(mock_exists, mock_rmtree, mock_load_config, scheduler):
+@patch('os.path.isdir')
+def test_sync_keeps_temporary_repos(mock_isdir, mock_exists, mock_sub_output, mock_sub_call, mock_rmtree, mock_load_config, scheduler):
     # Setup: config has NO sources, but we have one in project_infos
     mock_load_config.return_value = {'sources': []} 
     mock_exists.return_value = True
+    mock_isdir.return_value = True
+    mock_sub_output.return_value = b'newhash\n'
     
     # Run
     scheduler.update_repos_and_docs()
     
-    # Verify removal
-    mock_rmtree.assert_called_with('/tmp/repo1')
-    assert len(scheduler.project_infos) == 0
-    
-    # Callback should still run if we cleaned up? Logic says it runs at end
+    # Temporary repos are left to TempRepoCache eviction and updated like the others
+    mock_rmtree.assert_not_called()
+    assert len(scheduler.project_infos) == 1
+    mock_sub_call.assert_any_call(['git', '-C', '/tmp/repo1', 'fetch', 'origin'])
     scheduler.on_update_callback.assert_called_once()
+
+@patch('repo_cache.load_config')
+def test_sync_repo_jobs_schedules_static_repos_only(mock_load_config, scheduler):
+    mock_load_config.return_value = {'sources': ['git://repo1']}
+    scheduler.project_infos.append({'path': '/tmp/temp', 'url': 'git://temp', 'commit': 'x'})
+    scheduler.scheduler.get_jobs.return_value = []
+    scheduler.scheduler.get_job.return_value = None
+
+    scheduler.sync_repo_jobs()
+
+    scheduler.scheduler.add_job.assert_called_once()
+    kwargs = scheduler.scheduler.add_job.call_args.kwargs
+    assert kwargs['id'] == 'repo_update:/tmp/repo1'
+    assert kwargs['args'] == ['/tmp/repo1']
+    assert list(scheduler.get_schedule()) == ['/tmp/repo1']
+
+@patch.object(JobScheduler, '_fetch_repo')
+def test_update_repo_adapts_interval(mock_fetch, scheduler):
+    scheduler.on_repo_update_callback = MagicMock()
+    info = scheduler.project_infos[0]
+
+    # Changed: interval shortens and only this project is refreshed
+    mock_fetch.return_value = True
+    scheduler.update_repo('/tmp/repo1')
+    assert scheduler.get_schedule()['/tmp/repo1']['interval'] == 1800
+    scheduler.on_repo_update_callback.assert_called_once_with(info)
+    scheduler.on_update_callback.assert_not_called()
+
+    # Unchanged: interval grows again and nothing is reparsed
+    mock_fetch.return_value = False
+    scheduler.update_repo('/tmp/repo1')
+    assert scheduler.get_schedule()['/tmp/repo1']['interval'] == 2700
+    assert scheduler.on_repo_update_callback.call_count == 1
+
+    # Every run reschedules the repo's own job
+    assert scheduler.scheduler.add_job.call_count == 2
+
+@patch.object(JobScheduler, '_fetch_repo')
+def test_update_repo_backs_off_on_failure(mock_fetch, scheduler):
+    mock_fetch.side_effect = subprocess.CalledProcessError(128, ['git', 'fetch'])
+    scheduler.update_repo('/tmp/repo1')
+    scheduler.update_repo('/tmp/repo1')
+    state = scheduler.get_schedule()['/tmp/repo1']
+    assert state['failures'] == 2
+    assert state['interval'] == 3600 * 4
+
+    # Recovery resets to the base interval before adapting
+    mock_fetch.side_effect = None
+    mock_fetch.return_value = False
+    scheduler.update_repo('/tmp/repo1')
+    state = scheduler.get_schedule()['/tmp/repo1']
+    assert state['failures'] == 0
+    assert state['interval'] == 3600 * 1.5
+
+def test_force_run_bursts_collapse():
+    scheduler = JobScheduler({}, [])
+    running = []
+    concurrent = []
+
+    def sync():
+        running.append(1)
+        concurrent.append(len(running))
+        time.sleep(0.3)
+        running.pop()
+
+    scheduler._update_repos_and_docs = MagicMock(side_effect=sync)
+    scheduler.scheduler.start()
+    try:
+        scheduler.force_run()
+        time.sleep(0.1)
+        # Triggers during a run queue a single follow-up run
+        for _ in range(10):
+            scheduler.force_run()
+        time.sleep(1)
+    finally:
+        scheduler.shutdown()
+    assert max(concurrent) == 1
+    assert scheduler._update_repos_and_docs.call_count == 2
+    assert not scheduler.sync_running
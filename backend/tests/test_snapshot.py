@@ -0,0 +1,51 @@
+import json
+import os
+import pytest
+from snapshot import GraphSnapshot, write_snapshot
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / 'graph.snapshot')
+
+def test_missing_snapshot(snapshot_path):
+    snapshot = GraphSnapshot(snapshot_path)
+    assert not snapshot.is_ready()
+    assert snapshot.graph_bytes() is None
+    assert snapshot.get_repos() == []
+    assert snapshot.get_jobs() == {}
+
+def test_roundtrip(snapshot_path):
+    graph = {'nodes': [{'id': 'job1', 'data': {'label': 'job1', 'details': {'name': 'job1'}}}], 'edges': []}
+    graph_bytes = json.dumps(graph).encode('utf-8')
+    write_snapshot(snapshot_path, graph_bytes, {'repos': [{'url': 'git://foo'}]})
+
+    snapshot = GraphSnapshot(snapshot_path)
+    assert snapshot.graph_bytes() == graph_bytes
+    assert snapshot.get_repos() == [{'url': 'git://foo'}]
+    assert snapshot.get_jobs() == {'job1': {'name': 'job1'}}
+
+def test_reader_picks_up_replaced_snapshot(snapshot_path):
+    write_snapshot(snapshot_path, b'{"nodes": [], "edges": []}')
+    snapshot = GraphSnapshot(snapshot_path)
+    assert snapshot.get_jobs() == {}
+
+    graph = {'nodes': [{'id': 'job2', 'data': {'details': {'name': 'job2'}}}], 'edges': []}
+    write_snapshot(snapshot_path, json.dumps(graph).encode('utf-8'))
+
+    assert json.loads(snapshot.graph_bytes()) == graph
+    assert list(snapshot.get_jobs()) == ['job2']
+    # No temp files are left behind by the atomic rename
+    assert os.listdir(os.path.dirname(snapshot_path)) == ['graph.snapshot']
+
+def test_resolved_job(snapshot_path):
+    graph = {'nodes': [
+        {'id': 'base', 'data': {'details': {'name': 'base', 'timeout': 60, 'inherited_vars': {}}}},
+        {'id': 'unit', 'data': {'details': {'name': 'unit', 'parent': 'base', 'inherited_vars': {}}}},
+    ], 'edges': []}
+    write_snapshot(snapshot_path, json.dumps(graph).encode('utf-8'))
+
+    snapshot = GraphSnapshot(snapshot_path)
+    resolved = snapshot.get_resolved_job('unit')
+    assert resolved['job'] == {'name': 'unit', 'parent': 'base', 'timeout': 60}
+    assert snapshot.get_resolved_job('unit') is resolved
+    assert snapshot.get_resolved_job('missing') is None
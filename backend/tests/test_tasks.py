@@ -0,0 +1,41 @@
+import threading
+from tasks import TaskManager
+
+def test_task_completes_with_progress():
+    manager = TaskManager()
+    def work(report, value):
+        report('working', 50, 'halfway')
+        return value * 2
+
+    task, created = manager.submit('key', work, 21)
+    assert created
+    task = manager.wait(task['id'], timeout=5)
+    assert task['status'] == 'completed'
+    assert task['result'] == 42
+    assert task['progress'] == 100
+
+def test_task_failure_is_reported():
+    manager = TaskManager()
+    def work(report):
+        raise ValueError('boom')
+
+    task, _ = manager.submit('key', work)
+    task = manager.wait(task['id'], timeout=5)
+    assert task['status'] == 'failed'
+    assert task['error'] == 'boom'
+
+def test_same_key_is_deduplicated_while_running():
+    manager = TaskManager()
+    release = threading.Event()
+
+    first, created_first = manager.submit('key', lambda report: release.wait(5))
+    second, created_second = manager.submit('key', lambda report: None)
+    assert created_first and not created_second
+    assert first['id'] == second['id']
+
+    release.set()
+    manager.wait(first['id'], timeout=5)
+    # Once finished, the same key can run again
+    third, created_third = manager.submit('key', lambda report: None)
+    assert created_third
+    assert third['id'] != first['id']
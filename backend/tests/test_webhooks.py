@@ -0,0 +1,117 @@
+import hashlib
+import hmac
+import json
+import os
+import subprocess
+import time
+from datetime import datetime
+import pytest
+from unittest.mock import MagicMock, patch
+from benchmarks.corpus import SyntheticCorpus
+from parser import ZuulParser
+from scheduler import JobScheduler
+import webhooks
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'webhooks')
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)
+
+PROJECT_INFOS = [
+    {'path': '/repos/zuul-jobs', 'url': 'https://github.com/example-org/zuul-jobs', 'commit': 'a'},
+    {'path': '/repos/ci-config', 'url': 'ssh://git@gitlab.example.com/infra/ci-config.git', 'commit': 'b'},
+    {'path': '/repos/project-config', 'url': 'https://opendev.org/openstack/project-config', 'commit': 'c'},
+]
+
+@pytest.mark.parametrize('fixture, expected_path', [
+    ('github_push.json', '/repos/zuul-jobs'),
+    ('gitlab_push.json', '/repos/ci-config'),
+    ('gerrit_ref_updated.json', '/repos/project-config'),
+])
+def test_recorded_payloads_match_project(fixture, expected_path):
+    urls, names = webhooks.extract_repositories(load_fixture(fixture))
+    matched = webhooks.match_projects(PROJECT_INFOS, urls, names)
+    assert [info['path'] for info in matched] == [expected_path]
+
+def test_repo_key_ignores_url_spelling():
+    key = webhooks.repo_key('https://github.com/example-org/zuul-jobs')
+    assert webhooks.repo_key('git@github.com:example-org/zuul-jobs.git') == key
+    assert webhooks.repo_key('ssh://git@GitHub.com:22/example-org/zuul-jobs/') == key
+
+def test_verify_signature():
+    body = b'{"ref": "refs/heads/master"}'
+    signature = 'sha256=' + hmac.new(b's3cret', body, hashlib.sha256).hexdigest()
+    assert webhooks.verify_signature(None, {}, body)
+    assert webhooks.verify_signature('s3cret', {'X-Hub-Signature-256': signature}, body)
+    assert not webhooks.verify_signature('s3cret', {'X-Hub-Signature-256': 'sha256=bad'}, body)
+    assert webhooks.verify_signature('s3cret', {'X-Gitlab-Token': 's3cret'}, body)
+    assert webhooks.verify_signature('s3cret', {}, body, query_token='s3cret')
+    assert not webhooks.verify_signature('s3cret', {}, body)
+
+def test_trigger_repo_debounces_bursts():
+    scheduler = JobScheduler({}, [])
+    scheduler.update_repo = MagicMock()
+    scheduler.scheduler.start()
+    try:
+        for _ in range(5):
+            scheduler.trigger_repo('/repos/zuul-jobs', delay=0.3)
+        time.sleep(1)
+    finally:
+        scheduler.shutdown()
+    scheduler.update_repo.assert_called_once_with('/repos/zuul-jobs', triggered_by='hook')
+
+@patch('repo_cache.load_config')
+def test_hook_update_reparses_only_pushed_repo(mock_load_config, tmp_path):
+    corpus = SyntheticCorpus(tmp_path / 'corpus', projects=2, jobs=2, depth=1, fanout=0, vars_per_job=0, files=1)
+    corpus.generate()
+    infos = []
+    for i, source in enumerate(corpus.sources):
+        path = str(tmp_path / f'clone{i}')
+        subprocess.check_call(['git', 'clone', '-q', source, path])
+        commit = subprocess.check_output(['git', '-C', path, 'rev-parse', 'HEAD']).decode().strip()
+        infos.append({'path': path, 'url': source, 'commit': commit})
+    mock_load_config.return_value = {'sources': corpus.sources}
+
+    zuul_parser = ZuulParser(infos)
+    zuul_parser.parse()
+    untouched_job = zuul_parser.jobs['project1-job0']
+    scheduler = JobScheduler({'doc_update_interval': 3600}, infos,
+                             on_repo_update_callback=zuul_parser.parse_project)
+    scheduler.scheduler = MagicMock()
+
+    corpus.touch(0)
+    matched = webhooks.match_projects(infos, [corpus.sources[0]], [])
+    assert matched == [infos[0]]
+    scheduler.update_repo(matched[0]['path'], triggered_by='hook')
+
+    assert '(revision 1.' in zuul_parser.jobs['project0-job0']['description']
+    assert zuul_parser.jobs['project1-job0'] is untouched_job
+    # A webhook-driven change does not shorten the polling interval
+    assert scheduler.get_schedule()[infos[0]['path']]['interval'] == 3600
+
+def test_hook_during_fetch_is_not_overwritten():
+    info = {'path': '/repos/zuul-jobs', 'url': 'https://github.com/example-org/zuul-jobs', 'commit': 'a'}
+    scheduler = JobScheduler({'doc_update_interval': 3600}, [info])
+    scheduler.scheduler.start(paused=True)
+    try:
+        # A push lands while the scheduled fetch is running
+        def fetch(_info):
+            scheduler.trigger_repo(info['path'], delay=5)
+            return False
+        with patch.object(scheduler, '_fetch_repo', side_effect=fetch):
+            scheduler.update_repo(info['path'])
+
+        job = scheduler.scheduler.get_job(scheduler._job_id(info['path']))
+        assert job.kwargs == {'triggered_by': 'hook'}
+        assert scheduler.get_schedule()[info['path']]['next_run'] == job.next_run_time.isoformat()
+
+        # Without a pending hook the regular interval applies
+        job.remove()
+        with patch.object(scheduler, '_fetch_repo', return_value=False):
+            scheduler.update_repo(info['path'])
+        job = scheduler.scheduler.get_job(scheduler._job_id(info['path']))
+        assert job.kwargs == {}
+        assert (job.next_run_time - datetime.now(job.next_run_time.tzinfo)).total_seconds() > 3600
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,96 @@
+import hashlib
+import hmac
+import re
+from git_utils import normalize_source
+
+SCP_LIKE_RE = re.compile(r'^(?:[^@/]+@)?([^:/]+):(?!//)(.+)$')
+
+def repo_key(url):
+    """
+    Matching key for a repository URL: host + path, without scheme, user,
+    port or .git suffix, so https, ssh and scp-like (git@host:org/repo) URLs
+    of the same repository compare equal.
+    """
+    normalized = normalize_source(url)
+    if '://' in normalized:
+        normalized = normalized.split('://', 1)[1]
+        host, _, path = normalized.partition('/')
+        host = host.rsplit('@', 1)[-1].split(':', 1)[0]
+    else:
+        match = SCP_LIKE_RE.match(normalized)
+        if not match:
+            return normalized
+        host, path = match.groups()
+    return f"{host.lower()}/{path.strip('/')}"
+
+def extract_repositories(payload):
+    """
+    Returns (urls, project_names) referenced by a push payload.
+
+    Understands GitHub and GitLab push events (repository/project URLs) and
+    Gerrit stream events such as ref-updated and change-merged, which only
+    carry a project name.
+    """
+    urls = []
+    names = []
+    if not isinstance(payload, dict):
+        return urls, names
+
+    # GitHub: repository.{clone_url,html_url,ssh_url,git_url}
+    # GitLab: project.{git_http_url,git_ssh_url,web_url}, repository.{url,homepage,...}
+    for section in ('repository', 'project'):
+        value = payload.get(section)
+        if isinstance(value, dict):
+            for field in ('clone_url', 'html_url', 'ssh_url', 'git_url', 'url',
+                          'git_http_url', 'git_ssh_url', 'web_url', 'http_url', 'homepage'):
+                url = value.get(field)
+                if isinstance(url, str) and url:
+                    urls.append(url)
+            if section == 'project' and isinstance(value.get('name'), str) and not urls:
+                names.append(value['name'])
+        elif isinstance(value, str) and section == 'project':
+            # Gerrit events may carry the project as a plain name
+            names.append(value)
+
+    # Gerrit: refUpdate.project / change.project
+    for section in ('refUpdate', 'change'):
+        value = payload.get(section)
+        if isinstance(value, dict) and isinstance(value.get('project'), str):
+            names.append(value['project'])
+
+    return urls, names
+
+def match_projects(project_infos, urls, names):
+    """Returns the project_infos entries referenced by the given URLs or project names."""
+    wanted_keys = {repo_key(url) for url in urls}
+    wanted_names = {name.strip('/') for name in names}
+    matched = []
+    for info in project_infos:
+        key = repo_key(info.get('url', ''))
+        if key in wanted_keys or any(key.endswith('/' + name) for name in wanted_names):
+            matched.append(info)
+    return matched
+
+# Headers verify_signature and event parsing read; workers pass them on to the leader
+FORWARDED_HEADERS = (
+    'X-Hub-Signature-256', 'X-Gitlab-Token', 'X-Webhook-Token',
+    'X-GitHub-Event', 'X-Gitlab-Event',
+)
+
+
+def verify_signature(secret, headers, body, query_token=None):
+    """
+    Checks a webhook request against the shared secret. Accepts GitHub's
+    X-Hub-Signature-256 HMAC, GitLab's X-Gitlab-Token, or a plain token in
+    X-Webhook-Token or the token query parameter (for Gerrit hooks).
+    """
+    if not secret:
+        return True
+
+    signature = headers.get('X-Hub-Signature-256')
+    if signature:
+        expected = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature, expected)
+
+    token = headers.get('X-Gitlab-Token') or headers.get('X-Webhook-Token') or query_token
+    return bool(token) and hmac.compare_digest(token, secret)
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useMemo } from 'react';
 import ReactFlow, {
   Controls,
   Background,
@@ -7,16 +7,13 @@ import ReactFlow, {
 } from 'reactflow';
 import 'reactflow/dist/style.css';
 import axios from 'axios';
-import dagre from 'dagre';
+import { NODE_STYLES, buildEdgeMaps, findDescendants } from './graphLayout';
+import useLayoutWorker from './useLayoutWorker';
 import { Send, MessageSquare, Info, Copy, X, Settings, Grid, Layout, Palette, RotateCcw, ChevronDown, ChevronRight, List, Share2, ArrowRight, ArrowDown } from 'lucide-react';
 
 const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:5001/api';
 
-const NODE_STYLES = {
-  small: { width: 180, fontSize: '12px', spacingX: 250, spacingY: 100 },
-  medium: { width: 250, fontSize: '14px', spacingX: 350, spacingY: 150 },
-  big: { width: 350, fontSize: '16px', spacingX: 450, spacingY: 200 },
-};
+const SEARCH_DEBOUNCE_MS = 200;
 
 export default function App() {
   const [nodes, setNodes, onNodesChange] = useNodesState([]);
@@ -39,6 +36,8 @@ export default function App() {
   const [chatHistory, setChatHistory] = useState([]);
   const [loading, setLoading] = useState(true);
   const [searchQuery, setSearchQuery] = useState('');
+  // Layout follows the search only once typing pauses
+  const [debouncedSearch, setDebouncedSearch] = useState('');
   const [reactFlowInstance, setReactFlowInstance] = useState(null);
   const [isChatOpen, setIsChatOpen] = useState(false);
   const [showBackground, setShowBackground] = useState(true);
@@ -46,6 +45,7 @@ export default function App() {
   const [isRepoModalOpen, setIsRepoModalOpen] = useState(false);
   const [repoUrl, setRepoUrl] = useState('');
   const [repoLoading, setRepoLoading] = useState(false);
+  const [repoProgress, setRepoProgress] = useState(null);
   const [repoHistory, setRepoHistory] = useState(() => {
     // History is now client-side
     const saved = localStorage.getItem('zuul-repo-history');
@@ -94,31 +94,25 @@ export default function App() {
 
       const { nodes: apiNodes, edges: apiEdges } = res.data;
 
-      // Simple layouting
-      // Note: We use a default sidebar width here as it might not be fully initialized or we want a default view
-      const defaultSidebarWidth = 384;
-      const availableWidth = window.innerWidth - defaultSidebarWidth - 100;
-      const spacingX = 250;
-      const columns = Math.max(1, Math.floor(availableWidth / spacingX));
-
-      const layoutedNodes = apiNodes.map((node, index) => ({
-        ...node,
-        position: { x: 100 + (index % columns) * 250, y: 100 + Math.floor(index / columns) * 150 }
-      }));
-
-      // Set original data
-      setOriginalNodes(layoutedNodes);
+      // Set original data; positions are computed by the layout worker
+      setOriginalNodes(apiNodes);
       setOriginalEdges(apiEdges);
-
-      // Initialize view
-      setNodes(layoutedNodes);
-      setEdges(apiEdges);
       setLoading(false);
     } catch (error) {
       console.error("Error fetching graph", error);
       setLoading(false);
     }
-  }, [setNodes, setEdges]);
+  }, []);
+
+  // Lookups built once per graph, instead of scanning nodes/edges per render
+  const nodeById = useMemo(() => new Map(originalNodes.map(node => [node.id, node])), [originalNodes]);
+  const nodeIds = useMemo(() => originalNodes.map(node => node.id), [originalNodes]);
+  const edgeMaps = useMemo(() => buildEdgeMaps(originalEdges), [originalEdges]);
+
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(searchQuery), SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
 
   useEffect(() => {
     fetchGraph();
@@ -135,48 +129,8 @@ export default function App() {
     }
   };
 
-  const getLayoutedElements = useCallback((nodes, edges, direction = 'LR') => {
-    const dagreGraph = new dagre.graphlib.Graph();
-    dagreGraph.setDefaultEdgeLabel(() => ({}));
-
-    // Check node dimensions based on current size setting
-    const { width } = NODE_STYLES[nodeSize];
-    const height = 50; // Approximated height
-
-    dagreGraph.setGraph({ rankdir: direction, nodesep: 50, ranksep: 50 });
-
-    nodes.forEach((node) => {
-      dagreGraph.setNode(node.id, { width, height });
-    });
-
-    edges.forEach((edge) => {
-      dagreGraph.setEdge(edge.source, edge.target);
-    });
-
-    dagre.layout(dagreGraph);
-
-    const layoutedNodes = nodes.map((node) => {
-      const nodeWithPosition = dagreGraph.node(node.id);
-
-      // We are shifting the dagre node position (anchor=center center) to the top left
-      // so it matches the React Flow node anchor point (top left).
-      return {
-        ...node,
-        targetPosition: direction === 'LR' ? 'left' : 'top',
-        sourcePosition: direction === 'LR' ? 'right' : 'bottom',
-        position: {
-          x: nodeWithPosition.x - width / 2,
-          y: nodeWithPosition.y - height / 2,
-        },
-        style: { ...node.style, width, fontSize: NODE_STYLES[nodeSize].fontSize },
-      };
-    });
-
-    return { nodes: layoutedNodes, edges };
-  }, [nodeSize]);
-
   const handleJobClick = (jobName) => {
-    const jobNode = originalNodes.find(n => n.data.details.name === jobName);
+    const jobNode = nodeById.get(jobName);
     if (jobNode) {
       setSelectedJob(jobNode.data.details);
     } else {
@@ -192,6 +146,13 @@ export default function App() {
     setShowDescendantList(false);
   }, []);
 
+  // Keeps the selected job's repository from being evicted as least recently viewed
+  useEffect(() => {
+    if (!selectedJob?.name) return;
+    axios.post(`${API_BASE}/repos/view`, { job: selectedJob.name })
+      .catch(() => {}); // Best effort: unknown jobs and older backends are fine
+  }, [selectedJob]);
+
   const toggleDescendantHighlight = () => {
     if (!selectedJob) return;
 
@@ -203,26 +164,7 @@ export default function App() {
     }
 
     // Find all descendants
-    const descendants = new Set();
-    const queue = [selectedJob.name];
-
-    // Create a map for faster lookup if needed, but iterating edges is okay for now
-    // We need to look at edges where source is the current node
-
-    const findChildren = (parentName) => {
-      const children = originalEdges
-        .filter(e => e.source === parentName)
-        .map(e => e.target);
-
-      children.forEach(child => {
-        if (!descendants.has(child)) {
-          descendants.add(child);
-          findChildren(child); // Recurse
-        }
-      });
-    };
-
-    findChildren(selectedJob.name);
+    const descendants = findDescendants(edgeMaps.childrenBySource, selectedJob.name);
     setHighlightedDescendants(descendants);
     setShowDescendantList(true);
     setSearchQuery(''); // Update: Clear search when entering descendant mode
@@ -290,8 +232,21 @@ export default function App() {
     if (!urlToLoad.trim()) return;
 
     setRepoLoading(true);
+    setRepoProgress(null);
     try {
-      await axios.post(`${API_BASE}/load-repo`, { url: urlToLoad });
+      // Loading runs as a background job on the server; poll until it finishes
+      const startRes = await axios.post(`${API_BASE}/load-repo`, { url: urlToLoad });
+      const jobId = startRes.data.job_id;
+      let status = null;
+      while (!status || (status.status !== 'completed' && status.status !== 'failed')) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const statusRes = await axios.get(`${API_BASE}/jobs-status/${jobId}`);
+        status = statusRes.data;
+        setRepoProgress(status.progress);
+      }
+      if (status.status === 'failed') {
+        throw new Error(status.error);
+      }
       await fetchGraph(); // Refresh graph data
       setIsRepoModalOpen(false);
       setRepoUrl('');
@@ -302,6 +257,7 @@ export default function App() {
       alert('Failed to load repository: ' + (err.response?.data?.error || err.message));
     } finally {
       setRepoLoading(false);
+      setRepoProgress(null);
     }
   };
 
@@ -343,110 +299,53 @@ export default function App() {
     }
   };
 
-  // Handle Filtering, Layout, and Styling
+  // Filtering and layout run in a Web Worker; the selection only changes the
+  // layout when it is part of the filter (search results, descendant view)
+  const filtering = Boolean(debouncedSearch) || highlightedDescendants.size > 0;
+  const layoutSelectedName = filtering ? selectedJob?.name ?? null : null;
+  const layoutSelectedParent = filtering ? selectedJob?.parent ?? null : null;
+  const availableWidth = windowSize.width - sidebarWidth - 100;
+  const layoutOptions = useMemo(() => ({
+    searchQuery: debouncedSearch,
+    selectedName: layoutSelectedName,
+    selectedParent: layoutSelectedParent,
+    descendants: Array.from(highlightedDescendants),
+    layoutMode,
+    layoutDirection,
+    nodeSize,
+    // Grid columns only depend on the width when the grid layout is used
+    availableWidth: layoutMode === 'grid' ? availableWidth : 0,
+  }), [debouncedSearch, layoutSelectedName, layoutSelectedParent, highlightedDescendants, layoutMode, layoutDirection, nodeSize, availableWidth]);
+  const layout = useLayoutWorker(nodeIds, originalEdges, layoutOptions);
+
+  // Apply Styling to the laid out nodes
   useEffect(() => {
-    if (originalNodes.length === 0) return;
-
-    let newNodes = [];
-    let newEdges = [];
-
-    const { width, fontSize, spacingX, spacingY } = NODE_STYLES[nodeSize];
-
-    if (!searchQuery && highlightedDescendants.size === 0) {
-      if (layoutMode === 'tree') {
-        // Tree layout for all nodes
-        // Need to ensure nodes have dimensions for dagre
-        const nodesForDagre = originalNodes.map(node => ({
-          ...node,
-          style: { ...node.style, width, fontSize }
-        }));
-        // FIX: Pass originalEdges instead of newEdges (which was empty)
-        const layouted = getLayoutedElements(nodesForDagre, originalEdges, layoutDirection);
-        newNodes = layouted.nodes;
-        newEdges = layouted.edges;
-      } else {
-        // Grid layout
-        const availableWidth = windowSize.width - sidebarWidth - 100;
-        const columns = Math.max(1, Math.floor(availableWidth / spacingX));
-
-        newNodes = originalNodes.map((node, index) => ({
-          ...node,
-          style: { ...node.style, width, fontSize },
-          sourcePosition: undefined,
-          targetPosition: undefined,
-          position: {
-            x: 100 + (index % columns) * spacingX,
-            y: 100 + Math.floor(index / columns) * spacingY
-          }
-        }));
-        newEdges = originalEdges;
-      }
-    } else {
-      // Filter (Search OR Descendants view)
-      const filteredRaw = originalNodes.filter(node => {
-        if (highlightedDescendants.size > 0 && selectedJob) {
-          // Descendant View Mode: Show Parent + Descendants
-          const isSelected = node.id === selectedJob.name;
-          const isDescendant = highlightedDescendants.has(node.id);
-          return isSelected || isDescendant;
-        } else {
-          // Search Mode
-          const matchesSearch = node.id.toLowerCase().includes(searchQuery.toLowerCase());
-          const isSelected = selectedJob && node.id === selectedJob.name;
-          const isParentOfSelected = selectedJob && selectedJob.parent && node.id === selectedJob.parent;
-          return matchesSearch || isSelected || isParentOfSelected;
-        }
-      });
-
-      // Filter Edges First
-      const filteredEdges = originalEdges.filter(edge => {
-        const sourceExists = filteredRaw.some(n => n.id === edge.source);
-        const targetExists = filteredRaw.some(n => n.id === edge.target);
-        return sourceExists && targetExists;
-      });
-
-      if (layoutMode === 'tree') {
-        // Prepare nodes for dagre
-        const nodesForDagre = filteredRaw.map(node => ({
-          ...node,
-          style: { ...node.style, width, fontSize }
-        }));
-        const layouted = getLayoutedElements(nodesForDagre, filteredEdges, layoutDirection);
-        newNodes = layouted.nodes;
-        newEdges = layouted.edges;
-      } else {
-        // Grid Layout
-        // Compact Layout for filtered results
-        const availableWidth = windowSize.width - sidebarWidth - 100;
-        const columns = Math.max(1, Math.floor(availableWidth / spacingX));
-
-        newNodes = filteredRaw.map((node, index) => ({
-          ...node,
-          style: { ...node.style, width, fontSize },
-          sourcePosition: undefined,
-          targetPosition: undefined,
-          position: {
-            x: 100 + (index % columns) * spacingX,
-            y: 100 + Math.floor(index / columns) * spacingY
-          }
-        }));
-        newEdges = filteredEdges;
-      }
+    if (originalNodes.length === 0) {
+      setNodes([]);
+      setEdges([]);
+      return;
     }
+    if (!layout) return;
 
-    // Apply Leaf Styling (Global) - using colorConfig
-    const parentIds = new Set(originalEdges.map(e => e.source));
-    newNodes = newNodes.map(node => {
-      // Default Style for all nodes first
-      let style = {
-        ...node.style,
-        backgroundColor: colorConfig.job.bg,
-        color: colorConfig.job.text,
-        borderColor: colorConfig.job.border,
-      };
+    const { width, fontSize } = NODE_STYLES[nodeSize];
+    const sourcePosition = layout.direction ? (layout.direction === 'LR' ? 'right' : 'bottom') : undefined;
+    const targetPosition = layout.direction ? (layout.direction === 'LR' ? 'left' : 'top') : undefined;
+
+    const newNodes = [];
+    layout.ids.forEach((id, i) => {
+      const node = nodeById.get(id);
+      if (!node) return; // Layout of a previous graph, a new one is on its way
 
-      const isLeaf = !parentIds.has(node.id);
-      if (isLeaf) {
+      // Default Style for all nodes first; jobs without children are final (leaf) jobs
+      let style = { width, fontSize };
+      if (edgeMaps.childrenBySource.has(id)) {
+        style = {
+          ...style,
+          backgroundColor: colorConfig.job.bg,
+          color: colorConfig.job.text,
+          borderColor: colorConfig.job.border,
+        };
+      } else {
         style = {
           ...style,
           backgroundColor: colorConfig.final.bg,
@@ -456,87 +355,85 @@ export default function App() {
           borderStyle: 'solid'
         };
       }
-      return { ...node, style };
-    });
 
-    // Apply Highlighting
-    if (selectedJob) {
-      newNodes = newNodes.map(node => {
-        const isSelected = node.id === selectedJob.name;
-        const isParentOfSelected = selectedJob && selectedJob.parent && node.id === selectedJob.parent;
-        const isDescendant = highlightedDescendants.has(node.id);
-
-        if (isSelected) {
-          return {
-            ...node,
-            style: {
-              ...node.style,
-              backgroundColor: colorConfig.selected.bg,
-              color: colorConfig.selected.text,
-              borderColor: colorConfig.selected.border,
-              borderWidth: '2px',
-              borderStyle: 'solid',
-              boxShadow: `0 0 10px ${colorConfig.selected.border}80`, // Add opacity to shadow
-            }
+      // Apply Highlighting
+      if (selectedJob) {
+        if (id === selectedJob.name) {
+          style = {
+            ...style,
+            backgroundColor: colorConfig.selected.bg,
+            color: colorConfig.selected.text,
+            borderColor: colorConfig.selected.border,
+            borderWidth: '2px',
+            borderStyle: 'solid',
+            boxShadow: `0 0 10px ${colorConfig.selected.border}80`, // Add opacity to shadow
           };
-        } else if (isParentOfSelected) {
-          return {
-            ...node,
-            style: {
-              ...node.style,
-              backgroundColor: colorConfig.parent.bg,
-              color: colorConfig.parent.text,
-              borderColor: colorConfig.parent.border,
-              borderWidth: '2px',
-              borderStyle: 'solid',
-              boxShadow: `0 0 10px ${colorConfig.parent.border}80`,
-            }
+        } else if (selectedJob.parent && id === selectedJob.parent) {
+          style = {
+            ...style,
+            backgroundColor: colorConfig.parent.bg,
+            color: colorConfig.parent.text,
+            borderColor: colorConfig.parent.border,
+            borderWidth: '2px',
+            borderStyle: 'solid',
+            boxShadow: `0 0 10px ${colorConfig.parent.border}80`,
           };
-        } else if (isDescendant) {
-          return {
-            ...node,
-            style: {
-              ...node.style,
-              backgroundColor: colorConfig.descendant.bg,
-              color: colorConfig.descendant.text,
-              borderColor: colorConfig.descendant.border,
-              borderWidth: '2px',
-              borderStyle: 'solid',
-              boxShadow: `0 0 10px ${colorConfig.descendant.border}60`,
-            }
+        } else if (highlightedDescendants.has(id)) {
+          style = {
+            ...style,
+            backgroundColor: colorConfig.descendant.bg,
+            color: colorConfig.descendant.text,
+            borderColor: colorConfig.descendant.border,
+            borderWidth: '2px',
+            borderStyle: 'solid',
+            boxShadow: `0 0 10px ${colorConfig.descendant.border}60`,
           };
         }
-        return node;
+      }
+
+      newNodes.push({
+        ...node,
+        position: { x: layout.positions[i * 2], y: layout.positions[i * 2 + 1] },
+        sourcePosition,
+        targetPosition,
+        style,
       });
+    });
 
-      // Highlight Edge connecting Parent -> Job (keep using selected border color for edge)
-      newEdges = newEdges.map(edge => {
+    const newEdges = [];
+    layout.edgeIndexes.forEach((index) => {
+      const edge = originalEdges[index];
+      if (!edge) return;
+      if (selectedJob) {
+        // Highlight Edge connecting Parent -> Job (keep using selected border color for edge)
         const isParentEdge = selectedJob.parent && edge.source === selectedJob.parent && edge.target === selectedJob.name;
         // Also highlight edges between highlighted descendants if both source and target are in the set
         // OR if source is selectedJob and target is a descendant
         const isDescendantEdge = (highlightedDescendants.has(edge.source) || edge.source === selectedJob.name) && highlightedDescendants.has(edge.target);
 
         if (isParentEdge) {
-          return {
+          newEdges.push({
             ...edge,
             style: { ...edge.style, stroke: colorConfig.selected.border, strokeWidth: 3 },
             animated: true
-          };
+          });
+          return;
         } else if (isDescendantEdge) {
-          return {
+          newEdges.push({
             ...edge,
             style: { ...edge.style, stroke: colorConfig.descendant.border, strokeWidth: 2 },
             animated: true
-          };
+          });
+          return;
         }
-        return edge;
-      });
-    }
+      }
+      newEdges.push(edge);
+    });
 
     setNodes(newNodes);
     setEdges(newEdges);
 
-  }, [searchQuery, originalNodes, originalEdges, windowSize, selectedJob, sidebarWidth, nodeSize, setNodes, setEdges, colorConfig, highlightedDescendants, layoutMode, getLayoutedElements, layoutDirection]);
+  }, [layout, originalNodes, originalEdges, nodeById, edgeMaps, selectedJob, nodeSize, setNodes, setEdges, colorConfig, highlightedDescendants]);
 
   // Auto-Zoom to selected node
   useEffect(() => {
@@ -655,6 +552,7 @@ export default function App() {
             onEdgesChange={onEdgesChange}
             onNodeClick={onNodeClick}
             onInit={setReactFlowInstance}
+            onlyRenderVisibleElements
             fitView
           >
             {showBackground && <Background />}
@@ -815,7 +713,7 @@ export default function App() {
                   <div className="mt-1 font-mono text-sm bg-gray-100 p-2 rounded-sm">
                     {selectedJob.parent ? (
                       (() => {
-                        const isParentInGraph = originalNodes.some(n => n.data.details.name === selectedJob.parent);
+                        const isParentInGraph = nodeById.has(selectedJob.parent);
                         return (
                           <button
                             onClick={() => handleJobClick(selectedJob.parent)}
@@ -1257,7 +1155,7 @@ export default function App() {
                   disabled={repoLoading || !repoUrl.trim()}
                   className="px-4 py-2 bg-indigo-600 text-white rounded-sm hover:bg-indigo-700 disabled:opacity-50 disabled:cursor-not-allowed flex items-center gap-2"
                 >
-                  {repoLoading ? 'Loading...' : 'Load'}
+                  {repoLoading ? (repoProgress !== null ? `Loading... ${repoProgress}%` : 'Loading...') : 'Load'}
                 </button>
               </div>
             </form>
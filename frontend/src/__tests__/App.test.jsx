@@ -1,5 +1,5 @@
 
-import { render, screen, waitFor } from '@testing-library/react';
+import { fireEvent, render, screen, waitFor } from '@testing-library/react';
 import App from '../App';
 import { vi } from 'vitest';
 import axios from 'axios';
@@ -40,4 +40,25 @@ describe('App', () => {
             expect(axios.get).toHaveBeenCalledWith(expect.stringContaining('/api/graph'));
         });
     });
+
+    test('lays out and filters the graph without a Web Worker', async () => {
+        // jsdom has no Worker: useLayoutWorker computes the layout in place
+        expect(typeof Worker).toBe('undefined');
+        axios.get.mockImplementation((url) => Promise.resolve({
+            data: url.includes('/graph') ? {
+                nodes: [
+                    { id: 'base', data: { label: 'base', details: { name: 'base' } } },
+                    { id: 'tox-py3', data: { label: 'tox-py3', details: { name: 'tox-py3', parent: 'base' } } },
+                ],
+                edges: [{ id: 'base-tox-py3', source: 'base', target: 'tox-py3' }],
+            } : {},
+        }));
+
+        render(<App />);
+        expect(await screen.findByText('Jobs (2)')).toBeInTheDocument();
+        expect(screen.getByText('Parent: base')).toBeInTheDocument();
+
+        fireEvent.change(screen.getByPlaceholderText(/Search/i), { target: { value: 'py3' } });
+        expect(await screen.findByText('Jobs (1)')).toBeInTheDocument();
+    });
 });
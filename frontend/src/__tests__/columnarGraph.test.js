@@ -0,0 +1,43 @@
+import { readFileSync } from 'node:fs';
+import { decodeColumnarGraph } from '../columnarGraph';
+
+// Written by the Python encoder (python -m tests.test_graph_format in backend/),
+// which also checks that it is current
+const loadFixture = () => {
+    const data = readFileSync(new URL('./fixtures/graph.bin', import.meta.url));
+    return data.buffer.slice(data.byteOffset, data.byteOffset + data.byteLength);
+};
+
+describe('decodeColumnarGraph', () => {
+    test('decodes the graph written by the Python encoder', () => {
+        const graph = decodeColumnarGraph(loadFixture());
+        expect(graph.jobCount).toBe(3);
+        expect([0, 1, 2].map(graph.name)).toEqual(['base', 'child-ü', 'orphan']);
+
+        expect(graph.parent(0)).toBeNull();
+        expect(graph.parent(1)).toBe('base');
+        // Parents of indexed jobs point straight at the job
+        expect(graph.parents[1]).toBe(0);
+        expect(graph.parent(2)).toBe('unknown-parent');
+
+        expect(graph.dependencies(0)).toEqual([]);
+        expect(graph.dependencies(1)).toEqual(['base', 'missing']);
+        expect(graph.softDependencies(1)).toEqual([false, true]);
+
+        expect(graph.source(1)).toBe('https://example.com/a');
+        expect(graph.source(2)).toBeNull();
+        expect(graph.vars(0)).toEqual({ nested: { list: [1, 2] }, flag: true });
+        expect(graph.vars(1)).toEqual({});
+    });
+
+    test('rejects other data', () => {
+        const json = new TextEncoder().encode(`{"nodes": []}${' '.repeat(32)}`);
+        expect(() => decodeColumnarGraph(json.buffer)).toThrow('Not a columnar graph');
+    });
+
+    test('rejects other versions', () => {
+        const buffer = loadFixture();
+        new DataView(buffer).setUint32(8, 99, true);
+        expect(() => decodeColumnarGraph(buffer)).toThrow('Unsupported columnar graph version 99');
+    });
+});
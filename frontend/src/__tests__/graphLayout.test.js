@@ -0,0 +1,93 @@
+import { buildEdgeMaps, computeLayout, findDescendants, NODE_HEIGHT, NODE_STYLES } from '../graphLayout';
+
+const NODE_IDS = ['base', 'tox', 'tox-py3', 'docs'];
+const EDGES = [
+    { source: 'base', target: 'tox' },
+    { source: 'tox', target: 'tox-py3' },
+    { source: 'base', target: 'docs' },
+];
+
+const positionOf = (layout, id) => {
+    const i = layout.ids.indexOf(id);
+    return { x: layout.positions[i * 2], y: layout.positions[i * 2 + 1] };
+};
+
+describe('buildEdgeMaps / findDescendants', () => {
+    test('indexes children by source', () => {
+        const { childrenBySource } = buildEdgeMaps(EDGES);
+        expect(childrenBySource.get('base')).toEqual(['tox', 'docs']);
+        expect(childrenBySource.get('tox-py3')).toBeUndefined();
+    });
+
+    test('collects descendants transitively', () => {
+        const { childrenBySource } = buildEdgeMaps(EDGES);
+        expect([...findDescendants(childrenBySource, 'base')].sort()).toEqual(['docs', 'tox', 'tox-py3']);
+        expect([...findDescendants(childrenBySource, 'tox')]).toEqual(['tox-py3']);
+        expect(findDescendants(childrenBySource, 'docs').size).toBe(0);
+    });
+
+    test('terminates on cycles', () => {
+        const { childrenBySource } = buildEdgeMaps([{ source: 'a', target: 'b' }, { source: 'b', target: 'a' }]);
+        expect([...findDescendants(childrenBySource, 'a')].sort()).toEqual(['a', 'b']);
+    });
+});
+
+describe('computeLayout', () => {
+    test('grid places nodes in rows that fit the available width', () => {
+        const { spacingX, spacingY } = NODE_STYLES.medium;
+        const layout = computeLayout(NODE_IDS, EDGES, { availableWidth: spacingX * 2 });
+        expect(layout.ids).toEqual(NODE_IDS);
+        expect(layout.direction).toBeNull();
+        expect(positionOf(layout, 'base')).toEqual({ x: 100, y: 100 });
+        expect(positionOf(layout, 'tox')).toEqual({ x: 100 + spacingX, y: 100 });
+        expect(positionOf(layout, 'tox-py3')).toEqual({ x: 100, y: 100 + spacingY });
+        expect(Array.from(layout.edgeIndexes)).toEqual([0, 1, 2]);
+    });
+
+    test('grid keeps at least one column', () => {
+        const layout = computeLayout(NODE_IDS, EDGES, { availableWidth: 10, nodeSize: 'big' });
+        expect(NODE_IDS.map((id) => positionOf(layout, id).x)).toEqual([100, 100, 100, 100]);
+    });
+
+    test('tree ranks children after their parents', () => {
+        const layout = computeLayout(NODE_IDS, EDGES, { layoutMode: 'tree', layoutDirection: 'TB' });
+        expect(layout.direction).toBe('TB');
+        const base = positionOf(layout, 'base');
+        const tox = positionOf(layout, 'tox');
+        const docs = positionOf(layout, 'docs');
+        expect(tox.y).toBeGreaterThan(base.y);
+        expect(docs.y).toBe(tox.y);
+        expect(positionOf(layout, 'tox-py3').y).toBeGreaterThan(tox.y);
+
+        const horizontal = computeLayout(NODE_IDS, EDGES, { layoutMode: 'tree', layoutDirection: 'LR' });
+        expect(positionOf(horizontal, 'tox').x).toBeGreaterThan(positionOf(horizontal, 'base').x);
+    });
+
+    test('tree positions are top-left corners', () => {
+        const layout = computeLayout(['a', 'b'], [{ source: 'a', target: 'b' }], { layoutMode: 'tree', nodeSize: 'small' });
+        // dagre centers the first rank at half the node size from the origin
+        expect(positionOf(layout, 'a')).toEqual({ x: 0, y: 0 });
+        expect(positionOf(layout, 'b').x).toBe(0);
+        expect(positionOf(layout, 'b').y).toBeGreaterThanOrEqual(NODE_HEIGHT);
+    });
+
+    test('search keeps matches, the selection and its parent', () => {
+        let layout = computeLayout(NODE_IDS, EDGES, { searchQuery: 'PY3' });
+        expect(layout.ids).toEqual(['tox-py3']);
+        expect(Array.from(layout.edgeIndexes)).toEqual([]);
+
+        layout = computeLayout(NODE_IDS, EDGES, { searchQuery: 'py3', selectedName: 'docs', selectedParent: 'tox' });
+        expect(layout.ids).toEqual(['tox', 'tox-py3', 'docs']);
+        // Only edges with both ends visible
+        expect(Array.from(layout.edgeIndexes)).toEqual([1]);
+    });
+
+    test('descendant view shows the selection and its descendants only', () => {
+        const layout = computeLayout(NODE_IDS, EDGES, {
+            searchQuery: 'docs', selectedName: 'tox', descendants: ['tox-py3'],
+        });
+        expect(layout.ids).toEqual(['tox', 'tox-py3']);
+        expect(Array.from(layout.edgeIndexes)).toEqual([1]);
+        expect(layout.positions).toHaveLength(4);
+    });
+});
@@ -0,0 +1,42 @@
+import { renderHook } from '@testing-library/react';
+import { computeLayout } from '../graphLayout';
+import useLayoutWorker from '../useLayoutWorker';
+
+const NODE_IDS = ['base', 'tox', 'docs'];
+const EDGES = [
+    { id: 'base-tox', source: 'base', target: 'tox', animated: false },
+    { id: 'base-docs', source: 'base', target: 'docs', animated: false },
+];
+const EDGE_PAIRS = EDGES.map(({ source, target }) => ({ source, target }));
+
+describe('useLayoutWorker without Web Workers', () => {
+    test('computes the layout in place', () => {
+        // jsdom has no Worker, so the hook falls back to computeLayout
+        expect(typeof Worker).toBe('undefined');
+        const options = { layoutMode: 'tree', layoutDirection: 'TB' };
+        const { result } = renderHook(() => useLayoutWorker(NODE_IDS, EDGES, options));
+        expect(result.current).toEqual(computeLayout(NODE_IDS, EDGE_PAIRS, options));
+    });
+
+    test('recomputes when the options change', () => {
+        const { result, rerender } = renderHook(({ options }) => useLayoutWorker(NODE_IDS, EDGES, options), {
+            initialProps: { options: { searchQuery: '' } },
+        });
+        expect(result.current.ids).toEqual(NODE_IDS);
+
+        rerender({ options: { searchQuery: 'docs' } });
+        expect(result.current.ids).toEqual(['docs']);
+    });
+
+    test('has no layout for an empty graph', () => {
+        // Stable arguments: the hook lays out again whenever they change identity
+        const options = {};
+        const { result, rerender } = renderHook(({ nodeIds }) => useLayoutWorker(nodeIds, EDGES, options), {
+            initialProps: { nodeIds: NODE_IDS },
+        });
+        expect(result.current).not.toBeNull();
+
+        rerender({ nodeIds: [] });
+        expect(result.current).toBeNull();
+    });
+});
@@ -0,0 +1,67 @@
+// Reader for the columnar graph served by /api/graph/columnar
+// (layout documented in backend/graph_format.py). Arrays are typed-array
+// views over the response buffer; strings and vars are decoded on demand.
+
+const MAGIC = 'ZVGRAPH\0';
+const VERSION = 2;
+const HEADER_SIZE = 32;
+// depFlags bits
+export const DEP_SOFT = 1;
+
+export function decodeColumnarGraph(buffer) {
+  const view = new DataView(buffer);
+  const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 8));
+  if (magic !== MAGIC) throw new Error('Not a columnar graph');
+  const version = view.getUint32(8, true);
+  if (version !== VERSION) throw new Error(`Unsupported columnar graph version ${version}`);
+
+  const jobCount = view.getUint32(12, true);
+  const stringCount = view.getUint32(16, true);
+  const depCount = view.getUint32(20, true);
+  const stringBytes = view.getUint32(24, true);
+  const varBytes = view.getUint32(28, true);
+
+  // Typed arrays use the platform byte order, which is little-endian in every browser we support
+  let offset = HEADER_SIZE;
+  const take = (Type, count) => {
+    const array = new Type(buffer, offset, count);
+    offset += count * 4;
+    return array;
+  };
+  const stringOffsets = take(Uint32Array, stringCount + 1);
+  const parents = take(Int32Array, jobCount);
+  const depOffsets = take(Uint32Array, jobCount + 1);
+  const deps = take(Uint32Array, depCount);
+  const depFlags = new Uint8Array(buffer, offset, depCount);
+  offset += (depCount + 3) & ~3;
+  const sources = take(Int32Array, jobCount);
+  const varOffsets = take(Uint32Array, jobCount + 1);
+  const stringData = new Uint8Array(buffer, offset, stringBytes);
+  const varData = new Uint8Array(buffer, offset + stringBytes, varBytes);
+
+  const decoder = new TextDecoder();
+  const string = (index) => decoder.decode(stringData.subarray(stringOffsets[index], stringOffsets[index + 1]));
+
+  return {
+    jobCount,
+    parents,
+    depOffsets,
+    deps,
+    depFlags,
+    sources,
+    string,
+    name: (job) => string(job),
+    parent: (job) => (parents[job] < 0 ? null : string(parents[job])),
+    dependencies: (job) => Array.from(deps.subarray(depOffsets[job], depOffsets[job + 1]), string),
+    // Whether each of dependencies(job) is soft, in the same order
+    softDependencies: (job) => Array.from(
+      depFlags.subarray(depOffsets[job], depOffsets[job + 1]),
+      (flags) => (flags & DEP_SOFT) !== 0,
+    ),
+    source: (job) => (sources[job] < 0 ? null : string(sources[job])),
+    vars: (job) => {
+      const block = varData.subarray(varOffsets[job], varOffsets[job + 1]);
+      return block.length ? JSON.parse(decoder.decode(block)) : {};
+    },
+  };
+}
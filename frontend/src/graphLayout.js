@@ -0,0 +1,111 @@
+import dagre from 'dagre';
+
+// Shared by the main thread (styling) and the layout worker (positions)
+export const NODE_STYLES = {
+  small: { width: 180, fontSize: '12px', spacingX: 250, spacingY: 100 },
+  medium: { width: 250, fontSize: '14px', spacingX: 350, spacingY: 150 },
+  big: { width: 350, fontSize: '16px', spacingX: 450, spacingY: 200 },
+};
+
+export const NODE_HEIGHT = 50; // Approximated height, used by dagre
+
+// Lookup structures built once per graph instead of scanning the edge list
+export function buildEdgeMaps(edges) {
+  const childrenBySource = new Map();
+  edges.forEach((edge) => {
+    let children = childrenBySource.get(edge.source);
+    if (!children) {
+      children = [];
+      childrenBySource.set(edge.source, children);
+    }
+    children.push(edge.target);
+  });
+  return { childrenBySource };
+}
+
+export function findDescendants(childrenBySource, name) {
+  const descendants = new Set();
+  const stack = [name];
+  while (stack.length > 0) {
+    const current = stack.pop();
+    (childrenBySource.get(current) || []).forEach((child) => {
+      if (!descendants.has(child)) {
+        descendants.add(child);
+        stack.push(child);
+      }
+    });
+  }
+  return descendants;
+}
+
+/**
+ * Filters and lays out the graph. Runs inside the layout worker, so it only
+ * deals with ids and edge endpoints, never with the job details.
+ *
+ * nodeIds: array of job names; edges: array of { source, target }.
+ * Returns { ids, positions, edgeIndexes, direction }: the visible node ids,
+ * their top-left positions as [x0, y0, x1, y1, ...], and the indexes (into
+ * edges) of the visible edges.
+ */
+export function computeLayout(nodeIds, edges, options) {
+  const {
+    searchQuery = '',
+    selectedName = null,
+    selectedParent = null,
+    descendants = [],
+    layoutMode = 'grid',
+    layoutDirection = 'TB',
+    nodeSize = 'medium',
+    availableWidth = 1000,
+  } = options;
+  const { width, spacingX, spacingY } = NODE_STYLES[nodeSize];
+
+  let ids = nodeIds;
+  let edgeIndexes = edges.map((_, index) => index);
+
+  if (searchQuery || descendants.length > 0) {
+    // Filter (Search OR Descendants view)
+    const descendantSet = new Set(descendants);
+    const query = searchQuery.toLowerCase();
+    ids = nodeIds.filter((id) => {
+      if (descendantSet.size > 0 && selectedName) {
+        // Descendant View Mode: Show Parent + Descendants
+        return id === selectedName || descendantSet.has(id);
+      }
+      // Search Mode
+      return id.toLowerCase().includes(query) || id === selectedName || id === selectedParent;
+    });
+    const visible = new Set(ids);
+    edgeIndexes = edgeIndexes.filter((index) => visible.has(edges[index].source) && visible.has(edges[index].target));
+  }
+
+  const positions = new Float64Array(ids.length * 2);
+  if (layoutMode === 'tree') {
+    const dagreGraph = new dagre.graphlib.Graph();
+    dagreGraph.setDefaultEdgeLabel(() => ({}));
+    dagreGraph.setGraph({ rankdir: layoutDirection, nodesep: 50, ranksep: 50 });
+    ids.forEach((id) => dagreGraph.setNode(id, { width, height: NODE_HEIGHT }));
+    edgeIndexes.forEach((index) => dagreGraph.setEdge(edges[index].source, edges[index].target));
+    dagre.layout(dagreGraph);
+
+    ids.forEach((id, i) => {
+      // dagre positions are centers, React Flow positions are top-left corners
+      const node = dagreGraph.node(id);
+      positions[i * 2] = node.x - width / 2;
+      positions[i * 2 + 1] = node.y - NODE_HEIGHT / 2;
+    });
+  } else {
+    const columns = Math.max(1, Math.floor(availableWidth / spacingX));
+    ids.forEach((_, i) => {
+      positions[i * 2] = 100 + (i % columns) * spacingX;
+      positions[i * 2 + 1] = 100 + Math.floor(i / columns) * spacingY;
+    });
+  }
+
+  return {
+    ids,
+    positions,
+    edgeIndexes: Int32Array.from(edgeIndexes),
+    direction: layoutMode === 'tree' ? layoutDirection : null,
+  };
+}
@@ -0,0 +1,15 @@
+import { computeLayout } from './graphLayout';
+
+// Graph structure, sent once per fetched graph; layout requests only carry options
+let graph = { nodeIds: [], edges: [] };
+
+self.onmessage = (event) => {
+  const message = event.data;
+  if (message.type === 'graph') {
+    graph = { nodeIds: message.nodeIds, edges: message.edges };
+  } else if (message.type === 'layout') {
+    const layout = computeLayout(graph.nodeIds, graph.edges, message.options);
+    // Typed arrays are transferred, not copied
+    self.postMessage({ requestId: message.requestId, layout }, [layout.positions.buffer, layout.edgeIndexes.buffer]);
+  }
+};
@@ -0,0 +1,49 @@
+import { useEffect, useMemo, useRef, useState } from 'react';
+import { computeLayout } from './graphLayout';
+
+/**
+ * Computes the graph layout (filtering + dagre/grid positions) off the main
+ * thread. Only the latest request's result is applied, so slow layouts never
+ * overwrite newer ones. Falls back to computing in place where Web Workers
+ * are unavailable (e.g. jsdom in tests).
+ */
+export default function useLayoutWorker(nodeIds, edges, options) {
+  const workerRef = useRef(null);
+  const requestRef = useRef(0);
+  const [layout, setLayout] = useState(null);
+
+  // Only the endpoints cross the worker boundary, not the job details
+  const edgePairs = useMemo(() => edges.map(({ source, target }) => ({ source, target })), [edges]);
+
+  useEffect(() => {
+    if (typeof Worker === 'undefined') return undefined;
+    const worker = new Worker(new URL('./layout.worker.js', import.meta.url), { type: 'module' });
+    worker.onmessage = (event) => {
+      if (event.data.requestId === requestRef.current) {
+        setLayout(event.data.layout);
+      }
+    };
+    workerRef.current = worker;
+    return () => {
+      worker.terminate();
+      workerRef.current = null;
+    };
+  }, []);
+
+  useEffect(() => {
+    workerRef.current?.postMessage({ type: 'graph', nodeIds, edges: edgePairs });
+  }, [nodeIds, edgePairs]);
+
+  useEffect(() => {
+    const requestId = ++requestRef.current;
+    if (nodeIds.length === 0) {
+      setLayout(null);
+    } else if (workerRef.current) {
+      workerRef.current.postMessage({ type: 'layout', requestId, options });
+    } else {
+      setLayout(computeLayout(nodeIds, edgePairs, options));
+    }
+  }, [nodeIds, edgePairs, options]);
+
+  return layout;
+}